@@ -0,0 +1,109 @@
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - only outside the locked environment; clients then get gzip
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/css", "application/javascript")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, honouring q-values."""
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding] = quality
+    wildcard = weights.get("*", 0.0)
+    candidates = [("gzip", weights.get("gzip", wildcard))]
+    if brotli is not None:
+        # listed first so it wins ties
+        candidates.insert(0, ("br", weights.get("br", wildcard)))
+    best, quality = max(candidates, key=lambda candidate: candidate[1])
+    return best if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for JSON and text responses.
+
+    Only responses sent as a single body of at least ``minimum_size`` bytes are compressed;
+    streamed responses (Server-Sent Events) pass through untouched so events are not held
+    back. Compressed responses get ``Vary: Accept-Encoding`` and a weak ``ETag``, since the
+    bytes differ from the identity representation the strong validator was computed for.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            compressible = self._compressible(start["status"], headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if message.get("more_body", False) or not compressible or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").split(";")[0].strip().lower() in _COMPRESSIBLE_TYPES
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        # a fixed mtime keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
@@ -1,30 +1,78 @@
+import importlib
+from typing import Any, Dict
+
 from fastapi import Depends
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from ..config import Settings, get_settings
-from ..integrations.supabase_client import SupabaseClient
-from ..repositories import AnswerRepository, ProgressRepository, QuestionRepository, UserRepository
-from ..services import AnswerService, EvaluationService, QuestionService, ReflectionService
+from ..integrations.supabase_client import CircuitBreaker, SupabaseClient
+from ..repositories import (
+    SupabaseBatchWriter,
+    AnswerRepository,
+    IdempotencyStore,
+    ProgressRepository,
+    QuestionRepository,
+    SQLiteAnswerRepository,
+    SQLiteDatabase,
+    SQLiteProgressRepository,
+    SQLiteUserRepository,
+    UserRepository,
+)
+from ..services import (
+    AdmissionController,
+    AnswerService,
+    EvaluationCache,
+    EvaluationJobQueue,
+    EvaluationPolicy,
+    EvaluationService,
+    InProcessJobBackend,
+    JobBackend,
+    ModelRouter,
+    PreScorer,
+    QuestionService,
+    ReflectionService,
+)
 
 _QUESTION_REPOSITORY: QuestionRepository | None = None
 _PROGRESS_REPOSITORY: ProgressRepository | None = None
 _ANSWER_REPOSITORY: AnswerRepository | None = None
+_ANSWER_BATCH_WRITER: SupabaseBatchWriter | None = None
+_PROGRESS_OUTBOX: SupabaseBatchWriter | None = None
 _USER_REPOSITORY: UserRepository | None = None
+_SQLITE_DATABASE: SQLiteDatabase | None = None
 _OPENAI_CLIENT: OpenAI | None = None
+_ASYNC_OPENAI_CLIENT: AsyncOpenAI | None = None
 _EVALUATION_SERVICE: EvaluationService | None = None
 _QUESTION_SERVICE: QuestionService | None = None
 _ANSWER_SERVICE: AnswerService | None = None
 _REFLECTION_SERVICE: ReflectionService | None = None
+_EVALUATION_JOB_QUEUE: EvaluationJobQueue | None = None
+_ADMISSION_CONTROLLER: AdmissionController | None = None
 _SUPABASE_CLIENT: SupabaseClient | None = None
+_SUPABASE_BREAKER: CircuitBreaker | None = None
 
 
 def _question_repository(settings: Settings) -> QuestionRepository:
     global _QUESTION_REPOSITORY
     if _QUESTION_REPOSITORY is None:
-        _QUESTION_REPOSITORY = QuestionRepository(settings.question_source)
+        _QUESTION_REPOSITORY = QuestionRepository(
+            settings.question_source,
+            reload_seconds=settings.question_reload_seconds,
+            compiled_path=settings.question_compiled_path,
+        )
     return _QUESTION_REPOSITORY
 
 
+def _supabase_breaker(settings: Settings) -> CircuitBreaker:
+    global _SUPABASE_BREAKER
+    if _SUPABASE_BREAKER is None:
+        _SUPABASE_BREAKER = CircuitBreaker(
+            failure_threshold=settings.supabase_breaker_threshold,
+            reset_seconds=settings.supabase_breaker_reset_seconds,
+        )
+    return _SUPABASE_BREAKER
+
+
 def _supabase_client(settings: Settings) -> SupabaseClient | None:
     global _SUPABASE_CLIENT
     if settings.supabase_url and settings.supabase_service_key:
@@ -32,36 +80,90 @@ def _supabase_client(settings: Settings) -> SupabaseClient | None:
             _SUPABASE_CLIENT = SupabaseClient(
                 settings.supabase_url,
                 settings.supabase_service_key,
+                settings.supabase_timeout_seconds,
+                max_connections=settings.supabase_max_connections,
+                max_keepalive_connections=settings.supabase_max_keepalive_connections,
+                http2=settings.supabase_http2,
+                max_retries=settings.supabase_max_retries,
+                breaker=_supabase_breaker(settings),
             )
     return _SUPABASE_CLIENT
 
 
+def _sqlite_database(settings: Settings) -> SQLiteDatabase:
+    global _SQLITE_DATABASE
+    if _SQLITE_DATABASE is None:
+        _SQLITE_DATABASE = SQLiteDatabase(settings.sqlite_path)
+    return _SQLITE_DATABASE
+
+
 def _progress_repository(settings: Settings) -> ProgressRepository:
     global _PROGRESS_REPOSITORY
+    if _PROGRESS_REPOSITORY is None and settings.storage_backend.lower() == "sqlite":
+        _PROGRESS_REPOSITORY = SQLiteProgressRepository(_sqlite_database(settings))
     if _PROGRESS_REPOSITORY is None:
         supabase = _supabase_client(settings)
         _PROGRESS_REPOSITORY = ProgressRepository(
             settings.progress_store_path,
             supabase_client=supabase,
             supabase_table=settings.supabase_progress_table if supabase else None,
+            outbox=_progress_outbox(settings),
+            compact_interval_seconds=settings.progress_compact_interval_seconds,
+            compact_threshold=settings.progress_compact_threshold,
         )
     return _PROGRESS_REPOSITORY
 
 
+def _answer_batch_writer(settings: Settings) -> SupabaseBatchWriter | None:
+    global _ANSWER_BATCH_WRITER
+    supabase = _supabase_client(settings)
+    # also the replay queue for direct inserts that fail when batching is off
+    if supabase and _ANSWER_BATCH_WRITER is None:
+        _ANSWER_BATCH_WRITER = SupabaseBatchWriter(
+            supabase,
+            settings.supabase_answers_table,
+            settings.answers_outbox_path,
+            batch_size=settings.supabase_batch_size,
+            window_seconds=settings.supabase_batch_window_seconds,
+        )
+    return _ANSWER_BATCH_WRITER
+
+
+def _progress_outbox(settings: Settings) -> SupabaseBatchWriter | None:
+    global _PROGRESS_OUTBOX
+    supabase = _supabase_client(settings)
+    if supabase and _PROGRESS_OUTBOX is None:
+        _PROGRESS_OUTBOX = SupabaseBatchWriter(
+            supabase,
+            settings.supabase_progress_table,
+            settings.progress_outbox_path,
+            batch_size=settings.supabase_batch_size,
+            window_seconds=settings.supabase_batch_window_seconds,
+            conflict_column="user_id",
+        )
+    return _PROGRESS_OUTBOX
+
+
 def _answer_repository(settings: Settings) -> AnswerRepository:
     global _ANSWER_REPOSITORY
+    if _ANSWER_REPOSITORY is None and settings.storage_backend.lower() == "sqlite":
+        _ANSWER_REPOSITORY = SQLiteAnswerRepository(_sqlite_database(settings))
     if _ANSWER_REPOSITORY is None:
         supabase = _supabase_client(settings)
         _ANSWER_REPOSITORY = AnswerRepository(
             settings.answers_store_path,
             supabase_client=supabase,
             supabase_table=settings.supabase_answers_table if supabase else None,
+            batch_writer=_answer_batch_writer(settings),
+            batch_writes=settings.supabase_batch_writes,
         )
     return _ANSWER_REPOSITORY
 
 
 def _user_repository(settings: Settings) -> UserRepository:
     global _USER_REPOSITORY
+    if _USER_REPOSITORY is None and settings.storage_backend.lower() == "sqlite":
+        _USER_REPOSITORY = SQLiteUserRepository(_sqlite_database(settings))
     if _USER_REPOSITORY is None:
         _USER_REPOSITORY = UserRepository(settings.user_metadata_path)
     return _USER_REPOSITORY
@@ -70,15 +172,73 @@ def _user_repository(settings: Settings) -> UserRepository:
 def _openai_client(settings: Settings) -> OpenAI:
     global _OPENAI_CLIENT
     if _OPENAI_CLIENT is None:
-        _OPENAI_CLIENT = OpenAI(api_key=settings.openai_api_key)
+        # retries are handled by EvaluationService so they share one deadline
+        _OPENAI_CLIENT = OpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.openai_timeout_seconds,
+            max_retries=0,
+        )
     return _OPENAI_CLIENT
 
 
+def _async_openai_client(settings: Settings) -> AsyncOpenAI:
+    global _ASYNC_OPENAI_CLIENT
+    if _ASYNC_OPENAI_CLIENT is None:
+        _ASYNC_OPENAI_CLIENT = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.openai_timeout_seconds,
+            max_retries=0,
+        )
+    return _ASYNC_OPENAI_CLIENT
+
+
 def _evaluation_service(settings: Settings) -> EvaluationService:
     global _EVALUATION_SERVICE
     if _EVALUATION_SERVICE is None:
         _EVALUATION_SERVICE = EvaluationService(
-            _openai_client(settings), settings.evaluation_model
+            _openai_client(settings),
+            settings.evaluation_model,
+            async_client=_async_openai_client(settings),
+            cache=(
+                EvaluationCache(
+                    max_entries=settings.evaluation_cache_size,
+                    ttl_seconds=settings.evaluation_cache_ttl_seconds,
+                    disk_path=settings.evaluation_cache_path,
+                )
+                if settings.evaluation_cache_size > 0
+                else None
+            ),
+            router=ModelRouter(
+                settings.evaluation_model,
+                fast_model=settings.evaluation_fast_model,
+                strong_model=settings.evaluation_strong_model,
+                short_answer_words=settings.evaluation_short_answer_words,
+                long_answer_words=settings.evaluation_long_answer_words,
+                long_answer_seconds=settings.evaluation_long_answer_seconds,
+            ),
+            max_tokens=settings.evaluation_max_tokens or None,
+            json_mode=settings.evaluation_json_mode,
+            policy=EvaluationPolicy(
+                attempt_timeout=settings.openai_timeout_seconds,
+                max_attempts=settings.evaluation_max_attempts,
+                deadline_seconds=settings.evaluation_deadline_seconds,
+                hedge=settings.evaluation_hedge,
+                hedge_percentile=settings.evaluation_hedge_percentile,
+                hedge_min_samples=settings.evaluation_hedge_min_samples,
+                fallback_model=settings.evaluation_fallback_model,
+                local_fallback=settings.evaluation_local_fallback,
+            ),
+            prescorer=(
+                PreScorer(
+                    min_words=settings.prescorer_min_words,
+                    min_unique_ratio=settings.prescorer_min_unique_ratio,
+                    min_wordlike_ratio=settings.prescorer_min_wordlike_ratio,
+                    max_chars_per_second=settings.prescorer_max_chars_per_second,
+                    max_similarity=settings.prescorer_max_similarity,
+                )
+                if settings.prescorer_enabled
+                else None
+            ),
         )
     return _EVALUATION_SERVICE
 
@@ -103,10 +263,48 @@ def _answer_service(settings: Settings) -> AnswerService:
             _evaluation_service(settings),
             _answer_repository(settings),
             _progress_repository(settings),
+            IdempotencyStore(settings.idempotency_store_path),
         )
+        # keeps the materialized reflection weeks current without re-reading the store
+        _ANSWER_SERVICE.subscribe(_reflection_service(settings).record_answer)
     return _ANSWER_SERVICE
 
 
+def _job_backend(settings: Settings) -> JobBackend:
+    if settings.evaluation_queue_backend == "memory":
+        return InProcessJobBackend(
+            max_depth=settings.evaluation_queue_max_depth,
+            journal_path=settings.evaluation_queue_journal_path,
+        )
+    # "package.module:factory" — the factory receives Settings and returns a JobBackend
+    module_name, _, attribute = settings.evaluation_queue_backend.partition(":")
+    factory = getattr(importlib.import_module(module_name), attribute)
+    return factory(settings)
+
+
+def _evaluation_job_queue(settings: Settings) -> EvaluationJobQueue:
+    global _EVALUATION_JOB_QUEUE
+    if _EVALUATION_JOB_QUEUE is None:
+        _EVALUATION_JOB_QUEUE = EvaluationJobQueue(
+            _answer_service(settings),
+            _job_backend(settings),
+            concurrency=settings.evaluation_queue_concurrency,
+        )
+    return _EVALUATION_JOB_QUEUE
+
+
+def _admission_controller(settings: Settings) -> AdmissionController:
+    global _ADMISSION_CONTROLLER
+    if _ADMISSION_CONTROLLER is None:
+        _ADMISSION_CONTROLLER = AdmissionController(
+            max_concurrent=settings.admission_max_concurrent,
+            global_rate_per_second=settings.admission_global_rate_per_second,
+            user_rate_per_minute=settings.admission_user_rate_per_minute,
+            user_burst=settings.admission_user_burst,
+        )
+    return _ADMISSION_CONTROLLER
+
+
 def _reflection_service(settings: Settings) -> ReflectionService:
     global _REFLECTION_SERVICE
     if _REFLECTION_SERVICE is None:
@@ -118,6 +316,47 @@ def _reflection_service(settings: Settings) -> ReflectionService:
     return _REFLECTION_SERVICE
 
 
+def shutdown() -> None:
+    """Flush write-behind state held by the cached singletons."""
+
+    if _EVALUATION_JOB_QUEUE is not None:
+        _EVALUATION_JOB_QUEUE.close()
+    if _PROGRESS_REPOSITORY is not None:
+        _PROGRESS_REPOSITORY.close()
+    if _USER_REPOSITORY is not None:
+        _USER_REPOSITORY.close()
+    if _ANSWER_BATCH_WRITER is not None:
+        _ANSWER_BATCH_WRITER.close()
+    if _PROGRESS_OUTBOX is not None:
+        _PROGRESS_OUTBOX.close()
+    if _SQLITE_DATABASE is not None:
+        _SQLITE_DATABASE.close()
+    if _SUPABASE_CLIENT is not None:
+        _SUPABASE_CLIENT.close()
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Counters from the live singletons; sections appear once their component exists."""
+
+    metrics: Dict[str, Any] = {}
+    if _EVALUATION_SERVICE is not None and _EVALUATION_SERVICE.cache is not None:
+        metrics["evaluationCache"] = _EVALUATION_SERVICE.cache.stats()
+    if _EVALUATION_SERVICE is not None:
+        metrics["models"] = _EVALUATION_SERVICE.router.stats()
+        metrics["evaluation"] = _EVALUATION_SERVICE.stats()
+    if _EVALUATION_SERVICE is not None and _EVALUATION_SERVICE.prescorer is not None:
+        metrics["prescorer"] = _EVALUATION_SERVICE.prescorer.stats()
+    if _ADMISSION_CONTROLLER is not None:
+        metrics["admission"] = _ADMISSION_CONTROLLER.stats()
+    if _EVALUATION_JOB_QUEUE is not None:
+        metrics["evaluationQueue"] = _EVALUATION_JOB_QUEUE.stats()
+    if _ANSWER_BATCH_WRITER is not None:
+        metrics["answerOutbox"] = _ANSWER_BATCH_WRITER.stats()
+    if _PROGRESS_OUTBOX is not None:
+        metrics["progressOutbox"] = _PROGRESS_OUTBOX.stats()
+    return metrics
+
+
 def get_settings_dependency() -> Settings:
     return get_settings()
 
@@ -130,5 +369,13 @@ def get_answer_service(settings: Settings = Depends(get_settings_dependency)) ->
     return _answer_service(settings)
 
 
+def get_evaluation_job_queue(settings: Settings = Depends(get_settings_dependency)) -> EvaluationJobQueue:
+    return _evaluation_job_queue(settings)
+
+
+def get_admission_controller(settings: Settings = Depends(get_settings_dependency)) -> AdmissionController:
+    return _admission_controller(settings)
+
+
 def get_reflection_service(settings: Settings = Depends(get_settings_dependency)) -> ReflectionService:
     return _reflection_service(settings)
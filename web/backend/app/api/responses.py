@@ -0,0 +1,28 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - only outside the locked environment; the stdlib encoder produces the same JSON
+    orjson = None
+
+
+def render_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON for ``content``, using orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class for the API: same body as ``JSONResponse``, rendered by orjson.
+
+    Route return values have already been through FastAPI's encoder (or are plain dicts of
+    JSON types), so orjson only has to write bytes. Without orjson this is ``JSONResponse``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
@@ -1,14 +1,30 @@
-from datetime import date
-from typing import Optional
+import hashlib
+import json
+import math
+from contextlib import ExitStack
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from ..models.answer import AnswerCreate, AnswerResult
-from ..models.reflection import ReflectionOverview
-from .deps import get_answer_service, get_question_service, get_reflection_service
-from ..services.answer_service import DuplicateAnswerError
+from ..models.answer import AnswerCreate, AnswerJob, AnswerResult
+from ..models.reflection import ReflectionEntry, ReflectionOverview
+from .deps import (
+    get_admission_controller,
+    get_answer_service,
+    get_evaluation_job_queue,
+    get_question_service,
+    get_reflection_service,
+)
+from .responses import FastJSONResponse
+from ..services.admission import AdmissionError, CapacityExceededError, UserRateLimitedError
+from ..services.answer_service import DuplicateAnswerError, IdempotencyKeyReusedError, SubmissionInProgressError
+from ..services.evaluation_jobs import EvaluationJob, QueueFullError
 
-router = APIRouter(prefix="/v1", tags=["v1"])
+router = APIRouter(prefix="/v1", tags=["v1"], default_response_class=FastJSONResponse)
 
 
 @router.get("/questions/daily")
@@ -16,38 +32,316 @@ async def fetch_daily_question(
     question_service=Depends(get_question_service),
     user_id: Optional[str] = Query(default=None, alias="userId"),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-Id"),
-) -> dict:
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+) -> Response:
+    """Daily question with an ETag; anonymous responses are cacheable by shared caches until midnight."""
+
     resolved_user = user_id or x_user_id
-    return question_service.daily_question(date.today(), resolved_user)
+    today = date.today()
+    if resolved_user:
+        cache_control = "private, no-cache"
+    else:
+        max_age = question_service.shared_max_age(datetime.now())
+        cache_control = f"public, max-age={max_age}, stale-while-revalidate=60"
+    etag = await run_in_threadpool(question_service.daily_etag, today, resolved_user)
+    if etag is not None and _etag_matches(if_none_match, etag):
+        return _not_modified(etag, cache_control)
+    if not resolved_user:
+        # the anonymous payload is serialized once per date and shared by every caller
+        body = await run_in_threadpool(question_service.anonymous_daily_json, today)
+        return _cacheable_json(body, etag, if_none_match, cache_control)
+    payload = await run_in_threadpool(question_service.daily_question, today, resolved_user)
+    # the payload is already plain JSON types, so it skips jsonable_encoder
+    return _cacheable_json(payload, etag, if_none_match, cache_control)
 
 
 @router.post("/answers", response_model=AnswerResult)
 async def submit_answer(
     payload: AnswerCreate,
+    request: Request,
+    answer_service=Depends(get_answer_service),
+    admission=Depends(get_admission_controller),
+    job_queue=Depends(get_evaluation_job_queue),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> Union[AnswerResult, FastJSONResponse]:
+    """Evaluate synchronously, or defer to the job queue (202) when evaluation is saturated."""
+
+    try:
+        with admission.slot(payload.user_id, client=_client_address(request)):
+            return await answer_service.submit_answer_async(
+                question_id=payload.question_id,
+                answer=payload.answer,
+                user_id=payload.user_id,
+                duration_seconds=payload.duration_seconds,
+                idempotency_key=idempotency_key,
+            )
+    except DuplicateAnswerError as exc:
+        raise _conflict(exc) from exc
+    except IdempotencyKeyReusedError as exc:
+        raise _key_reused(exc) from exc
+    except UserRateLimitedError as exc:
+        raise _shed(exc) from exc
+    except CapacityExceededError:
+        pass
+    except RuntimeError as exc:
+        # evaluation failed past its retries and fallbacks
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="We couldn't evaluate your answer. Please try again.",
+        ) from exc
+
+    job = await _enqueue(job_queue, payload, idempotency_key)
+    admission.record_deferred()
+    view = _job_view(job)
+    view.provisional_xp = answer_service.provisional_xp(payload.question_id, payload.duration_seconds)
+    return FastJSONResponse(
+        view.model_dump(mode="json", by_alias=True),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": _job_location(job)},
+    )
+
+
+@router.post("/answers/stream")
+async def stream_answer(
+    payload: AnswerCreate,
+    request: Request,
     answer_service=Depends(get_answer_service),
-) -> AnswerResult:
+    admission=Depends(get_admission_controller),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> StreamingResponse:
+    """Server-Sent Events variant of ``POST /answers``: feedback deltas, then the result."""
+
+    # the admission slot is held until the stream finishes, not just until headers are sent
+    resources = ExitStack()
+    try:
+        resources.enter_context(admission.slot(payload.user_id, client=_client_address(request)))
+        events = answer_service.stream_answer(
+            question_id=payload.question_id,
+            answer=payload.answer,
+            user_id=payload.user_id,
+            duration_seconds=payload.duration_seconds,
+            idempotency_key=idempotency_key,
+        )
+        first = await events.__anext__()
+    except DuplicateAnswerError as exc:
+        resources.close()
+        raise _conflict(exc) from exc
+    except IdempotencyKeyReusedError as exc:
+        resources.close()
+        raise _key_reused(exc) from exc
+    except AdmissionError as exc:
+        resources.close()
+        raise _shed(exc) from exc
+    except BaseException:
+        resources.close()
+        raise
+    return StreamingResponse(
+        _server_sent_events(first, events, resources),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/answers/jobs", response_model=AnswerJob, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_answer(
+    payload: AnswerCreate,
+    request: Request,
+    response: Response,
+    admission=Depends(get_admission_controller),
+    job_queue=Depends(get_evaluation_job_queue),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> AnswerJob:
+    """Deferred ``POST /answers``: accept now, evaluate on the worker pool, poll for the result."""
+
     try:
-        return answer_service.submit_answer(
+        # the worker pool already bounds global concurrency; only the per-user limit applies
+        with admission.slot(payload.user_id, client=_client_address(request), check_global=False):
+            job = await _enqueue(job_queue, payload, idempotency_key)
+    except UserRateLimitedError as exc:
+        raise _shed(exc) from exc
+    response.headers["Location"] = _job_location(job)
+    return _job_view(job)
+
+
+@router.get("/answers/jobs/{job_id}", response_model=AnswerJob)
+async def answer_job_status(job_id: str, job_queue=Depends(get_evaluation_job_queue)) -> AnswerJob:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evaluation job not found.")
+    return _job_view(job)
+
+
+async def _enqueue(job_queue, payload: AnswerCreate, idempotency_key: Optional[str]) -> EvaluationJob:
+    try:
+        return await run_in_threadpool(
+            job_queue.enqueue,
             question_id=payload.question_id,
             answer=payload.answer,
             user_id=payload.user_id,
             duration_seconds=payload.duration_seconds,
+            idempotency_key=idempotency_key,
         )
     except DuplicateAnswerError as exc:
+        raise _conflict(exc) from exc
+    except IdempotencyKeyReusedError as exc:
+        raise _key_reused(exc) from exc
+    except QueueFullError as exc:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You already answered today's prompt. Come back tomorrow for a new question.",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="We're evaluating a lot of answers right now. Please try again shortly.",
+            headers={"Retry-After": "5"},
         ) from exc
 
 
+def _job_location(job: EvaluationJob) -> str:
+    return f"{router.prefix}/answers/jobs/{job.job_id}"
+
+
+def _job_view(job: EvaluationJob) -> AnswerJob:
+    return AnswerJob(
+        job_id=job.job_id,
+        status=job.status,
+        question_id=job.question_id,
+        submitted_at=job.submitted_at,
+        result=job.result,
+        error=job.error,
+    )
+
+
+def _conflict(exc: DuplicateAnswerError) -> HTTPException:
+    if isinstance(exc, SubmissionInProgressError):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Your answer is still being evaluated. Hang tight.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="You already answered today's prompt. Come back tomorrow for a new question.",
+    )
+
+
+def _key_reused(exc: IdempotencyKeyReusedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="This Idempotency-Key was already used for a different answer. Send a new key.",
+    )
+
+
+def _client_address(request: Request) -> Optional[str]:
+    # behind a proxy this is the forwarded address when uvicorn runs with --proxy-headers
+    return request.client.host if request.client else None
+
+
+def _shed(exc: AdmissionError) -> HTTPException:
+    if isinstance(exc, UserRateLimitedError):
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS
+        detail = "You're submitting too quickly. Please wait a moment and try again."
+    else:
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        detail = "We're evaluating a lot of answers right now. Please try again shortly."
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+async def _server_sent_events(
+    first: Tuple[str, object],
+    events: AsyncIterator[Tuple[str, object]],
+    resources: ExitStack,
+) -> AsyncIterator[str]:
+    with resources:
+        yield _sse_frame(*first)
+        try:
+            async for event in events:
+                yield _sse_frame(*event)
+        except RuntimeError:
+            yield _sse_frame("error", {"detail": "We couldn't evaluate your answer. Please try again."})
+
+
+def _sse_frame(event: str, payload: object) -> str:
+    data = payload.model_dump(mode="json", by_alias=True) if isinstance(payload, BaseModel) else payload
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.get("/reflections/overview", response_model=ReflectionOverview)
 async def reflections_overview(
     reflection_service=Depends(get_reflection_service),
     user_id: Optional[str] = Query(default=None, alias="userId"),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-Id"),
     timezone_offset_minutes: int = Query(default=0, alias="timezoneOffsetMinutes"),
-) -> ReflectionOverview:
+    fields: Optional[str] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+) -> Response:
+    """Reflection overview; ``fields`` (e.g. ``questionId,prompt,excerpt``) trims every entry to those keys."""
+
     resolved_user = user_id or x_user_id
     if not resolved_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User identifier required.")
-    return reflection_service.overview(resolved_user, timezone_offset_minutes)
+    omitted = _omitted_entry_fields(fields)
+    cache_control = "private, no-cache"
+    etag = await run_in_threadpool(reflection_service.overview_etag, resolved_user, timezone_offset_minutes)
+    if etag is not None and omitted:
+        # each fieldset is its own representation
+        etag = _variant_etag(etag, ",".join(sorted(omitted)))
+    if etag is not None and _etag_matches(if_none_match, etag):
+        return _not_modified(etag, cache_control)
+    overview = await run_in_threadpool(reflection_service.overview, resolved_user, timezone_offset_minutes)
+    exclude = {"today": omitted, "week": {"__all__": {"entry": omitted}}} if omitted else None
+    body = overview.model_dump_json(by_alias=True, exclude=exclude).encode("utf-8")
+    return _cacheable_json(body, etag, if_none_match, cache_control)
+
+
+def _omitted_entry_fields(fields: Optional[str]) -> Set[str]:
+    """Entry attributes left out for a ``fields`` selection of camelCase entry keys."""
+
+    if not fields:
+        return set()
+    by_alias = {info.alias or name: name for name, info in ReflectionEntry.model_fields.items()}
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - by_alias.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Choose from {', '.join(sorted(by_alias))}.",
+        )
+    return {name for alias, name in by_alias.items() if alias not in requested}
+
+
+def _variant_etag(etag: str, variant: str) -> str:
+    digest = hashlib.blake2b(f"{etag}|{variant}".encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control, "Vary": "X-User-Id"},
+    )
+
+
+def _cacheable_json(content: Any, etag: Optional[str], if_none_match: Optional[str], cache_control: str) -> Response:
+    """JSON response carrying validators; without a precomputed ETag the body hash is used.
+
+    ``content`` may already be serialized JSON bytes, which are sent as they are.
+    """
+
+    if isinstance(content, bytes):
+        response = Response(content, media_type="application/json")
+    else:
+        response = FastJSONResponse(content)
+    if etag is None:
+        etag = f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag, cache_control)
+    response.headers.update({"ETag": etag, "Cache-Control": cache_control, "Vary": "X-User-Id"})
+    return response
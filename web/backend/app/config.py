@@ -21,6 +21,8 @@ class Settings(BaseSettings):
         default=_DATA_DIR / "questions.json",
         alias="QUESTION_SOURCE",
     )
+    question_reload_seconds: float = Field(default=30.0, alias="QUESTION_RELOAD_SECONDS")
+    question_compiled_path: Optional[Path] = Field(default=None, alias="QUESTION_COMPILED_PATH")
     answers_store_path: Path = Field(
         default=_DATA_DIR / "answers.jsonl",
         alias="ANSWERS_STORE_PATH",
@@ -29,16 +31,82 @@ class Settings(BaseSettings):
         default=_DATA_DIR / "progress.json",
         alias="PROGRESS_STORE_PATH",
     )
+    progress_compact_interval_seconds: float = Field(default=30.0, alias="PROGRESS_COMPACT_INTERVAL_SECONDS")
+    progress_compact_threshold: int = Field(default=500, alias="PROGRESS_COMPACT_THRESHOLD")
     user_metadata_path: Path = Field(
         default=_DATA_DIR / "users.json",
         alias="USER_METADATA_PATH",
     )
+    idempotency_store_path: Optional[Path] = Field(
+        default=_DATA_DIR / "idempotency.jsonl",
+        alias="IDEMPOTENCY_STORE_PATH",
+    )
+    storage_backend: str = Field(default="file", alias="STORAGE_BACKEND")
+    sqlite_path: Path = Field(
+        default=_DATA_DIR / "thinkdeeper.db",
+        alias="SQLITE_PATH",
+    )
     supabase_url: Optional[str] = Field(default=None, alias="SUPABASE_URL")
     supabase_service_key: Optional[str] = Field(default=None, alias="SUPABASE_SERVICE_KEY")
     supabase_answers_table: str = Field(default="answers", alias="SUPABASE_ANSWERS_TABLE")
     supabase_progress_table: str = Field(default="user_progress", alias="SUPABASE_PROGRESS_TABLE")
+    supabase_timeout_seconds: float = Field(default=10.0, alias="SUPABASE_TIMEOUT_SECONDS")
+    supabase_max_connections: int = Field(default=20, alias="SUPABASE_MAX_CONNECTIONS")
+    supabase_max_keepalive_connections: int = Field(default=10, alias="SUPABASE_MAX_KEEPALIVE_CONNECTIONS")
+    supabase_http2: bool = Field(default=False, alias="SUPABASE_HTTP2")
+    supabase_max_retries: int = Field(default=2, alias="SUPABASE_MAX_RETRIES")
+    supabase_breaker_threshold: int = Field(default=5, alias="SUPABASE_BREAKER_THRESHOLD")
+    supabase_breaker_reset_seconds: float = Field(default=30.0, alias="SUPABASE_BREAKER_RESET_SECONDS")
+    supabase_batch_writes: bool = Field(default=True, alias="SUPABASE_BATCH_WRITES")
+    supabase_batch_size: int = Field(default=50, alias="SUPABASE_BATCH_SIZE")
+    supabase_batch_window_seconds: float = Field(default=0.5, alias="SUPABASE_BATCH_WINDOW_SECONDS")
+    answers_outbox_path: Path = Field(
+        default=_DATA_DIR / "answers.outbox.jsonl",
+        alias="ANSWERS_OUTBOX_PATH",
+    )
+    progress_outbox_path: Path = Field(
+        default=_DATA_DIR / "progress.outbox.jsonl",
+        alias="PROGRESS_OUTBOX_PATH",
+    )
     evaluation_model: str = Field(default="gpt-4o-mini", alias="EVALUATION_MODEL")
+    evaluation_fast_model: Optional[str] = Field(default=None, alias="EVALUATION_FAST_MODEL")
+    evaluation_strong_model: Optional[str] = Field(default=None, alias="EVALUATION_STRONG_MODEL")
+    evaluation_short_answer_words: int = Field(default=40, alias="EVALUATION_SHORT_ANSWER_WORDS")
+    evaluation_long_answer_words: int = Field(default=150, alias="EVALUATION_LONG_ANSWER_WORDS")
+    evaluation_long_answer_seconds: int = Field(default=240, alias="EVALUATION_LONG_ANSWER_SECONDS")
+    openai_timeout_seconds: float = Field(default=8.0, alias="OPENAI_TIMEOUT_SECONDS")
+    evaluation_max_attempts: int = Field(default=2, alias="EVALUATION_MAX_ATTEMPTS")
+    evaluation_deadline_seconds: float = Field(default=20.0, alias="EVALUATION_DEADLINE_SECONDS")
+    evaluation_hedge: bool = Field(default=True, alias="EVALUATION_HEDGE")
+    evaluation_hedge_percentile: float = Field(default=0.95, alias="EVALUATION_HEDGE_PERCENTILE")
+    evaluation_hedge_min_samples: int = Field(default=20, alias="EVALUATION_HEDGE_MIN_SAMPLES")
+    evaluation_fallback_model: Optional[str] = Field(default=None, alias="EVALUATION_FALLBACK_MODEL")
+    evaluation_local_fallback: bool = Field(default=True, alias="EVALUATION_LOCAL_FALLBACK")
+    evaluation_max_tokens: int = Field(default=200, alias="EVALUATION_MAX_TOKENS")
+    evaluation_json_mode: bool = Field(default=True, alias="EVALUATION_JSON_MODE")
+    evaluation_cache_size: int = Field(default=2048, alias="EVALUATION_CACHE_SIZE")
+    evaluation_cache_ttl_seconds: float = Field(default=86400.0, alias="EVALUATION_CACHE_TTL_SECONDS")
+    evaluation_cache_path: Optional[Path] = Field(default=None, alias="EVALUATION_CACHE_PATH")
+    prescorer_enabled: bool = Field(default=True, alias="PRESCORER_ENABLED")
+    prescorer_min_words: int = Field(default=3, alias="PRESCORER_MIN_WORDS")
+    prescorer_min_unique_ratio: float = Field(default=0.3, alias="PRESCORER_MIN_UNIQUE_RATIO")
+    prescorer_min_wordlike_ratio: float = Field(default=0.5, alias="PRESCORER_MIN_WORDLIKE_RATIO")
+    prescorer_max_chars_per_second: float = Field(default=40.0, alias="PRESCORER_MAX_CHARS_PER_SECOND")
+    prescorer_max_similarity: float = Field(default=0.9, alias="PRESCORER_MAX_SIMILARITY")
+    evaluation_queue_backend: str = Field(default="memory", alias="EVALUATION_QUEUE_BACKEND")
+    evaluation_queue_max_depth: int = Field(default=500, alias="EVALUATION_QUEUE_MAX_DEPTH")
+    evaluation_queue_concurrency: int = Field(default=4, alias="EVALUATION_QUEUE_CONCURRENCY")
+    evaluation_queue_journal_path: Optional[Path] = Field(
+        default=_DATA_DIR / "evaluation_jobs.jsonl",
+        alias="EVALUATION_QUEUE_JOURNAL_PATH",
+    )
+    admission_max_concurrent: int = Field(default=32, alias="ADMISSION_MAX_CONCURRENT")
+    admission_global_rate_per_second: float = Field(default=0.0, alias="ADMISSION_GLOBAL_RATE_PER_SECOND")
+    admission_user_rate_per_minute: float = Field(default=6.0, alias="ADMISSION_USER_RATE_PER_MINUTE")
+    admission_user_burst: int = Field(default=3, alias="ADMISSION_USER_BURST")
     default_timer_seconds: int = Field(default=300, alias="DEFAULT_TIMER_SECONDS")
+    daily_question_max_age_seconds: int = Field(default=300, alias="DAILY_QUESTION_MAX_AGE_SECONDS")
+    compression_minimum_size: int = Field(default=1024, alias="COMPRESSION_MINIMUM_SIZE")
     xp_max: int = Field(default=100, alias="XP_MAX")
     allowed_origins: List[str] = Field(
         default_factory=lambda: ["http://localhost:3000"],
@@ -1,74 +1,238 @@
 from __future__ import annotations
 
+import importlib.util
 import json
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
 
 import httpx
 
+logger = logging.getLogger(__name__)
+
+Payload = Union[Mapping[str, Any], Sequence[Mapping[str, Any]]]
+Filters = Mapping[str, Union[Any, Tuple[str, Any]]]
+
+# statuses worth retrying: rate limiting and transient upstream/gateway failures
+_RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class SupabaseUnavailableError(RuntimeError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class SupabaseRequestError(RuntimeError):
+    """Supabase answered with an error status; 4xx other than 408/429 will fail the same way again."""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in _RETRYABLE_STATUSES or self.status_code >= 500
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open trial → closed again.
+
+    While open, calls fail fast. Once ``reset_seconds`` have passed a single trial call is
+    let through; its outcome either closes the breaker or re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self._reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self._reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Supabase circuit closed after successful trial call")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self._failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Supabase circuit opened after %s failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
 
 class SupabaseClient:
-    """Minimal PostgREST client for Supabase REST endpoints."""
+    """Minimal PostgREST client for Supabase REST endpoints.
+
+    Requests share one pooled ``httpx.Client``; 408/429/5xx responses and transport errors
+    are retried with jittered backoff, and the :class:`CircuitBreaker` fails calls fast while
+    Supabase is unhealthy.
+    """
 
-    def __init__(self, project_url: str, service_key: str, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        project_url: str,
+        service_key: str,
+        timeout: float = 10.0,
+        *,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = False,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
         base = project_url.rstrip("/")
         if not base.endswith("/rest/v1"):
             base = f"{base}/rest/v1"
         self._rest_url = base
         self._service_key = service_key
-        self._client = httpx.Client(timeout=timeout)
-
-    def insert(self, table: str, payload: Union[Mapping[str, Any], Sequence[Mapping[str, Any]]]) -> List[Dict[str, Any]]:
-        body = self._normalize_body(payload)
-        response = self._client.post(
-            self._url_for(table),
-            headers=self._headers(prefer="return=representation"),
-            content=json.dumps(body),
+        self._max_retries = max(0, max_retries)
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self._client = httpx.Client(
+            **self._client_options(timeout, max_connections, max_keepalive_connections, http2)
         )
-        self._raise_for_status(response)
-        return self._safe_json(response)
 
-    def upsert(
-        self,
-        table: str,
-        payload: Union[Mapping[str, Any], Sequence[Mapping[str, Any]]],
-        conflict_column: str,
-    ) -> List[Dict[str, Any]]:
-        body = self._normalize_body(payload)
-        response = self._client.post(
-            self._url_for(table),
-            params={"on_conflict": conflict_column},
-            headers=self._headers(prefer="resolution=merge-duplicates,return=representation"),
-            content=json.dumps(body),
-        )
-        self._raise_for_status(response)
-        return self._safe_json(response)
+    def insert(self, table: str, payload: Payload, *, returning: str = "representation") -> List[Dict[str, Any]]:
+        return self._send(self._insert_request(table, payload, returning))
+
+    def upsert(self, table: str, payload: Payload, conflict_column: str) -> List[Dict[str, Any]]:
+        return self._send(self._upsert_request(table, payload, conflict_column))
 
     def select(
         self,
         table: str,
-        filters: Optional[Mapping[str, Union[Any, Tuple[str, Any]]]] = None,
+        filters: Optional[Filters] = None,
         *,
         order: Optional[Tuple[str, str]] = None,
         limit: Optional[int] = None,
+        any_of: Optional[Sequence[Tuple[str, str, Any]]] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Dict[str, Any]]:
-        params: MutableMapping[str, str] = {"select": "*"}
+        return self._send(self._select_request(table, filters, order, limit, any_of, columns))
+
+    def close(self) -> None:
+        self._client.close()
+
+    def _send(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._check_breaker()
+        attempt = 0
+        settled = False
+        try:
+            while True:
+                try:
+                    response = self._client.request(**request)
+                except httpx.HTTPError as exc:
+                    if not self._should_retry(attempt, None):
+                        settled = True
+                        raise self._transport_failure(exc) from exc
+                else:
+                    if not self._should_retry(attempt, response):
+                        settled = True
+                        return self._finish(response)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            if not settled:
+                # anything else (a closed client, an interrupted backoff) still ends a half-open
+                # trial; otherwise the breaker would wait for its outcome forever
+                self.breaker.record_failure()
+
+    def _insert_request(self, table: str, payload: Payload, returning: str) -> Dict[str, Any]:
+        return {
+            "method": "POST",
+            "url": self._url_for(table),
+            "headers": self._headers(prefer=f"return={returning}"),
+            "content": json.dumps(self._normalize_body(payload)),
+        }
+
+    def _upsert_request(self, table: str, payload: Payload, conflict_column: str) -> Dict[str, Any]:
+        return {
+            "method": "POST",
+            "url": self._url_for(table),
+            "params": {"on_conflict": conflict_column},
+            "headers": self._headers(prefer="resolution=merge-duplicates,return=representation"),
+            "content": json.dumps(self._normalize_body(payload)),
+        }
+
+    def _select_request(
+        self,
+        table: str,
+        filters: Optional[Filters],
+        order: Optional[Tuple[str, str]],
+        limit: Optional[int],
+        any_of: Optional[Sequence[Tuple[str, str, Any]]],
+        columns: Optional[Sequence[str]],
+    ) -> Dict[str, Any]:
+        params: MutableMapping[str, str] = {"select": ",".join(columns) if columns else "*"}
         if filters:
             for column, raw in filters.items():
                 op, value = raw if isinstance(raw, tuple) else ("eq", raw)
                 params[column] = f"{op}.{value}"
+        if any_of:
+            # PostgREST disjunction: rows matching at least one (column, op, value) condition
+            params["or"] = "(" + ",".join(f"{column}.{op}.{value}" for column, op, value in any_of) + ")"
         if order:
             column, direction = order
             params["order"] = f"{column}.{direction}"
         if limit is not None:
             params["limit"] = str(limit)
-        response = self._client.get(
-            self._url_for(table),
-            headers=self._headers(),
-            params=params,
-        )
+        return {"method": "GET", "url": self._url_for(table), "headers": self._headers(), "params": params}
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow():
+            raise SupabaseUnavailableError("Supabase circuit is open; skipping request")
+
+    def _should_retry(self, attempt: int, response: Optional[httpx.Response]) -> bool:
+        if attempt >= self._max_retries:
+            return False
+        return response is None or response.status_code in _RETRYABLE_STATUSES
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self._backoff_cap, self._backoff_base * (2**attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _finish(self, response: httpx.Response) -> List[Dict[str, Any]]:
+        if response.status_code in _RETRYABLE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            # 4xx are caller errors, not signs of an unhealthy upstream
+            self.breaker.record_success()
         self._raise_for_status(response)
         return self._safe_json(response)
 
+    def _transport_failure(self, exc: httpx.HTTPError) -> RuntimeError:
+        self.breaker.record_failure()
+        return RuntimeError(f"Supabase request failed: {exc}")
+
     def _url_for(self, table: str) -> str:
         return f"{self._rest_url}/{table}"
 
@@ -83,7 +247,7 @@ class SupabaseClient:
         return headers
 
     @staticmethod
-    def _normalize_body(payload: Union[Mapping[str, Any], Sequence[Mapping[str, Any]]]) -> List[Mapping[str, Any]]:
+    def _normalize_body(payload: Payload) -> List[Mapping[str, Any]]:
         if isinstance(payload, Mapping):
             return [payload]
         return list(payload)
@@ -94,7 +258,7 @@ class SupabaseClient:
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:  # pragma: no cover - simple pass-through
             detail = exc.response.text
-            raise RuntimeError(f"Supabase request failed: {detail}") from exc
+            raise SupabaseRequestError(f"Supabase request failed: {detail}", exc.response.status_code) from exc
 
     @staticmethod
     def _safe_json(response: httpx.Response) -> List[Dict[str, Any]]:
@@ -107,3 +271,21 @@ class SupabaseClient:
             return [data]
         return []
 
+    @staticmethod
+    def _client_options(
+        timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        http2: bool,
+    ) -> Dict[str, Any]:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for Supabase but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+        return {
+            "timeout": timeout,
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        }
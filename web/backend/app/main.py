@@ -1,15 +1,30 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .api import deps
+from .api.compression import CompressionMiddleware
+from .api.responses import FastJSONResponse
 from .api.routes import router as api_router
 from .config import get_settings
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    deps.shutdown()
+
+
 app = FastAPI(
     title="ThinkDeeper API",
     version="0.1.0",
     description="Backend services for the Thinkle production application.",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -19,6 +34,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
 
 app.include_router(api_router)
 
@@ -26,3 +42,8 @@ app.include_router(api_router)
 @app.get("/healthz", tags=["health"])
 async def healthcheck() -> dict:
     return {"status": "ok"}
+
+
+@app.get("/metricz", tags=["health"])
+async def metrics() -> dict:
+    return deps.collect_metrics()
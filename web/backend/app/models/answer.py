@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -38,3 +38,17 @@ class AnswerResult(BaseModel):
     evaluated_at: datetime = Field(default_factory=datetime.utcnow)
 
     model_config = ConfigDict(populate_by_name=True)
+
+
+class AnswerJob(BaseModel):
+    """Status of a deferred evaluation; ``result`` is set once the job completes."""
+
+    job_id: str = Field(..., alias="jobId")
+    status: Literal["queued", "running", "completed", "failed"]
+    question_id: str = Field(..., alias="questionId")
+    submitted_at: datetime = Field(..., alias="submittedAt")
+    provisional_xp: Optional[int] = Field(default=None, alias="provisionalXp")
+    result: Optional[AnswerResult] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
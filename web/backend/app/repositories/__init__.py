@@ -1,14 +1,32 @@
 """Repository layer for data access."""
 
-from .answer_repository import AnswerRepository, StoredAnswer
+from .answer_repository import AnswerRepository, StoredAnswer, UserSnapshot
+from .file_lock import WorkerFile
+from .idempotency_store import IdempotencyStore
 from .progress_repository import ProgressRepository
-from .question_repository import QuestionRepository
+from .question_repository import QuestionBank, QuestionRepository
+from .sqlite_repositories import (
+    SQLiteAnswerRepository,
+    SQLiteDatabase,
+    SQLiteProgressRepository,
+    SQLiteUserRepository,
+)
+from .supabase_outbox import SupabaseBatchWriter
 from .user_repository import UserRepository
 
 __all__ = [
     "QuestionRepository",
+    "QuestionBank",
     "AnswerRepository",
     "StoredAnswer",
+    "IdempotencyStore",
+    "SupabaseBatchWriter",
+    "UserSnapshot",
     "ProgressRepository",
     "UserRepository",
+    "SQLiteDatabase",
+    "SQLiteAnswerRepository",
+    "SQLiteProgressRepository",
+    "SQLiteUserRepository",
+    "WorkerFile",
 ]
@@ -1,12 +1,16 @@
+import heapq
 import json
 import logging
 import re
+import threading
 from dataclasses import asdict, dataclass
 from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from ..integrations.supabase_client import SupabaseClient
+from .supabase_outbox import SupabaseBatchWriter
+from .file_lock import FileLock, append_line
 
 logger = logging.getLogger(__name__)
 
@@ -24,36 +28,94 @@ class StoredAnswer:
     week_index: Optional[int] = None
 
 
+@dataclass(slots=True)
+class UserSnapshot:
+    """Answer-derived state needed to render a user's daily question."""
+
+    previous: Optional[StoredAnswer]
+    answered_question_ids: Set[str]
+
+
+@dataclass(slots=True)
+class _IndexEntry:
+    """Location and sort keys of a single record inside the JSONL store."""
+
+    offset: int
+    length: int
+    question_id: str
+    week_index: Optional[int]
+    created_at: datetime
+
+
 class AnswerRepository:
     """Persists evaluated answers to either JSONL storage or Supabase."""
 
+    # recent rows scanned by the single-query Supabase snapshot; comfortably covers a week
+    SNAPSHOT_WINDOW = 64
+    # everything but the answer body, for reads that never render it
+    SUMMARY_COLUMNS = (
+        "user_id",
+        "question_id",
+        "feedback",
+        "xp_awarded",
+        "xp_total",
+        "streak",
+        "created_at",
+        "duration_seconds",
+        "week_index",
+    )
+
     def __init__(
         self,
         storage_path: Path,
         supabase_client: Optional[SupabaseClient] = None,
         supabase_table: Optional[str] = None,
+        batch_writer: Optional[SupabaseBatchWriter] = None,
+        batch_writes: bool = True,
     ) -> None:
         self._storage_path = storage_path
         self._storage_path.parent.mkdir(parents=True, exist_ok=True)
         self._supabase = supabase_client if supabase_client and supabase_table else None
         self._supabase_table = supabase_table
+        self._batch_writer = batch_writer if self._supabase else None
+        self._batch_writes = batch_writes
+        self._index_path = storage_path.with_name(f"{storage_path.name}.idx")
+        # other uvicorn workers append to the same files
+        self._file_lock = FileLock(storage_path)
+        self._index: Optional[Dict[str, List[_IndexEntry]]] = None
+        self._indexed_end = 0
+        # users whose index entries are not in created_at order (imports, clock skew between workers)
+        self._unordered_users: Set[str] = set()
+        # requests are served from worker threads; index updates and appends are serialized
+        self._lock = threading.RLock()
+        if self._supabase is None:
+            self._refresh_index()
 
     def save_answer(self, payload: StoredAnswer) -> None:
         """Append the answer to the storage file."""
 
         record: Dict[str, Any] = {**asdict(payload), "created_at": payload.created_at.isoformat()}
         if self._supabase:
+            record["week_index"] = payload.week_index
+            if self._batch_writer is not None and self._batch_writes:
+                self._batch_writer.submit(record)
+                return
             try:
-                record["week_index"] = payload.week_index
                 self._supabase.insert(self._supabase_table, record)  # type: ignore[arg-type]
                 return
             except RuntimeError as exc:
-                logger.warning("Supabase insert failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                if self._batch_writer is not None:
+                    # reads merge the outbox, so the answer stays visible until it is replayed
+                    logger.warning("Supabase insert failed; queued for replay: %s", exc)
+                    self._batch_writer.submit(record)
+                    return
+                logger.warning("Supabase insert failed; using file store for this call: %s", exc)
 
-        with self._storage_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(record, ensure_ascii=False))
-            handle.write("\n")
+        with self._lock:
+            with self._file_lock.exclusive():
+                append_line(self._storage_path, json.dumps(record, ensure_ascii=False))
+            # picks up the line we just wrote (and anything appended by other writers)
+            self._refresh_index()
 
     def latest_before(self, user_id: str, before_date: date) -> Optional[StoredAnswer]:
         """Return the most recent answer submitted before a given date for a user."""
@@ -67,19 +129,20 @@ class AnswerRepository:
                     order=("created_at", "desc"),
                     limit=1,
                 )
-                if not rows:
-                    return None
-                return self._from_record(rows[0])
+                candidates = [
+                    stored
+                    for stored in self._with_pending(user_id, rows)
+                    if stored.created_at.date() < before_date
+                ]
+                return max(candidates, key=lambda stored: stored.created_at, default=None)
             except RuntimeError as exc:
-                logger.warning("Supabase latest_before failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                logger.warning("Supabase latest_before failed; using file store for this call: %s", exc)
 
-        for stored in reversed(list(self._iter_answers())):
-            if stored.user_id != user_id:
-                continue
-            if stored.created_at.date() >= before_date:
+        for entry in reversed(self._entries_for(user_id)):
+            if entry.created_at.date() >= before_date:
                 continue
-            return stored
+            found = self._read_entries([entry])
+            return found[0] if found else None
         return None
 
     def answers_for_week(self, user_id: str, week_index: int) -> List[StoredAnswer]:
@@ -92,22 +155,73 @@ class AnswerRepository:
                     filters={"user_id": user_id, "week_index": ("eq", week_index)},
                     order=("created_at", "asc"),
                 )
-                return [stored for stored in (self._from_record(row) for row in rows) if stored is not None]
+                answers = [stored for stored in self._with_pending(user_id, rows) if stored.week_index == week_index]
+                answers.sort(key=lambda stored: stored.created_at)
+                return answers
             except RuntimeError as exc:
-                logger.warning("Supabase answers_for_week failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                logger.warning("Supabase answers_for_week failed; using file store for this call: %s", exc)
 
-        matches: List[StoredAnswer] = []
-        for stored in self._iter_answers():
-            if stored.user_id != user_id:
-                continue
-            stored_week = stored.week_index
-            if stored_week is None:
-                stored_week = self._week_from_question_id(stored.question_id)
-            if stored_week != week_index:
-                continue
-            matches.append(stored)
-        return matches
+        entries = [entry for entry in self._entries_for(user_id) if entry.week_index == week_index]
+        return self._read_entries(entries)
+
+    def user_snapshot(self, user_id: str, before_date: date, week_index: int) -> UserSnapshot:
+        """Return the latest answer before ``before_date`` and the week's answered ids together.
+
+        Equivalent to :meth:`latest_before` plus :meth:`answered_question_ids`, but done in one
+        pass over the user's index entries (one record read) or one Supabase query.
+        """
+
+        if self._supabase:
+            threshold = datetime.combine(before_date, datetime.min.time(), tzinfo=timezone.utc).isoformat()
+            try:
+                rows = self._supabase.select(
+                    self._supabase_table,
+                    filters={"user_id": user_id},
+                    any_of=[("week_index", "eq", week_index), ("created_at", "lt", threshold)],
+                    order=("created_at", "desc"),
+                    limit=self.SNAPSHOT_WINDOW,
+                    columns=self.SUMMARY_COLUMNS,
+                )
+                previous: Optional[StoredAnswer] = None
+                answered: Set[str] = set()
+                merged = sorted(self._with_pending(user_id, rows), key=lambda stored: stored.created_at, reverse=True)
+                for stored in merged:
+                    if stored.week_index == week_index:
+                        answered.add(stored.question_id)
+                    if previous is None and stored.created_at.date() < before_date:
+                        previous = stored
+                return UserSnapshot(previous=previous, answered_question_ids=answered)
+            except RuntimeError as exc:
+                logger.warning("Supabase user_snapshot failed; using file store for this call: %s", exc)
+
+        previous_entry: Optional[_IndexEntry] = None
+        answered_ids: Set[str] = set()
+        for entry in self._entries_for(user_id):
+            if entry.week_index == week_index:
+                answered_ids.add(entry.question_id)
+            if entry.created_at.date() < before_date:
+                previous_entry = entry
+        found = self._read_entries([previous_entry]) if previous_entry else []
+        return UserSnapshot(previous=found[0] if found else None, answered_question_ids=answered_ids)
+
+    def answered_question_ids(self, user_id: str, week_index: int) -> Set[str]:
+        """Return the question ids a user has answered for a week without loading the answers."""
+
+        if self._supabase:
+            try:
+                rows = self._supabase.select(
+                    self._supabase_table,
+                    filters={"user_id": user_id, "week_index": ("eq", week_index)},
+                    columns=("question_id",),
+                )
+                answered = {row["question_id"] for row in rows if row.get("question_id")}
+                answered.update(
+                    stored.question_id for stored in self._with_pending(user_id, []) if stored.week_index == week_index
+                )
+                return answered
+            except RuntimeError as exc:
+                logger.warning("Supabase answered_question_ids failed; using file store for this call: %s", exc)
+        return {entry.question_id for entry in self._entries_for(user_id) if entry.week_index == week_index}
 
     def recent_answers(
         self,
@@ -124,28 +238,241 @@ class AnswerRepository:
                     order=("created_at", "desc"),
                     limit=limit,
                 )
-                answers = [stored for stored in (self._from_record(row) for row in rows) if stored is not None]
-                return answers
+                answers = self._with_pending(user_id, rows)
+                answers.sort(key=lambda stored: stored.created_at, reverse=True)
+                return answers[:limit] if limit is not None else answers
             except RuntimeError as exc:
-                logger.warning("Supabase recent_answers failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                logger.warning("Supabase recent_answers failed; using file store for this call: %s", exc)
 
-        answers = [stored for stored in self._iter_answers() if stored.user_id == user_id]
-        answers.sort(key=lambda record: record.created_at, reverse=True)
+        entries = sorted(self._entries_for(user_id), key=lambda entry: entry.created_at, reverse=True)
         if limit is not None:
-            return answers[:limit]
+            entries = entries[:limit]
+        return self._read_entries(entries)
+
+    def recent_window(self, user_id: str, since: datetime, older_limit: int = 0) -> List[StoredAnswer]:
+        """Return answers created at or after ``since`` plus the ``older_limit`` newest older ones.
+
+        Results are newest first. The file store walks the user's index entries backwards
+        (normally in submission order) and stops once ``older_limit`` older entries are found,
+        so the cost tracks the window rather than the user's whole history.
+        """
+
+        if self._supabase:
+            threshold = since.isoformat()
+            try:
+                rows = self._supabase.select(
+                    self._supabase_table,
+                    filters={"user_id": user_id, "created_at": ("gte", threshold)},
+                    order=("created_at", "desc"),
+                )
+                if older_limit > 0:
+                    rows += self._supabase.select(
+                        self._supabase_table,
+                        filters={"user_id": user_id, "created_at": ("lt", threshold)},
+                        order=("created_at", "desc"),
+                        limit=older_limit,
+                    )
+                answers = sorted(self._with_pending(user_id, rows), key=lambda stored: stored.created_at, reverse=True)
+                window = [stored for stored in answers if stored.created_at >= since]
+                return window + [stored for stored in answers if stored.created_at < since][:older_limit]
+            except RuntimeError as exc:
+                logger.warning("Supabase recent_window failed; using file store for this call: %s", exc)
+
+        window_entries: List[_IndexEntry] = []
+        older_entries: List[_IndexEntry] = []
+        with self._lock:
+            self._refresh_index()
+            assert self._index is not None
+            entries = self._index.get(user_id, ())
+            if user_id in self._unordered_users:
+                # no early exit without ordering; a bounded heap still avoids sorting everything
+                window_entries = [entry for entry in entries if entry.created_at >= since]
+                older_entries = heapq.nlargest(
+                    older_limit,
+                    (entry for entry in entries if entry.created_at < since),
+                    key=lambda entry: entry.created_at,
+                )
+            else:
+                for entry in reversed(entries):
+                    if entry.created_at >= since:
+                        window_entries.append(entry)
+                    elif len(older_entries) < older_limit:
+                        older_entries.append(entry)
+                    else:
+                        break
+        window_entries.sort(key=lambda entry: entry.created_at, reverse=True)
+        return self._read_entries(window_entries + older_entries)
+
+    def user_version(self, user_id: str) -> Optional[Tuple[int, int]]:
+        """``(answer count, position of the last answer)``, cheap enough to check on every read.
+
+        Changes whenever the user's answers do, including appends from other workers. ``None``
+        on Supabase, where finding out would cost a query.
+        """
+
+        if self._supabase:
+            return None
+        with self._lock:
+            self._refresh_index()
+            assert self._index is not None
+            entries = self._index.get(user_id, ())
+            return len(entries), entries[-1].offset if entries else -1
+
+    def _with_pending(self, user_id: str, rows: List[Dict[str, Any]]) -> List[StoredAnswer]:
+        """Convert Supabase rows and add the user's rows still waiting in the batch writer."""
+
+        answers = [stored for stored in (self._from_record(row) for row in rows) if stored is not None]
+        if self._batch_writer is None:
+            return answers
+        seen = {(stored.question_id, stored.created_at) for stored in answers}
+        for record in self._batch_writer.pending_for(user_id):
+            stored = self._from_record(record)
+            if stored is not None and (stored.question_id, stored.created_at) not in seen:
+                answers.append(stored)
         return answers
 
-    def _iter_answers(self) -> Iterable[StoredAnswer]:
-        if not self._storage_path.exists():
-            return iter(())
-        def generator() -> Iterable[StoredAnswer]:
-            with self._storage_path.open("r", encoding="utf-8") as handle:
+    def rebuild_index(self) -> None:
+        """Discard the side index and re-derive it from the JSONL store."""
+
+        with self._lock:
+            self._index = {}
+            self._indexed_end = 0
+            self._unordered_users = set()
+            with self._file_lock.exclusive():
+                self._index_path.unlink(missing_ok=True)
+            self._refresh_index()
+
+    def _entries_for(self, user_id: str) -> List[_IndexEntry]:
+        with self._lock:
+            self._refresh_index()
+            assert self._index is not None
+            return list(self._index.get(user_id, ()))
+
+    def _read_entries(self, entries: Sequence[_IndexEntry]) -> List[StoredAnswer]:
+        if not entries:
+            return []
+        answers: List[StoredAnswer] = []
+        with self._storage_path.open("rb") as handle:
+            for entry in entries:
+                handle.seek(entry.offset)
+                stored = self._to_stored_answer(handle.read(entry.length).decode("utf-8"))
+                if stored is not None:
+                    answers.append(stored)
+        return answers
+
+    def _refresh_index(self) -> None:
+        """Bring the in-memory index in line with the JSONL store.
+
+        The persisted index is loaded once; afterwards only bytes appended past the last
+        indexed offset are parsed. A store that shrank or no longer matches the index
+        (rewritten, truncated, swapped) triggers a full rebuild.
+        """
+
+        if self._index is None:
+            self._load_index()
+        size = self._storage_path.stat().st_size if self._storage_path.exists() else 0
+        if size < self._indexed_end:
+            logger.info("Answer store shrank below its index; rebuilding %s", self._index_path)
+            self.rebuild_index()
+            return
+        if size > self._indexed_end:
+            self._index_tail()
+
+    def _load_index(self) -> None:
+        self._index = {}
+        self._indexed_end = 0
+        self._unordered_users = set()
+        if not self._index_path.exists():
+            return
+        index: Dict[str, List[_IndexEntry]] = {}
+        indexed_end = 0
+        last: Optional[tuple[str, _IndexEntry]] = None
+        try:
+            with self._index_path.open("r", encoding="utf-8") as handle:
                 for line in handle:
-                    stored = self._to_stored_answer(line)
-                    if stored is not None:
-                        yield stored
-        return generator()
+                    if not line.strip():
+                        continue
+                    raw = json.loads(line)
+                    entry = _IndexEntry(
+                        offset=int(raw["offset"]),
+                        length=int(raw["length"]),
+                        question_id=raw["question_id"],
+                        week_index=raw.get("week_index"),
+                        created_at=datetime.fromisoformat(raw["created_at"]),
+                    )
+                    if entry.offset < indexed_end:
+                        # duplicate or out-of-order line; the store is the source of truth
+                        continue
+                    index.setdefault(raw["user_id"], []).append(entry)
+                    indexed_end = entry.offset + entry.length
+                    last = (raw["user_id"], entry)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Answer index %s unreadable; rebuilding: %s", self._index_path, exc)
+            self._index_path.unlink(missing_ok=True)
+            return
+
+        if last is not None and not self._entry_matches(*last):
+            logger.info("Answer index %s is stale; rebuilding", self._index_path)
+            self._index_path.unlink(missing_ok=True)
+            return
+        self._index = index
+        self._indexed_end = indexed_end
+        self._unordered_users = {
+            user_id
+            for user_id, entries in index.items()
+            if any(earlier.created_at > later.created_at for earlier, later in zip(entries, entries[1:]))
+        }
+
+    def _entry_matches(self, user_id: str, entry: _IndexEntry) -> bool:
+        if not self._storage_path.exists():
+            return False
+        with self._storage_path.open("rb") as handle:
+            handle.seek(entry.offset)
+            raw = handle.read(entry.length)
+        stored = self._to_stored_answer(raw.decode("utf-8", errors="replace"))
+        return stored is not None and stored.user_id == user_id and stored.created_at == entry.created_at
+
+    def _index_tail(self) -> None:
+        assert self._index is not None
+        new_lines: List[str] = []
+        with self._storage_path.open("rb") as handle:
+            handle.seek(self._indexed_end)
+            offset = self._indexed_end
+            for raw in handle:
+                if not raw.endswith(b"\n"):
+                    # a concurrent writer is mid-line; index it on the next refresh
+                    break
+                length = len(raw)
+                stored = self._to_stored_answer(raw.decode("utf-8", errors="replace"))
+                if stored is not None and stored.user_id is not None:
+                    week_index = stored.week_index
+                    if week_index is None:
+                        week_index = self._week_from_question_id(stored.question_id)
+                    entries = self._index.setdefault(stored.user_id, [])
+                    if entries and entries[-1].created_at > stored.created_at:
+                        self._unordered_users.add(stored.user_id)
+                    entries.append(
+                        _IndexEntry(offset, length, stored.question_id, week_index, stored.created_at)
+                    )
+                    new_lines.append(
+                        json.dumps(
+                            {
+                                "user_id": stored.user_id,
+                                "offset": offset,
+                                "length": length,
+                                "question_id": stored.question_id,
+                                "week_index": week_index,
+                                "created_at": stored.created_at.isoformat(),
+                            },
+                            ensure_ascii=False,
+                        )
+                    )
+                offset += length
+        self._indexed_end = offset
+        if new_lines:
+            # another worker may index the same tail; _load_index skips the duplicate lines
+            with self._file_lock.exclusive():
+                append_line(self._index_path, "\n".join(new_lines))
 
     @staticmethod
     def _week_from_question_id(question_id: str) -> Optional[int]:
@@ -193,7 +520,3 @@ class AnswerRepository:
             )
         except Exception:
             return None
-
-    def _disable_supabase(self) -> None:
-        self._supabase = None
-        self._supabase_table = None
@@ -0,0 +1,203 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows dev machines; deployments are POSIX
+    fcntl = None  # type: ignore[assignment]
+
+
+class FileLock:
+    """Advisory cross-process lock for one file store, plus a shared generation counter.
+
+    The lock lives on ``<store>.lock`` via ``flock``, so every uvicorn worker (and every
+    thread, since each acquisition opens its own descriptor) is serialized. The same file
+    holds an integer generation that writers :meth:`bump` after changing the store; readers
+    compare :meth:`generation` with the value they cached to know when to reload. Nested
+    acquisition from the thread that already holds the lock is a no-op.
+    """
+
+    def __init__(self, store_path: Path) -> None:
+        self._path = store_path.with_name(f"{store_path.name}.lock")
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._held = threading.local()
+        # without flock, at least serialize this process's threads
+        self._fallback = threading.RLock() if fcntl is None else None
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._acquire(shared=False):
+            yield
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._acquire(shared=True):
+            yield
+
+    def generation(self) -> int:
+        """Current generation; cheap enough to call on every read."""
+
+        try:
+            with self._path.open("rb") as handle:
+                raw = handle.read(32)
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(raw.strip() or 0)
+        except ValueError:
+            # torn read while a writer was bumping; forces the caller to reload
+            return -1
+
+    def bump(self) -> int:
+        """Advance the generation; call while holding :meth:`exclusive`."""
+
+        generation = max(self.generation(), 0) + 1
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, f"{generation:020d}".encode("ascii"), 0)
+        finally:
+            os.close(fd)
+        return generation
+
+    @contextmanager
+    def _acquire(self, shared: bool) -> Iterator[None]:
+        if getattr(self._held, "depth", 0):
+            self._held.depth += 1
+            try:
+                yield
+            finally:
+                self._held.depth -= 1
+            return
+        if self._fallback is not None:
+            with self._fallback:
+                self._held.depth = 1
+                try:
+                    yield
+                finally:
+                    self._held.depth = 0
+            return
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._held.depth = 1
+            try:
+                yield
+            finally:
+                self._held.depth = 0
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+def append_line(path: Path, line: str) -> None:
+    """Append ``line`` with a single ``O_APPEND`` write so concurrent writers never interleave."""
+
+    data = (line + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        written = os.write(fd, data)
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace ``path`` with ``text`` via an fsynced temp file and ``os.replace``."""
+
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        handle.write(text)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+class WorkerFile:
+    """Per-process copy of a single-writer file such as an outbox or journal.
+
+    Files that are appended to and rewritten from one process's memory cannot be shared by
+    several uvicorn workers, so each process writes ``<name>.<pid>`` and holds an exclusive
+    ``flock`` on ``<name>.<pid>.lock`` for as long as it runs. A sibling file whose lock can
+    be taken belongs to a process that has exited; :meth:`adopt_orphans` hands its lines to
+    the caller and deletes it. The plain ``<name>`` left by a single-process deployment is
+    adopted the same way. Without ``flock`` the shared path is used directly.
+    """
+
+    # one claim per path per process, so a second instance reuses the descriptor
+    _claims: Dict[Path, Tuple[int, int]] = {}
+    _claims_lock = threading.Lock()
+
+    def __init__(self, shared_path: Path) -> None:
+        self._shared_path = shared_path
+        shared_path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            self.path = shared_path
+            return
+        self.path = shared_path.with_name(f"{shared_path.name}.{os.getpid()}")
+        with self._claims_lock:
+            fd, users = self._claims.get(self.path, (-1, 0))
+            if users == 0:
+                fd = os.open(self._lock_path(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._claims[self.path] = (fd, users + 1)
+        self._released = False
+
+    def adopt_orphans(self, absorb: Callable[[List[str]], None]) -> int:
+        """Pass the lines of each abandoned sibling file to ``absorb``, then delete the file.
+
+        ``absorb`` must make the lines durable before returning. Returns the number of files
+        adopted.
+        """
+
+        if fcntl is None:
+            return 0
+        adopted = 0
+        for candidate in self._candidates():
+            fd = os.open(self._lock_path(candidate), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its owner is still running
+                if not candidate.exists():
+                    continue  # another worker adopted it first
+                with candidate.open("r", encoding="utf-8") as handle:
+                    lines = [line.rstrip("\n") for line in handle if line.strip()]
+                if lines:
+                    absorb(lines)
+                candidate.unlink()
+                self._lock_path(candidate).unlink(missing_ok=True)
+                adopted += 1
+            finally:
+                os.close(fd)
+        return adopted
+
+    def release(self) -> None:
+        if fcntl is None or self._released:
+            return
+        self._released = True
+        with self._claims_lock:
+            fd, users = self._claims[self.path]
+            if users > 1:
+                self._claims[self.path] = (fd, users - 1)
+                return
+            del self._claims[self.path]
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _candidates(self) -> List[Path]:
+        name = self._shared_path.name
+        candidates = [self._shared_path] if self._shared_path.exists() else []
+        for sibling in self._shared_path.parent.glob(f"{name}.*"):
+            suffix = sibling.name[len(name) + 1 :]
+            if suffix.isdigit() and sibling != self.path:
+                candidates.append(sibling)
+        return sorted(candidates)
+
+    @staticmethod
+    def _lock_path(path: Path) -> Path:
+        return path.with_name(f"{path.name}.lock")
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_lock import FileLock, append_line, write_atomic
+
+
+class IdempotencyStore:
+    """Results of submissions made with an ``Idempotency-Key``, shared by every worker.
+
+    Each entry maps ``(user_id, key)`` to a fingerprint of what was submitted and the result
+    that was returned. Entries are appended to a JSONL file under a cross-process
+    :class:`FileLock`; every worker follows the file forward from the offset it last read, so
+    a retry that lands on another worker, or arrives after a restart, finds the result. Once
+    the file holds twice ``max_entries`` lines it is rewritten with the newest ``max_entries``
+    and the lock's generation is bumped, which makes the other workers reload it.
+
+    Without a path the store only lives in this process's memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 4096) -> None:
+        self._path = path
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._file_lock: Optional[FileLock] = None
+        self._generation: Optional[int] = None
+        self._offset = 0
+        self._lines = 0
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file_lock = FileLock(path)
+
+    def get(self, user_id: str, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """``(fingerprint, result)`` stored for ``key``, or ``None``."""
+
+        with self._lock:
+            self._catch_up()
+            return self._entries.get((user_id, key))
+
+    def put(self, user_id: str, key: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._file_lock is None:
+                self._remember(user_id, key, fingerprint, result)
+                return
+            line = json.dumps(
+                {"user_id": user_id, "key": key, "fingerprint": fingerprint, "result": result}, ensure_ascii=False
+            )
+            with self._file_lock.exclusive():
+                self._catch_up()
+                append_line(self._path, line)  # type: ignore[arg-type]
+                # the line is folded in on the next read, in file order with other workers' lines
+                if self._lines + 1 >= 2 * self._max_entries:
+                    self._catch_up()
+                    self._compact()
+
+    def _catch_up(self) -> None:
+        """Fold in lines other workers appended; reload everything after a compaction."""
+
+        if self._file_lock is None:
+            return
+        generation = self._file_lock.generation()
+        if generation != self._generation:
+            with self._file_lock.shared():
+                self._generation = self._file_lock.generation()
+                self._entries.clear()
+                self._offset = self._lines = 0
+                self._read_forward()
+        elif self._size() > self._offset:
+            with self._file_lock.shared():
+                if self._file_lock.generation() == self._generation:
+                    self._read_forward()
+
+    def _read_forward(self) -> None:
+        if not self._path.exists():  # type: ignore[union-attr]
+            return
+        with self._path.open("rb") as handle:  # type: ignore[union-attr]
+            handle.seek(self._offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    # still being appended; read again from here next time
+                    break
+                self._offset += len(line)
+                self._lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn line from a crash mid-append
+                    continue
+                self._remember(entry["user_id"], entry["key"], entry["fingerprint"], entry["result"])
+
+    def _compact(self) -> None:
+        """Rewrite the file with the newest entries; the caller holds the exclusive lock."""
+
+        lines: List[str] = [
+            json.dumps({"user_id": user_id, "key": key, "fingerprint": fingerprint, "result": result}, ensure_ascii=False)
+            for (user_id, key), (fingerprint, result) in self._entries.items()
+        ]
+        write_atomic(self._path, "".join(line + "\n" for line in lines))  # type: ignore[arg-type]
+        self._generation = self._file_lock.bump()  # type: ignore[union-attr]
+        self._offset = self._size()
+        self._lines = len(lines)
+
+    def _remember(self, user_id: str, key: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        self._entries[(user_id, key)] = (fingerprint, result)
+        self._entries.move_to_end((user_id, key))
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _size(self) -> int:
+        try:
+            return os.stat(self._path).st_size  # type: ignore[arg-type]
+        except FileNotFoundError:
+            return 0
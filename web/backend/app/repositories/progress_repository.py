@@ -1,35 +1,79 @@
 import json
 import logging
+import os
+import threading
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, TextIO, Tuple
 
 from ..integrations.supabase_client import SupabaseClient
+from .file_lock import FileLock, write_atomic
+from .supabase_outbox import SupabaseBatchWriter
 
 logger = logging.getLogger(__name__)
 
 
 class ProgressRepository:
-    """Persists lightweight user progress metrics in JSON or Supabase."""
+    """Persists lightweight user progress metrics in JSON or Supabase.
+
+    The file store is write-behind: progress lives in memory after the first load, each
+    update is appended to ``<store>.journal``, and a background thread periodically folds
+    the journal into an atomically replaced snapshot. :meth:`close` flushes on shutdown.
+
+    Writes and compactions hold a cross-process :class:`FileLock`, so several uvicorn workers
+    can share the store. Each worker reads journal lines appended by others forward from the
+    offset it last reached; only a compaction bumps the lock's generation, which makes the
+    other workers reload the new snapshot.
+
+    With Supabase, an upsert that fails is queued on ``outbox`` and replayed from there;
+    :meth:`fetch` reads a queued row in preference to Supabase until it has been sent.
+    """
+
+    LOCK_STRIPES = 64
 
     def __init__(
         self,
         storage_path: Path,
         supabase_client: Optional[SupabaseClient] = None,
         supabase_table: Optional[str] = None,
+        compact_interval_seconds: float = 30.0,
+        compact_threshold: int = 500,
+        outbox: Optional[SupabaseBatchWriter] = None,
     ) -> None:
         self._storage_path = storage_path
         self._storage_path.parent.mkdir(parents=True, exist_ok=True)
         self._supabase = supabase_client if supabase_client and supabase_table else None
         self._supabase_table = supabase_table
+        self._outbox = outbox if self._supabase else None
+        self._lock = threading.RLock()
+        self._user_locks: List[threading.Lock] = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._journal_path = storage_path.with_name(f"{storage_path.name}.journal")
+        self._rotated_journal_path = storage_path.with_name(f"{storage_path.name}.journal.compacting")
+        self._file_lock = FileLock(storage_path)
+        self._cache: Optional[Dict[str, Dict[str, Optional[int | str]]]] = None
+        self._generation: Optional[int] = None
+        # bytes of the journal already folded into the cache
+        self._journal_offset = 0
+        self._journal: Optional[TextIO] = None
+        self._journal_entries = 0
+        self._compact_interval = compact_interval_seconds
+        self._compact_threshold = compact_threshold
+        self._compact_lock = threading.Lock()
+        self._compact_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
 
     def fetch(self, user_id: str) -> Dict[str, int | str]:
         if self._supabase:
+            queued = self._queued(user_id)
+            if queued is not None:
+                return queued
             try:
                 rows = self._supabase.select(
                     self._supabase_table,
                     filters={"user_id": user_id},
                     limit=1,
+                    columns=("xp_total", "streak", "last_answered_on"),
                 )
                 if rows:
                     row = rows[0]
@@ -40,18 +84,112 @@ class ProgressRepository:
                     }
                 return {"xp_total": 0, "streak": 0, "last_answered_on": None}
             except RuntimeError as exc:
-                logger.warning("Supabase fetch failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                logger.warning("Supabase fetch failed; using file store for this call: %s", exc)
 
-        data = self._read()
-        return data.get(user_id, {"xp_total": 0, "streak": 0, "last_answered_on": None})
+        with self._lock:
+            stored = self._cached().get(user_id)
+            return dict(stored) if stored else {"xp_total": 0, "streak": 0, "last_answered_on": None}
 
     def update(self, user_id: str, xp_awarded: int, submitted_at: datetime) -> Dict[str, int | str]:
+        # read-modify-write of the user's row; concurrent worker threads must not interleave
         if self._supabase:
-            existing = self.fetch(user_id)
-        else:
-            data = self._read()
-            existing = data.get(user_id, {"xp_total": 0, "streak": 0, "last_answered_on": None})
+            # only this user's row is rewritten, so other users' writes need not wait on the network
+            with self._lock_for(user_id):
+                return self._update_supabase(user_id, xp_awarded, submitted_at)
+        with self._lock:
+            return self._update_file(user_id, xp_awarded, submitted_at)
+
+    def close(self) -> None:
+        """Stop the background compactor and fold the journal into the snapshot."""
+
+        self._stopped.set()
+        self._compact_requested.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+            self._compactor = None
+        self.compact()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def compact(self) -> None:
+        """Write the current progress map as the new snapshot and drop the journal it covers."""
+
+        with self._compact_lock, self._lock, self._file_lock.exclusive():
+            if not (self._journal_path.exists() or self._rotated_journal_path.exists()):
+                return
+            snapshot = {user_id: dict(values) for user_id, values in self._cached().items()}
+            self._write_snapshot(snapshot)
+            # replaying a journal over the snapshot is idempotent, so a crash before this is harmless
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._journal_path.unlink(missing_ok=True)
+            self._rotated_journal_path.unlink(missing_ok=True)
+            self._journal_entries = 0
+            self._journal_offset = 0
+            self._generation = self._file_lock.bump()
+
+    def _update_supabase(self, user_id: str, xp_awarded: int, submitted_at: datetime) -> Dict[str, int | str]:
+        existing = self.fetch(user_id)
+        updated = self._next_progress(existing, xp_awarded, submitted_at)
+        record = {"user_id": user_id, **updated}
+        if self._outbox is not None and self._queued(user_id) is not None:
+            # an older row is still queued; a direct upsert would be overwritten when it replays
+            self._outbox.submit(record)
+            return updated
+        try:
+            self._supabase.upsert(self._supabase_table, record, conflict_column="user_id")
+            return updated
+        except RuntimeError as exc:
+            if self._outbox is not None:
+                logger.warning("Supabase upsert failed; queued for replay: %s", exc)
+                self._outbox.submit(record)
+                return updated
+            logger.warning("Supabase upsert failed; using file store for this call: %s", exc)
+        with self._lock, self._file_lock.exclusive():
+            self._record(user_id, updated)
+        return updated
+
+    def _update_file(self, user_id: str, xp_awarded: int, submitted_at: datetime) -> Dict[str, int | str]:
+        # the read must see other workers' writes, so it happens under the same lock as the append
+        with self._file_lock.exclusive():
+            existing = self._cached().get(user_id) or {"xp_total": 0, "streak": 0, "last_answered_on": None}
+            updated = self._next_progress(existing, xp_awarded, submitted_at)
+            self._record(user_id, updated)
+        return updated
+
+    def _lock_for(self, user_id: str) -> threading.Lock:
+        return self._user_locks[hash(user_id) % self.LOCK_STRIPES]
+
+    def _queued(self, user_id: str) -> Optional[Dict[str, int | str]]:
+        """The newest progress row for ``user_id`` still waiting in the outbox, if any."""
+
+        if self._outbox is None:
+            return None
+        pending = self._outbox.pending_for(user_id)
+        if not pending:
+            return None
+        row = pending[-1]
+        return {
+            "xp_total": int(row.get("xp_total", 0)),
+            "streak": int(row.get("streak", 0)),
+            "last_answered_on": row.get("last_answered_on"),
+        }
+
+    def _record(self, user_id: str, updated: Dict[str, int | str]) -> None:
+        """Store ``updated`` in memory and the journal; the caller holds the file lock."""
+
+        self._cached()[user_id] = dict(updated)
+        # no generation bump: other workers pick the line up by reading the journal forward
+        self._append_journal(user_id, updated)
+
+    @classmethod
+    def _next_progress(
+        cls, existing: Dict[str, int | str], xp_awarded: int, submitted_at: datetime
+    ) -> Dict[str, int | str]:
+        """Apply one answer's XP and streak rules to a user's stored progress."""
 
         xp_total = int(existing.get("xp_total", 0) or 0) + xp_awarded
 
@@ -59,7 +197,7 @@ class ProgressRepository:
         streak = int(existing.get("streak", 0) or 0)
 
         today = submitted_at.date()
-        last_answer_date = self._parse_last_answer_date(last_answered_on)
+        last_answer_date = cls._parse_last_answer_date(last_answered_on)
 
         if last_answer_date is None:
             # first tracked answer always starts a fresh streak
@@ -75,25 +213,100 @@ class ProgressRepository:
                 # any missed day wipes the streak; today becomes day one again
                 streak = 1
 
-        updated = {
+        return {
             "xp_total": xp_total,
             "streak": streak,
             "last_answered_on": submitted_at.isoformat(),
         }
 
-        if self._supabase:
+    def _cached(self) -> Dict[str, Dict[str, Optional[int | str]]]:
+        """Return the in-memory progress map, caught up with other processes' writes.
+
+        A changed generation means another process compacted or replaced the store, so
+        everything is reloaded; otherwise only journal lines past the last offset are read.
+        """
+
+        generation = self._file_lock.generation()
+        if self._cache is None or generation != self._generation:
+            if self._journal is not None:
+                # another worker may have compacted; reopen whatever journal is current
+                self._journal.close()
+                self._journal = None
+            with self._file_lock.shared():
+                generation = self._file_lock.generation()
+                data = self._read()
+                # the rotated journal only exists if an older build crashed mid-compaction
+                data.update(self._replay(self._rotated_journal_path)[0])
+                replayed, self._journal_offset = self._replay(self._journal_path)
+                data.update(replayed)
+            self._cache = data
+            self._generation = generation
+        elif self._journal_size() > self._journal_offset:
+            with self._file_lock.shared():
+                if self._file_lock.generation() != self._generation:
+                    # compacted since the check above; reload on the next call
+                    return self._cache
+                replayed, self._journal_offset = self._replay(self._journal_path, self._journal_offset)
+                self._cache.update(replayed)
+        return self._cache
+
+    def _journal_size(self) -> int:
+        try:
+            return os.stat(self._journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _append_journal(self, user_id: str, values: Dict[str, int | str]) -> None:
+        if self._journal is None:
+            self._journal = self._journal_path.open("a", encoding="utf-8")
+        # one write per line on an O_APPEND handle, so lines from several workers never interleave
+        self._journal.write(json.dumps({"user_id": user_id, **values}, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._journal_entries += 1
+        self._ensure_compactor()
+        if self._journal_entries >= self._compact_threshold:
+            self._compact_requested.set()
+
+    def _ensure_compactor(self) -> None:
+        if self._compactor is not None or self._stopped.is_set():
+            return
+        self._compactor = threading.Thread(target=self._compact_loop, name="progress-compactor", daemon=True)
+        self._compactor.start()
+
+    def _compact_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._compact_requested.wait(self._compact_interval)
+            self._compact_requested.clear()
+            if self._stopped.is_set():
+                return
             try:
-                record = {"user_id": user_id, **updated}
-                self._supabase.upsert(self._supabase_table, record, conflict_column="user_id")
-                return updated
-            except RuntimeError as exc:
-                logger.warning("Supabase upsert failed; falling back to file store: %s", exc)
-                self._disable_supabase()
+                self.compact()
+            except OSError as exc:  # pragma: no cover - disk failure path
+                logger.warning("Progress snapshot compaction failed: %s", exc)
 
-        data = self._read()
-        data[user_id] = updated
-        self._write(data)
-        return updated
+    @staticmethod
+    def _replay(journal_path: Path, offset: int = 0) -> Tuple[Dict[str, Dict[str, Optional[int | str]]], int]:
+        """Records of the complete journal lines past ``offset``, and the offset after them."""
+
+        replayed: Dict[str, Dict[str, Optional[int | str]]] = {}
+        if not journal_path.exists():
+            return replayed, 0
+        with journal_path.open("rb") as handle:
+            handle.seek(offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    # still being appended, or torn by a crash; read again from here next time
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn line from a crash mid-append, since completed by a later write
+                    continue
+                user_id = record.pop("user_id", None)
+                if user_id:
+                    replayed[user_id] = record
+        return replayed, offset
 
     def _read(self) -> Dict[str, Dict[str, Optional[int | str]]]:
         if not self._storage_path.exists():
@@ -102,12 +315,22 @@ class ProgressRepository:
             return json.load(handle)
 
     def _write(self, data: Dict[str, Dict[str, int | str]]) -> None:
-        with self._storage_path.open("w", encoding="utf-8") as handle:
-            json.dump(data, handle, ensure_ascii=False, indent=2)
+        """Replace the whole store, discarding cached state and pending journal entries."""
+
+        with self._compact_lock, self._lock, self._file_lock.exclusive():
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._journal_path.unlink(missing_ok=True)
+            self._rotated_journal_path.unlink(missing_ok=True)
+            self._journal_entries = 0
+            self._journal_offset = 0
+            self._write_snapshot(data)
+            self._cache = None
+            self._generation = self._file_lock.bump()
 
-    def _disable_supabase(self) -> None:
-        self._supabase = None
-        self._supabase_table = None
+    def _write_snapshot(self, data: Dict[str, Dict[str, Optional[int | str]]]) -> None:
+        write_atomic(self._storage_path, json.dumps(data, ensure_ascii=False, indent=2))
 
     @staticmethod
     def _parse_last_answer_date(last_answered_on: Optional[str]) -> Optional[date]:
@@ -1,30 +1,82 @@
-import json
 import bisect
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Iterator, List, Optional
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
 
 from ..models.question import Question
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionBank:
+    """Immutable, fully built snapshot of the question source."""
+
+    version: str
+    questions: Tuple[Question, ...]
+    by_id: Mapping[str, Question]
+    offsets: Tuple[int, ...]
+    calendar: Tuple[int, ...]
+    week_themes: Tuple[str, ...]
+
 
 class QuestionRepository:
-    """Loads question content from a JSON source."""
+    """Loads question content from a JSON source.
 
-    def __init__(self, source_path: Path) -> None:
+    The bank is held as an immutable :class:`QuestionBank` snapshot. When ``reload_seconds``
+    is set, the source's mtime/size is checked at most that often and a changed file is
+    rebuilt on a background thread, then swapped in with a single reference assignment, so
+    readers never block or observe a half-built bank. ``compiled_path`` optionally keeps a
+    pickled snapshot (keyed by the source hash) for faster cold starts.
+    """
+
+    # Monday-aligned day numbers run from 1 up to 6 + 366; the calendar covers every one of them
+    CALENDAR_DAYS = 372
+    DAILY_CACHE_SIZE = 32
+
+    def __init__(
+        self,
+        source_path: Path,
+        reload_seconds: float = 0.0,
+        compiled_path: Optional[Path] = None,
+    ) -> None:
         self._source_path = source_path
-        self._cache: List[Question] | None = None
-        self._offsets: List[int] | None = None
-        self._week_themes: List[str] | None = None
+        self._reload_seconds = reload_seconds
+        self._compiled_path = compiled_path
+        self._bank: QuestionBank | None = None
+        self._source_stat: Tuple[int, int] | None = None
+        self._next_check = 0.0
+        self._load_lock = threading.Lock()
+        self._reloading = threading.Event()
+        self._daily: Dict[Tuple[str, date], Question] = {}
+
+    @property
+    def version(self) -> str:
+        """Content hash of the bank currently being served."""
+
+        return self._current().version
 
     def get_daily_question(self, target_date: date) -> Question:
         """Return the question assigned for the provided date."""
 
-        questions = self._load_questions()
-        if not questions:
+        bank = self._current()
+        cached = self._daily.get((bank.version, target_date))
+        if cached is not None:
+            return cached
+
+        if not bank.questions:
             raise RuntimeError("Question bank is empty")
 
-        base = self._question_for_date(target_date, questions)
-        return Question(
+        base = self._question_for_date(target_date, bank)
+        dated = Question(
             id=base.id,
             prompt=base.prompt,
             theme=base.theme,
@@ -32,19 +84,85 @@ class QuestionRepository:
             day_index=base.day_index,
             available_on=target_date,
         )
+        if len(self._daily) >= self.DAILY_CACHE_SIZE:
+            self._daily.clear()
+        self._daily[(bank.version, target_date)] = dated
+        return dated
 
     def get_by_id(self, question_id: str) -> Question:
-        questions = self._load_questions()
-        for question in questions:
-            if question.id == question_id:
-                return question
-        raise KeyError(f"Question {question_id} not found")
+        try:
+            return self._current().by_id[question_id]
+        except KeyError:
+            raise KeyError(f"Question {question_id} not found") from None
+
+    def reload(self) -> QuestionBank:
+        """Synchronously rebuild the bank from the source and swap it in."""
 
-    def _load_questions(self) -> List[Question]:
-        if self._cache is not None:
-            return self._cache
+        with self._load_lock:
+            stat = self._stat_source()
+            raw = self._source_path.read_bytes()
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            current = self._bank
+            if current is None or current.version != version:
+                self._bank = self._load_compiled(version) or self._build_bank(raw, version)
+            self._source_stat = stat
+            self._next_check = time.monotonic() + self._reload_seconds
+            return self._bank  # type: ignore[return-value]
 
-        data = json.loads(self._source_path.read_text(encoding="utf-8"))
+    def _current(self) -> QuestionBank:
+        bank = self._bank
+        if bank is None:
+            return self.reload()
+        if self._reload_seconds > 0 and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self._reload_seconds
+            if self._stat_source() != self._source_stat and not self._reloading.is_set():
+                self._reloading.set()
+                threading.Thread(target=self._background_reload, name="question-reload", daemon=True).start()
+        return bank
+
+    def _background_reload(self) -> None:
+        try:
+            bank = self.reload()
+            logger.info("Question bank reloaded (version %s)", bank.version)
+        except (OSError, ValueError) as exc:
+            # keep serving the previous snapshot until the source is fixed
+            logger.warning("Question bank reload failed; keeping current snapshot: %s", exc)
+        finally:
+            self._reloading.clear()
+
+    def _stat_source(self) -> Tuple[int, int] | None:
+        try:
+            stat = self._source_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_compiled(self, version: str) -> QuestionBank | None:
+        if self._compiled_path is None or not self._compiled_path.exists():
+            return None
+        try:
+            with self._compiled_path.open("rb") as handle:
+                bank = pickle.load(handle)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exc:
+            logger.warning("Ignoring unreadable compiled question bank %s: %s", self._compiled_path, exc)
+            return None
+        if not isinstance(bank, QuestionBank) or bank.version != version:
+            return None
+        return bank
+
+    def _write_compiled(self, bank: QuestionBank) -> None:
+        if self._compiled_path is None:
+            return
+        temp_path = self._compiled_path.with_name(f"{self._compiled_path.name}.tmp")
+        try:
+            with temp_path.open("wb") as handle:
+                pickle.dump(bank, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._compiled_path)
+        except OSError as exc:
+            logger.warning("Could not write compiled question bank %s: %s", self._compiled_path, exc)
+
+    def _build_bank(self, raw: bytes, version: str) -> QuestionBank:
+        data = json.loads(raw.decode("utf-8"))
         weeks = data.get("weeks", [])
         questions: List[Question] = []
         offsets: List[int] = []
@@ -80,36 +198,51 @@ class QuestionRepository:
 
             sequential_day = week_start_day + max(len(questions_this_week), 1)
 
-        self._cache = questions
-        self._offsets = offsets
-        self._week_themes = week_themes
-        return questions
+        calendar = tuple(
+            self._index_for_day_marker(day_marker, offsets, len(questions)) if questions else 0
+            for day_marker in range(self.CALENDAR_DAYS + 1)
+        )
+        bank = QuestionBank(
+            version=version,
+            questions=tuple(questions),
+            by_id={question.id: question for question in questions},
+            offsets=tuple(offsets),
+            calendar=calendar,
+            week_themes=tuple(week_themes),
+        )
+        self._write_compiled(bank)
+        return bank
 
     def iter_all(self) -> Iterator[Question]:
         """Yield every question in the bank."""
 
-        yield from self._load_questions()
+        yield from self._current().questions
 
     def total_weeks(self) -> int:
-        self._load_questions()
-        return len(self._week_themes or [])
+        return len(self._current().week_themes)
 
     def week_theme(self, week_index: int) -> str:
-        self._load_questions()
-        if not self._week_themes:
+        week_themes = self._current().week_themes
+        if not week_themes:
             raise IndexError("No week themes configured")
-        if 0 <= week_index < len(self._week_themes):
-            return self._week_themes[week_index]
+        if 0 <= week_index < len(week_themes):
+            return week_themes[week_index]
         raise IndexError("Week index out of range")
 
-    def _question_for_date(self, target_date: date, questions: List[Question]) -> Question:
+    def _question_for_date(self, target_date: date, bank: QuestionBank) -> Question:
         """Map the requested date to the correct week/day entry based on configured start dates."""
 
-        offsets = self._offsets or list(range(1, len(questions) + 1))
+        day_marker = self._monday_aligned_day_number(target_date)
+        if 0 <= day_marker < len(bank.calendar):
+            return bank.questions[bank.calendar[day_marker]]
+        offsets = list(bank.offsets) or list(range(1, len(bank.questions) + 1))
+        return bank.questions[self._index_for_day_marker(day_marker, offsets, len(bank.questions))]
+
+    @staticmethod
+    def _index_for_day_marker(day_marker: int, offsets: List[int], question_count: int) -> int:
         if not offsets:
             raise RuntimeError("Question schedule is empty")
 
-        day_marker = self._monday_aligned_day_number(target_date)
         insert_pos = bisect.bisect_right(offsets, day_marker)
         if insert_pos == 0:
             index = len(offsets) - 1
@@ -118,8 +251,7 @@ class QuestionRepository:
         else:
             index = insert_pos - 1
 
-        index = min(max(index, 0), len(questions) - 1)
-        return questions[index]
+        return min(max(index, 0), question_count - 1)
 
     @staticmethod
     def _monday_aligned_day_number(target_date: date) -> int:
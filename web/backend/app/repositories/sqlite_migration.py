@@ -0,0 +1,137 @@
+"""Import the JSONL/JSON file stores into a SQLite database.
+
+Run from ``web/backend`` with ``python -m app.repositories.sqlite_migration``; paths default
+to the configured ``ANSWERS_STORE_PATH``, ``PROGRESS_STORE_PATH``, ``USER_METADATA_PATH`` and
+``SQLITE_PATH``. Progress and plans are upserted, so the command can be re-run; answers are
+only imported into an empty ``answers`` table to avoid duplicating history.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from .answer_repository import AnswerRepository
+from .progress_repository import ProgressRepository
+from .sqlite_repositories import SQLiteDatabase, SQLiteUserRepository
+from .user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(
+    database: SQLiteDatabase,
+    answers_path: Optional[Path] = None,
+    progress_path: Optional[Path] = None,
+    users_path: Optional[Path] = None,
+) -> Dict[str, int]:
+    """Copy whichever file stores exist into ``database`` and return the row counts imported."""
+
+    counts = {"answers": 0, "progress": 0, "users": 0}
+    if answers_path is not None and answers_path.exists():
+        counts["answers"] = _migrate_answers(database, answers_path)
+    if progress_path is not None and progress_path.exists():
+        counts["progress"] = _migrate_progress(database, progress_path)
+    if users_path is not None and users_path.exists():
+        counts["users"] = _migrate_users(database, users_path)
+    return counts
+
+
+def _migrate_answers(database: SQLiteDatabase, answers_path: Path) -> int:
+    rows = []
+    with answers_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            stored = AnswerRepository._to_stored_answer(line)
+            if stored is None:
+                continue
+            week_index = stored.week_index
+            if week_index is None:
+                week_index = AnswerRepository._week_from_question_id(stored.question_id)
+            rows.append(
+                (
+                    stored.user_id,
+                    stored.question_id,
+                    stored.answer,
+                    stored.feedback,
+                    stored.xp_awarded,
+                    stored.xp_total,
+                    stored.streak,
+                    stored.created_at.isoformat(),
+                    stored.duration_seconds,
+                    week_index,
+                )
+            )
+    with database.transaction() as connection:
+        if connection.execute("SELECT 1 FROM answers LIMIT 1").fetchone() is not None:
+            logger.warning("answers table is not empty; skipping %s", answers_path)
+            return 0
+        connection.executemany(
+            "INSERT INTO answers (user_id, question_id, answer, feedback, xp_awarded, xp_total, streak, "
+            "created_at, duration_seconds, week_index) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def _migrate_progress(database: SQLiteDatabase, progress_path: Path) -> int:
+    with progress_path.open("r", encoding="utf-8") as handle:
+        progress = json.load(handle)
+    # fold in journal entries not yet compacted into the snapshot, oldest first
+    for suffix in (".journal.compacting", ".journal"):
+        progress.update(ProgressRepository._replay(progress_path.with_name(f"{progress_path.name}{suffix}"))[0])
+    with database.transaction() as connection:
+        connection.executemany(
+            "INSERT INTO progress (user_id, xp_total, streak, last_answered_on) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET xp_total = excluded.xp_total, streak = excluded.streak, "
+            "last_answered_on = excluded.last_answered_on",
+            [
+                (
+                    user_id,
+                    int(values.get("xp_total", 0) or 0),
+                    int(values.get("streak", 0) or 0),
+                    values.get("last_answered_on"),
+                )
+                for user_id, values in progress.items()
+            ],
+        )
+    return len(progress)
+
+
+def _migrate_users(database: SQLiteDatabase, users_path: Path) -> int:
+    # snapshot plus any plan changes still in its journal
+    plans = UserRepository(users_path)._plans()
+    repository = SQLiteUserRepository(database)
+    for user_id, plan in plans.items():
+        repository.set_plan(user_id, plan)
+    return len(plans)
+
+
+def main(argv: Optional[list] = None) -> None:
+    from ..config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", type=Path, default=settings.sqlite_path)
+    parser.add_argument("--answers", type=Path, default=settings.answers_store_path)
+    parser.add_argument("--progress", type=Path, default=settings.progress_store_path)
+    parser.add_argument("--users", type=Path, default=settings.user_metadata_path)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    database = SQLiteDatabase(args.database)
+    try:
+        counts = migrate(database, args.answers, args.progress, args.users)
+    finally:
+        database.close()
+    logger.info(
+        "Imported %s answers, %s progress rows and %s user plans into %s",
+        counts["answers"],
+        counts["progress"],
+        counts["users"],
+        args.database,
+    )
+
+
+if __name__ == "__main__":
+    main()
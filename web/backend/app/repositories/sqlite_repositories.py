@@ -0,0 +1,280 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .answer_repository import AnswerRepository, StoredAnswer, UserSnapshot
+from .progress_repository import ProgressRepository
+from .user_repository import UserRepository
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT,
+    question_id TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    feedback TEXT NOT NULL,
+    xp_awarded INTEGER NOT NULL,
+    xp_total INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    week_index INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_answers_user_created ON answers (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_answers_user_week ON answers (user_id, week_index);
+CREATE TABLE IF NOT EXISTS progress (
+    user_id TEXT PRIMARY KEY,
+    xp_total INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    last_answered_on TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    plan TEXT NOT NULL
+);
+"""
+
+_ANSWER_COLUMNS = (
+    "user_id, question_id, answer, feedback, xp_awarded, xp_total, streak, created_at, duration_seconds, week_index"
+)
+
+
+class SQLiteDatabase:
+    """Shared SQLite file in WAL mode with one connection per thread.
+
+    WAL lets readers proceed while a single writer commits, and ``busy_timeout`` makes
+    writers from other threads or uvicorn worker processes wait their turn instead of
+    failing. Writes run in ``BEGIN IMMEDIATE`` transactions so read-modify-write updates
+    are serialized across processes.
+    """
+
+    def __init__(self, path: Path, busy_timeout_seconds: float = 5.0) -> None:
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._busy_timeout = busy_timeout_seconds
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # executescript manages its own transaction
+        self.connection().executescript(_SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps committed transactions durable across crashes at NORMAL; only power loss can drop the last few
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={int(self._busy_timeout * 1000)}")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.ProgrammingError:
+                # connections are bound to their creating thread; the OS reclaims the rest
+                pass
+        self._local = threading.local()
+
+
+class SQLiteAnswerRepository(AnswerRepository):
+    """:class:`AnswerRepository` backed by the ``answers`` table of a :class:`SQLiteDatabase`.
+
+    Storage is entirely SQLite, so the JSONL index and Supabase state of the base class are
+    never set up; every public method is served by an indexed query instead.
+    """
+
+    def __init__(self, database: SQLiteDatabase) -> None:
+        self._database = database
+
+    def save_answer(self, payload: StoredAnswer) -> None:
+        week_index = payload.week_index
+        if week_index is None:
+            week_index = self._week_from_question_id(payload.question_id)
+        with self._database.transaction() as connection:
+            connection.execute(
+                f"INSERT INTO answers ({_ANSWER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    payload.user_id,
+                    payload.question_id,
+                    payload.answer,
+                    payload.feedback,
+                    payload.xp_awarded,
+                    payload.xp_total,
+                    payload.streak,
+                    payload.created_at.isoformat(),
+                    payload.duration_seconds,
+                    week_index,
+                ),
+            )
+
+    def latest_before(self, user_id: str, before_date: date) -> Optional[StoredAnswer]:
+        # ISO timestamps sort as text, and every timestamp on an earlier day sorts below the bare date
+        rows = self._query(
+            f"SELECT {_ANSWER_COLUMNS} FROM answers WHERE user_id = ? AND created_at < ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (user_id, before_date.isoformat()),
+        )
+        return rows[0] if rows else None
+
+    def answers_for_week(self, user_id: str, week_index: int) -> List[StoredAnswer]:
+        return self._query(
+            f"SELECT {_ANSWER_COLUMNS} FROM answers WHERE user_id = ? AND week_index = ? ORDER BY created_at",
+            (user_id, week_index),
+        )
+
+    def user_snapshot(self, user_id: str, before_date: date, week_index: int) -> UserSnapshot:
+        return UserSnapshot(
+            previous=self.latest_before(user_id, before_date),
+            answered_question_ids=self.answered_question_ids(user_id, week_index),
+        )
+
+    def answered_question_ids(self, user_id: str, week_index: int) -> Set[str]:
+        rows = self._database.connection().execute(
+            "SELECT question_id FROM answers WHERE user_id = ? AND week_index = ?",
+            (user_id, week_index),
+        )
+        return {row["question_id"] for row in rows}
+
+    def recent_answers(self, user_id: str, limit: Optional[int] = None) -> List[StoredAnswer]:
+        return self._query(
+            f"SELECT {_ANSWER_COLUMNS} FROM answers WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            (user_id, -1 if limit is None else limit),
+        )
+
+    def recent_window(self, user_id: str, since: datetime, older_limit: int = 0) -> List[StoredAnswer]:
+        threshold = since.isoformat()
+        window = self._query(
+            f"SELECT {_ANSWER_COLUMNS} FROM answers WHERE user_id = ? AND created_at >= ? ORDER BY created_at DESC",
+            (user_id, threshold),
+        )
+        if older_limit <= 0:
+            return window
+        return window + self._query(
+            f"SELECT {_ANSWER_COLUMNS} FROM answers WHERE user_id = ? AND created_at < ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (user_id, threshold, older_limit),
+        )
+
+    def user_version(self, user_id: str) -> Optional[Tuple[int, int]]:
+        row = (
+            self._database.connection()
+            .execute("SELECT COUNT(*), COALESCE(MAX(id), -1) FROM answers WHERE user_id = ?", (user_id,))
+            .fetchone()
+        )
+        return int(row[0]), int(row[1])
+
+    def rebuild_index(self) -> None:
+        """Rebuild the SQLite indexes (the JSONL side index does not exist here)."""
+
+        with self._database.transaction() as connection:
+            connection.execute("REINDEX answers")
+
+    def _query(self, sql: str, parameters: tuple) -> List[StoredAnswer]:
+        rows = self._database.connection().execute(sql, parameters)
+        answers = [self._from_record(dict(row)) for row in rows]
+        return [stored for stored in answers if stored is not None]
+
+
+class SQLiteProgressRepository(ProgressRepository):
+    """:class:`ProgressRepository` backed by the ``progress`` table of a :class:`SQLiteDatabase`.
+
+    Each update is a read-modify-write inside one ``BEGIN IMMEDIATE`` transaction, so XP and
+    streaks stay correct when several worker processes write for the same user.
+    """
+
+    def __init__(self, database: SQLiteDatabase) -> None:
+        self._database = database
+
+    def fetch(self, user_id: str) -> Dict[str, int | str]:
+        row = (
+            self._database.connection()
+            .execute("SELECT xp_total, streak, last_answered_on FROM progress WHERE user_id = ?", (user_id,))
+            .fetchone()
+        )
+        if row is None:
+            return {"xp_total": 0, "streak": 0, "last_answered_on": None}
+        return dict(row)
+
+    def update(self, user_id: str, xp_awarded: int, submitted_at: datetime) -> Dict[str, int | str]:
+        with self._database.transaction() as connection:
+            row = connection.execute(
+                "SELECT xp_total, streak, last_answered_on FROM progress WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            existing = dict(row) if row else {"xp_total": 0, "streak": 0, "last_answered_on": None}
+            updated = self._next_progress(existing, xp_awarded, submitted_at)
+            connection.execute(
+                "INSERT INTO progress (user_id, xp_total, streak, last_answered_on) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET xp_total = excluded.xp_total, streak = excluded.streak, "
+                "last_answered_on = excluded.last_answered_on",
+                (user_id, updated["xp_total"], updated["streak"], updated["last_answered_on"]),
+            )
+        return updated
+
+    def compact(self) -> None:
+        """Nothing to fold: every update is already committed to the database."""
+
+    def close(self) -> None:
+        """Connections belong to the shared :class:`SQLiteDatabase`, which owns their lifetime."""
+
+
+class SQLiteUserRepository(UserRepository):
+    """:class:`UserRepository` backed by the ``users`` table of a :class:`SQLiteDatabase`."""
+
+    def __init__(self, database: SQLiteDatabase, default_plan: str = "free") -> None:
+        self._database = database
+        self._default_plan = default_plan
+
+    def get_plan(self, user_id: str) -> str:
+        row = self._database.connection().execute("SELECT plan FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return str(row["plan"] if row else self._default_plan).lower()
+
+    def get_plans(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        user_ids = list(user_ids)
+        plans = {user_id: self._default_plan for user_id in user_ids}
+        connection = self._database.connection()
+        # stay under SQLite's default host-parameter limit
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in connection.execute(f"SELECT user_id, plan FROM users WHERE user_id IN ({placeholders})", chunk):
+                plans[row["user_id"]] = str(row["plan"]).lower()
+        return plans
+
+    def set_plan(self, user_id: str, plan: str) -> None:
+        with self._database.transaction() as connection:
+            connection.execute(
+                "INSERT INTO users (user_id, plan) VALUES (?, ?) ON CONFLICT (user_id) DO UPDATE SET plan = excluded.plan",
+                (user_id, str(plan).lower()),
+            )
+
+    def compact(self) -> None:
+        """Nothing to fold: every plan change is already committed to the database."""
+
+    def close(self) -> None:
+        """Connections belong to the shared :class:`SQLiteDatabase`, which owns their lifetime."""
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..integrations.supabase_client import SupabaseClient, SupabaseRequestError
+from .file_lock import WorkerFile
+
+logger = logging.getLogger(__name__)
+
+
+class SupabaseBatchWriter:
+    """Write-behind bulk writer for rows bound for one Supabase table.
+
+    Rows are appended to a local JSONL outbox before :meth:`submit` returns, then sent as a
+    single ``return=minimal`` insert once ``batch_size`` rows are waiting or ``window_seconds``
+    have passed. With ``conflict_column`` set the batch is an upsert instead, keeping only the
+    last queued row per key. Rows stay in the outbox until their batch is acknowledged, so a
+    failed batch (or a crash) is replayed later. Delivery is at-least-once: a crash between the insert and
+    the outbox rewrite resends that batch.
+
+    A batch Supabase rejects outright (a 4xx other than 408/429, e.g. a bad row or schema
+    mismatch) is retried row by row, and rows that are still rejected move to
+    ``<outbox>.dead`` so they cannot block the rows queued behind them.
+
+    Each worker process keeps its own ``<outbox>.<pid>`` (see :class:`WorkerFile`) and takes
+    over the outboxes of workers that have exited when it starts.
+    """
+
+    def __init__(
+        self,
+        client: SupabaseClient,
+        table: str,
+        outbox_path: Path,
+        batch_size: int = 50,
+        window_seconds: float = 0.5,
+        conflict_column: Optional[str] = None,
+    ) -> None:
+        self._client = client
+        self._table = table
+        self._conflict_column = conflict_column
+        self._worker_file = WorkerFile(outbox_path)
+        self._outbox_path = self._worker_file.path
+        self._dead_letter_path = outbox_path.with_name(f"{outbox_path.name}.dead")
+        self._dead_lettered = 0
+        self._batch_size = max(1, batch_size)
+        self._window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._worker_file.adopt_orphans(self._append_lines)
+        self._pending: List[Dict[str, Any]] = self._load_outbox()
+        if self._pending:
+            logger.info("Replaying %s %s rows from %s", len(self._pending), table, self._outbox_path)
+            self._ensure_thread()
+
+    @property
+    def outbox_path(self) -> Path:
+        """This process's outbox file."""
+
+        return self._outbox_path
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Durably queue one row for the next batch."""
+
+        with self._lock:
+            self._append_lines([json.dumps(record, ensure_ascii=False)])
+            self._pending.append(record)
+            if len(self._pending) >= self._batch_size:
+                self._wake.set()
+        self._ensure_thread()
+
+    def pending_for(self, user_id: str) -> List[Dict[str, Any]]:
+        """Rows for ``user_id`` that Supabase has not acknowledged yet."""
+
+        with self._lock:
+            return [dict(record) for record in self._pending if record.get("user_id") == user_id]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), "deadLettered": self._dead_lettered}
+
+    def flush(self) -> bool:
+        """Send every pending row in ``batch_size`` chunks; return False if rows had to stay queued."""
+
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[: self._batch_size]
+                if not batch:
+                    return True
+                try:
+                    self._write(batch)
+                    resolved = len(batch)
+                except RuntimeError as exc:
+                    if not _is_permanent(exc):
+                        logger.warning(
+                            "Supabase write of %s %s rows failed; kept in outbox: %s", len(batch), self._table, exc
+                        )
+                        return False
+                    logger.warning("Supabase rejected %s %s rows; retrying row by row: %s", len(batch), self._table, exc)
+                    resolved = self._write_rows(batch)
+                with self._lock:
+                    # submit() only appends, so the resolved rows are still the head of the list
+                    del self._pending[:resolved]
+                    self._rewrite_outbox()
+                if resolved < len(batch):
+                    return False
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if self._conflict_column is None:
+            self._client.insert(self._table, batch, returning="minimal")
+            return
+        # one upsert may not touch the same row twice; the last queued value wins
+        latest = {record.get(self._conflict_column): record for record in batch}
+        self._client.upsert(self._table, list(latest.values()), conflict_column=self._conflict_column)
+
+    def _write_rows(self, batch: List[Dict[str, Any]]) -> int:
+        """Write ``batch`` one row at a time and return how many leading rows are resolved.
+
+        Rejected rows are dead-lettered; a retryable failure stops early so the rest stay queued.
+        """
+
+        for index, record in enumerate(batch):
+            try:
+                self._write([record])
+            except RuntimeError as exc:
+                if not _is_permanent(exc):
+                    return index
+                self._dead_letter(record, exc)
+        return len(batch)
+
+    def _dead_letter(self, record: Dict[str, Any], exc: RuntimeError) -> None:
+        logger.error(
+            "Supabase rejected a %s row for %s; moved to %s: %s",
+            self._table,
+            record.get("user_id"),
+            self._dead_letter_path,
+            exc,
+        )
+        entry = {"record": record, "error": str(exc), "failed_at": datetime.now(tz=timezone.utc).isoformat()}
+        with self._dead_letter_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, ensure_ascii=False))
+            handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        with self._lock:
+            self._dead_lettered += 1
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        self._worker_file.release()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"supabase-writer-{self._table}", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self._window_seconds)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            self.flush()
+
+    def _append_lines(self, lines: List[str]) -> None:
+        with self._outbox_path.open("a", encoding="utf-8") as handle:
+            for line in lines:
+                handle.write(line)
+                handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _load_outbox(self) -> List[Dict[str, Any]]:
+        if not self._outbox_path.exists():
+            return []
+        rows: List[Dict[str, Any]] = []
+        with self._outbox_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # torn final line from a crash mid-append
+                    continue
+        return rows
+
+    def _rewrite_outbox(self) -> None:
+        temp_path = self._outbox_path.with_name(f"{self._outbox_path.name}.tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for record in self._pending:
+                handle.write(json.dumps(record, ensure_ascii=False))
+                handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self._outbox_path)
+
+
+def _is_permanent(exc: RuntimeError) -> bool:
+    return isinstance(exc, SupabaseRequestError) and not exc.retryable
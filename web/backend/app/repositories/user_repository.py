@@ -1,31 +1,140 @@
 import json
+import logging
+import threading
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+
+from .file_lock import FileLock, write_atomic
+
+logger = logging.getLogger(__name__)
 
 
 class UserRepository:
-    """Stores lightweight user metadata such as plan type."""
+    """Stores lightweight user metadata such as plan type.
 
-    def __init__(self, storage_path: Path, default_plan: str = "free") -> None:
+    Plans are held in memory, so lookups are dictionary reads. :meth:`set_plan` appends to
+    ``<store>.journal`` instead of rewriting ``users.json``, and the journal is folded into
+    the snapshot once it reaches ``compact_threshold`` entries (and on :meth:`close`). The
+    cache is reloaded when the :class:`FileLock` generation moves (another worker changed a
+    plan) or when ``users.json`` itself changes on disk, e.g. an upgrade written by hand.
+    The snapshot is authoritative over journal entries older than it, so such an edit is not
+    overridden by plans journaled before it was made.
+    """
+
+    def __init__(self, storage_path: Path, default_plan: str = "free", compact_threshold: int = 200) -> None:
         self._storage_path = storage_path
         self._storage_path.parent.mkdir(parents=True, exist_ok=True)
         self._default_plan = default_plan
+        self._compact_threshold = max(1, compact_threshold)
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(storage_path)
+        self._journal_path = storage_path.with_name(f"{storage_path.name}.journal")
+        self._journal: Optional[TextIO] = None
+        self._journal_entries = 0
+        self._cache: Optional[Dict[str, str]] = None
+        self._stamp: Optional[Tuple[int, Optional[Tuple[int, int]]]] = None
 
     def get_plan(self, user_id: str) -> str:
-        data = self._read()
-        record = data.get(user_id)
-        plan = (record or {}).get("plan", self._default_plan)
-        return str(plan).lower()
+        with self._lock:
+            return self._plans().get(user_id, self._default_plan)
+
+    def get_plans(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """Plans for many users at once, e.g. for admin views and batch jobs."""
+
+        with self._lock:
+            plans = self._plans()
+            return {user_id: plans.get(user_id, self._default_plan) for user_id in user_ids}
 
     def set_plan(self, user_id: str, plan: str) -> None:
-        data = self._read()
         normalized = str(plan).lower()
-        data[user_id] = {"plan": normalized}
-        self._write(data)
+        with self._lock, self._file_lock.exclusive():
+            self._plans()[user_id] = normalized
+            if self._journal is None:
+                self._journal = self._journal_path.open("a", encoding="utf-8")
+            # one write per line on an O_APPEND handle, so lines from several workers never interleave
+            record = {"user_id": user_id, "plan": normalized, "at": time.time_ns()}
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self._journal_entries += 1
+            self._stamp = (self._file_lock.bump(), self._snapshot_stat())
+            if self._journal_entries >= self._compact_threshold:
+                self.compact()
 
     def is_premium(self, user_id: str) -> bool:
         return self.get_plan(user_id) == "premium"
 
+    def compact(self) -> None:
+        """Write all plans as the new snapshot and drop the journal it covers."""
+
+        with self._lock, self._file_lock.exclusive():
+            if not self._journal_path.exists():
+                return
+            plans = self._plans()
+            self._write({user_id: {"plan": plan} for user_id, plan in plans.items()})
+            # replaying a journal over the snapshot is idempotent, so a crash before this is harmless
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._journal_path.unlink(missing_ok=True)
+            self._journal_entries = 0
+            self._stamp = (self._file_lock.bump(), self._snapshot_stat())
+
+    def close(self) -> None:
+        """Fold the journal into the snapshot and release the journal handle."""
+
+        self.compact()
+
+    def _plans(self) -> Dict[str, str]:
+        """Return the in-memory plan map, reloading it if the plans changed on disk since."""
+
+        if self._cache is None or self._current_stamp() != self._stamp:
+            if self._journal is not None:
+                # another worker may have compacted; reopen whatever journal is current
+                self._journal.close()
+                self._journal = None
+            with self._file_lock.shared():
+                stamp = self._current_stamp()
+                plans = {
+                    user_id: str((record or {}).get("plan", self._default_plan)).lower()
+                    for user_id, record in self._read().items()
+                }
+                snapshot = stamp[1]
+                plans.update(self._replay(since=snapshot[0] if snapshot else None))
+            self._cache = plans
+            self._stamp = stamp
+        return self._cache
+
+    def _current_stamp(self) -> Tuple[int, Optional[Tuple[int, int]]]:
+        return self._file_lock.generation(), self._snapshot_stat()
+
+    def _snapshot_stat(self) -> Optional[Tuple[int, int]]:
+        # direct edits to users.json never bump the lock generation
+        try:
+            stat = self._storage_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _replay(self, since: Optional[int] = None) -> Dict[str, str]:
+        """Journaled plans, skipping entries written before ``since`` (the snapshot's mtime)."""
+
+        replayed: Dict[str, str] = {}
+        if not self._journal_path.exists():
+            return replayed
+        with self._journal_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    if since is not None and record.get("at", since) < since:
+                        # folded in by a compaction, or superseded by an edit to users.json
+                        continue
+                    replayed[record["user_id"]] = record["plan"]
+                except (ValueError, KeyError, TypeError):
+                    # torn final line from a crash mid-append
+                    continue
+        return replayed
+
     def _read(self) -> Dict[str, Dict[str, str]]:
         if not self._storage_path.exists():
             return {}
@@ -33,8 +142,8 @@ class UserRepository:
             try:
                 return json.load(handle)
             except json.JSONDecodeError:
+                logger.warning("User metadata %s is unreadable; falling back to the journal", self._storage_path)
                 return {}
 
     def _write(self, data: Dict[str, Dict[str, str]]) -> None:
-        with self._storage_path.open("w", encoding="utf-8") as handle:
-            json.dump(data, handle, ensure_ascii=False, indent=2)
+        write_atomic(self._storage_path, json.dumps(data, ensure_ascii=False, indent=2))
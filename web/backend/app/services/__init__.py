@@ -1,8 +1,31 @@
 """Service layer for ThinkDeeper backend."""
 
+from .admission import AdmissionController, AdmissionError, CapacityExceededError, UserRateLimitedError
 from .answer_service import AnswerService
-from .evaluation_service import EvaluationService
+from .evaluation_cache import EvaluationCache
+from .evaluation_jobs import EvaluationJob, EvaluationJobQueue, InProcessJobBackend, JobBackend, QueueFullError
+from .evaluation_service import EvaluationPolicy, EvaluationService
+from .model_routing import ModelRouter
+from .prescoring import PreScorer
 from .question_service import QuestionService
 from .reflection_service import ReflectionService
 
-__all__ = ["AnswerService", "EvaluationService", "QuestionService", "ReflectionService"]
+__all__ = [
+    "AdmissionController",
+    "AdmissionError",
+    "AnswerService",
+    "CapacityExceededError",
+    "EvaluationCache",
+    "EvaluationJob",
+    "EvaluationJobQueue",
+    "EvaluationPolicy",
+    "EvaluationService",
+    "InProcessJobBackend",
+    "JobBackend",
+    "ModelRouter",
+    "PreScorer",
+    "QuestionService",
+    "QueueFullError",
+    "ReflectionService",
+    "UserRateLimitedError",
+]
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class AdmissionError(RuntimeError):
+    """Base class for requests turned away before they reach the evaluation service."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UserRateLimitedError(AdmissionError):
+    """Raised when one user submits faster than their token bucket allows."""
+
+
+class CapacityExceededError(AdmissionError):
+    """Raised when the global concurrency or rate limit is saturated."""
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    __slots__ = ("_rate", "_burst", "_tokens", "_updated")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self._rate = rate
+        self._burst = max(1.0, burst)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token and return ``0``, or return the seconds until one is available."""
+
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate if self._rate > 0 else 60.0
+
+
+class AdmissionController:
+    """Global and per-user admission in front of the OpenAI evaluation path.
+
+    A non-blocking semaphore caps evaluations in flight and a token bucket caps the global
+    start rate; a token bucket per user stops one client from draining the shared budget.
+    Nothing waits: :meth:`slot` either admits immediately or raises, so callers can defer the
+    work or shed it instead of piling up requests.
+    """
+
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(
+        self,
+        max_concurrent: int = 32,
+        global_rate_per_second: float = 0.0,
+        user_rate_per_minute: float = 0.0,
+        user_burst: int = 3,
+    ) -> None:
+        self._max_concurrent = max(1, max_concurrent)
+        self._slots = threading.BoundedSemaphore(self._max_concurrent)
+        self._global_bucket = (
+            TokenBucket(global_rate_per_second, global_rate_per_second) if global_rate_per_second > 0 else None
+        )
+        self._user_rate = user_rate_per_minute / 60.0
+        self._user_burst = user_burst
+        self._user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters: Dict[str, int] = {"admitted": 0, "rejectedUser": 0, "rejectedGlobal": 0, "deferred": 0}
+
+    @contextmanager
+    def slot(
+        self, user_id: Optional[str], *, client: Optional[str] = None, check_global: bool = True
+    ) -> Iterator[None]:
+        """Hold an evaluation slot for the duration of the block.
+
+        Anonymous callers get a bucket per ``client`` address instead of one shared bucket;
+        with neither a user nor an address only the global limits apply.
+        ``check_global=False`` only applies the per-user limit, for work that is already
+        bounded elsewhere (e.g. the deferred job queue's worker pool).
+        """
+
+        if user_id:
+            self._check_user(user_id)
+        elif client:
+            self._check_user(f"client:{client}")
+        if not check_global:
+            with self._lock:
+                self._counters["admitted"] += 1
+            yield
+            return
+        if not self._slots.acquire(blocking=False):
+            self._reject("rejectedGlobal", CapacityExceededError("Evaluation capacity exhausted", 1.0))
+        try:
+            if self._global_bucket is not None:
+                with self._lock:
+                    wait = self._global_bucket.try_acquire()
+                if wait:
+                    self._reject("rejectedGlobal", CapacityExceededError("Evaluation rate exhausted", wait))
+            with self._lock:
+                self._counters["admitted"] += 1
+                self._in_flight += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+        finally:
+            self._slots.release()
+
+    def record_deferred(self) -> None:
+        """Count a globally rejected request that was handed to the job queue instead."""
+
+        with self._lock:
+            self._counters["deferred"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "inFlight": self._in_flight, "maxConcurrent": self._max_concurrent}
+
+    def _check_user(self, user_id: str) -> None:
+        if self._user_rate <= 0:
+            return
+        with self._lock:
+            bucket = self._user_buckets.get(user_id)
+            if bucket is None:
+                bucket = self._user_buckets[user_id] = TokenBucket(self._user_rate, self._user_burst)
+                while len(self._user_buckets) > self.MAX_TRACKED_USERS:
+                    # the least recently seen user at worst gets a fresh burst
+                    self._user_buckets.popitem(last=False)
+            else:
+                self._user_buckets.move_to_end(user_id)
+            wait = bucket.try_acquire()
+        if wait:
+            self._reject("rejectedUser", UserRateLimitedError("Too many submissions", wait))
+
+    def _reject(self, counter: str, error: AdmissionError) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+        raise error
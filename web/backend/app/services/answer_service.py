@@ -1,14 +1,28 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, Optional, Set
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import anyio
 
 from ..models.answer import AnswerResult
+from ..models.question import Question
 from ..repositories import (
     AnswerRepository,
+    IdempotencyStore,
     ProgressRepository,
     QuestionRepository,
     StoredAnswer,
 )
 from .evaluation_service import EvaluationService
+from .prescoring import PreScorer
+
+logger = logging.getLogger(__name__)
 
 
 class DuplicateAnswerError(RuntimeError):
@@ -19,12 +33,26 @@ class DuplicateAnswerError(RuntimeError):
         self.question_id = question_id
 
 
+class SubmissionInProgressError(DuplicateAnswerError):
+    """Raised when the same answer is submitted again while the first attempt is still running."""
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """Raised when an ``Idempotency-Key`` is sent again with a different submission."""
+
+    def __init__(self, idempotency_key: str) -> None:
+        super().__init__(f"Idempotency key '{idempotency_key}' was already used for a different submission.")
+        self.idempotency_key = idempotency_key
+
+
 class AnswerService:
     """Handles evaluation workflow, persistence, and streak calculations."""
 
     WEEK_DAYS = 7
     WEEK_COMPLETION_BONUS_XP = 25
     XP_PER_LEVEL = 120
+    LOCK_STRIPES = 64
+    IDEMPOTENCY_CACHE_SIZE = 4096
 
     def __init__(
         self,
@@ -32,11 +60,25 @@ class AnswerService:
         evaluation_service: EvaluationService,
         answer_repository: AnswerRepository,
         progress_repository: ProgressRepository,
+        idempotency_store: Optional[IdempotencyStore] = None,
     ) -> None:
         self._question_repository = question_repository
         self._evaluation_service = evaluation_service
         self._answer_repository = answer_repository
         self._progress_repository = progress_repository
+        # the duplicate check, progress update and append must not interleave for one user
+        self._user_locks: List[threading.Lock] = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._state_lock = threading.Lock()
+        self._in_flight: Set[Tuple[str, str]] = set()
+        self._idempotency = idempotency_store or IdempotencyStore(max_entries=self.IDEMPOTENCY_CACHE_SIZE)
+        # (user, key) -> (submission fingerprint, outcome of the attempt still running with it)
+        self._pending_keys: Dict[Tuple[str, str], Tuple[str, "Future[Optional[AnswerResult]]"]] = {}
+        self._listeners: List[Callable[[StoredAnswer], None]] = []
+
+    def subscribe(self, listener: Callable[[StoredAnswer], None]) -> None:
+        """Call ``listener`` with every answer once it has been saved (e.g. to update read models)."""
+
+        self._listeners.append(listener)
 
     def submit_answer(
         self,
@@ -44,18 +86,273 @@ class AnswerService:
         answer: str,
         user_id: Optional[str],
         duration_seconds: int,
+        idempotency_key: Optional[str] = None,
     ) -> AnswerResult:
+        persisted_user_id = user_id or "anonymous"
+        fingerprint = self._submission_fingerprint(question_id, answer, duration_seconds)
+        replay = self._replayed_result(persisted_user_id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+        result: Optional[AnswerResult] = None
+        try:
+            question = self._question_repository.get_by_id(question_id)
+            with self._claim(persisted_user_id, question):
+                feedback, base_xp = self._evaluation_service.evaluate(
+                    question.prompt,
+                    answer,
+                    duration_seconds,
+                    previous_answers=self._previous_answers(persisted_user_id),
+                )
+                result = self._record_submission(question, answer, user_id, duration_seconds, feedback, base_xp)
+            self._remember_result(persisted_user_id, idempotency_key, fingerprint, result)
+            return result
+        finally:
+            self._release_key(persisted_user_id, idempotency_key, result)
+
+    def check_submission(self, question_id: str, user_id: Optional[str]) -> Question:
+        """Run the duplicate pre-flight without evaluating; raises like :meth:`submit_answer`."""
+
         question = self._question_repository.get_by_id(question_id)
-        feedback, base_xp = self._evaluation_service.evaluate(
-            question.prompt, answer, duration_seconds
-        )
-        now = datetime.now(tz=timezone.utc)
+        self._ensure_not_answered(user_id or "anonymous", question)
+        return question
+
+    def provisional_xp(self, question_id: str, duration_seconds: int) -> int:
+        """Conservative XP estimate shown while an evaluation is deferred.
+
+        Time spent writing stands in for quality (a minute is worth roughly two XP, capped
+        at the middle of the 1-20 scale); the evaluated award replaces it once the job runs.
+        """
+
+        question = self._question_repository.get_by_id(question_id)
+        base_xp = max(1, min(10, 2 + duration_seconds // 30))
+        return self._apply_difficulty(base_xp, self._difficulty_meta(question.day_index)["multiplier"])
+
+    async def submit_answer_async(
+        self,
+        question_id: str,
+        answer: str,
+        user_id: Optional[str],
+        duration_seconds: int,
+        idempotency_key: Optional[str] = None,
+    ) -> AnswerResult:
+        """Event-loop friendly :meth:`submit_answer`.
+
+        Evaluation is awaited on the async OpenAI path and the blocking storage work runs on
+        anyio's bounded worker-thread pool, so a slow evaluation never stalls other requests.
+        """
+
+        persisted_user_id = user_id or "anonymous"
+        fingerprint = self._submission_fingerprint(question_id, answer, duration_seconds)
+        replay = await self._areplayed_result(persisted_user_id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+        result: Optional[AnswerResult] = None
+        try:
+            question = self._question_repository.get_by_id(question_id)
+            previous_answers = await anyio.to_thread.run_sync(self._preflight, persisted_user_id, question)
+            with self._claim(persisted_user_id, question, checked=True):
+                feedback, base_xp = await self._evaluation_service.aevaluate(
+                    question.prompt, answer, duration_seconds, previous_answers=previous_answers
+                )
+                result = await anyio.to_thread.run_sync(
+                    self._record_submission, question, answer, user_id, duration_seconds, feedback, base_xp
+                )
+            await anyio.to_thread.run_sync(
+                self._remember_result, persisted_user_id, idempotency_key, fingerprint, result
+            )
+            return result
+        finally:
+            self._release_key(persisted_user_id, idempotency_key, result)
+
+    async def stream_answer(
+        self,
+        question_id: str,
+        answer: str,
+        user_id: Optional[str],
+        duration_seconds: int,
+        idempotency_key: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """Streaming :meth:`submit_answer_async` yielding ``(event, payload)`` pairs.
+
+        Emits ``accepted`` once the pre-flight passes, ``feedback`` text deltas while the
+        model writes, and finally ``result`` with the scored :class:`AnswerResult`. Duplicate
+        submissions raise before the first event; idempotent replays yield only ``result``.
+        """
+
         persisted_user_id = user_id or "anonymous"
+        fingerprint = self._submission_fingerprint(question_id, answer, duration_seconds)
+        replay = await self._areplayed_result(persisted_user_id, idempotency_key, fingerprint)
+        if replay is not None:
+            yield "result", replay
+            return
+        result: Optional[AnswerResult] = None
+        try:
+            question = self._question_repository.get_by_id(question_id)
+            previous_answers = await anyio.to_thread.run_sync(self._preflight, persisted_user_id, question)
+            with self._claim(persisted_user_id, question, checked=True):
+                yield "accepted", {"questionId": question.id}
+                outcome: Optional[Tuple[str, int]] = None
+                async for item in self._evaluation_service.astream(
+                    question.prompt, answer, duration_seconds, previous_answers=previous_answers
+                ):
+                    if isinstance(item, tuple):
+                        outcome = item
+                    else:
+                        yield "feedback", {"delta": item}
+                assert outcome is not None
+                feedback, base_xp = outcome
+                result = await anyio.to_thread.run_sync(
+                    self._record_submission, question, answer, user_id, duration_seconds, feedback, base_xp
+                )
+            await anyio.to_thread.run_sync(
+                self._remember_result, persisted_user_id, idempotency_key, fingerprint, result
+            )
+        finally:
+            self._release_key(persisted_user_id, idempotency_key, result)
+        yield "result", result
+
+    @contextmanager
+    def _claim(self, user_id: str, question: Question, checked: bool = False) -> Iterator[None]:
+        """Pre-flight guard run before any evaluation is paid for.
+
+        Rejects questions the user already answered this week and concurrent submissions of
+        the same question (double clicks, client retries) while the first one is in flight.
+        """
+
+        if not checked:
+            self._ensure_not_answered(user_id, question)
+        key = (user_id, question.id)
+        with self._state_lock:
+            if key in self._in_flight:
+                raise SubmissionInProgressError(question.id)
+            self._in_flight.add(key)
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._in_flight.discard(key)
+
+    def _ensure_not_answered(self, user_id: str, question: Question) -> None:
+        if question.id in self._answer_repository.answered_question_ids(user_id, question.week_index):
+            raise DuplicateAnswerError(question.id)
+
+    def _preflight(self, user_id: str, question: Question) -> Tuple[str, ...]:
+        self._ensure_not_answered(user_id, question)
+        return self._previous_answers(user_id)
+
+    def _previous_answers(self, user_id: str) -> Tuple[str, ...]:
+        """Recent answer texts for the pre-scorer's repetition check; skipped when it is off."""
+
+        if self._evaluation_service.prescorer is None:
+            return ()
+        recent = self._answer_repository.recent_answers(user_id, limit=PreScorer.HISTORY_SIZE)
+        return tuple(stored.answer for stored in recent)
+
+    @staticmethod
+    def _submission_fingerprint(question_id: str, answer: str, duration_seconds: int) -> str:
+        """Digest of what was submitted, stored with an idempotency key to detect its reuse."""
+
+        payload = json.dumps([question_id, answer, duration_seconds], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _replayed_result(
+        self, user_id: str, idempotency_key: Optional[str], fingerprint: str
+    ) -> Optional[AnswerResult]:
+        """Result already returned for this key, waiting for an attempt still running with it.
+
+        Returns ``None`` once the caller holds the key and should submit; it must then call
+        :meth:`_release_key`.
+        """
+
+        while True:
+            replay, pending = self._replay_or_hold_key(user_id, idempotency_key, fingerprint)
+            if pending is None:
+                return replay
+            result = pending.result()
+            if result is not None:
+                return result
+            # the first attempt failed; the retry is a submission of its own
 
-        answers_this_week = self._answer_repository.answers_for_week(
+    async def _areplayed_result(
+        self, user_id: str, idempotency_key: Optional[str], fingerprint: str
+    ) -> Optional[AnswerResult]:
+        """Event-loop friendly :meth:`_replayed_result`."""
+
+        while True:
+            replay, pending = await anyio.to_thread.run_sync(
+                self._replay_or_hold_key, user_id, idempotency_key, fingerprint
+            )
+            if pending is None:
+                return replay
+            # shielded: a disconnecting retry must not cancel the first attempt's outcome
+            result = await asyncio.shield(asyncio.wrap_future(pending))
+            if result is not None:
+                return result
+
+    def _replay_or_hold_key(
+        self, user_id: str, idempotency_key: Optional[str], fingerprint: str
+    ) -> Tuple[Optional[AnswerResult], "Optional[Future[Optional[AnswerResult]]]"]:
+        if not idempotency_key:
+            return None, None
+        stored = self._idempotency.get(user_id, idempotency_key)
+        if stored is not None:
+            if stored[0] != fingerprint:
+                raise IdempotencyKeyReusedError(idempotency_key)
+            return AnswerResult.model_validate(stored[1]), None
+        with self._state_lock:
+            pending = self._pending_keys.get((user_id, idempotency_key))
+            if pending is None:
+                self._pending_keys[(user_id, idempotency_key)] = (fingerprint, Future())
+                return None, None
+        if pending[0] != fingerprint:
+            raise IdempotencyKeyReusedError(idempotency_key)
+        return None, pending[1]
+
+    def _remember_result(
+        self, user_id: str, idempotency_key: Optional[str], fingerprint: str, result: AnswerResult
+    ) -> None:
+        if not idempotency_key:
+            return
+        self._idempotency.put(user_id, idempotency_key, fingerprint, result.model_dump(mode="json"))
+
+    def _release_key(self, user_id: str, idempotency_key: Optional[str], result: Optional[AnswerResult]) -> None:
+        """Hand the outcome (``None`` on failure) to retries waiting on this key."""
+
+        if not idempotency_key:
+            return
+        with self._state_lock:
+            pending = self._pending_keys.pop((user_id, idempotency_key), None)
+        if pending is not None:
+            pending[1].set_result(result)
+
+    def _record_submission(
+        self,
+        question: Question,
+        answer: str,
+        user_id: Optional[str],
+        duration_seconds: int,
+        feedback: str,
+        base_xp: int,
+    ) -> AnswerResult:
+        persisted_user_id = user_id or "anonymous"
+        with self._lock_for(persisted_user_id):
+            return self._persist(question, answer, persisted_user_id, duration_seconds, feedback, base_xp)
+
+    def _persist(
+        self,
+        question: Question,
+        answer: str,
+        persisted_user_id: str,
+        duration_seconds: int,
+        feedback: str,
+        base_xp: int,
+    ) -> AnswerResult:
+        question_id = question.id
+        now = datetime.now(tz=timezone.utc)
+
+        answered_ids: Set[str] = self._answer_repository.answered_question_ids(
             persisted_user_id, question.week_index
         )
-        answered_ids: Set[str] = {stored.question_id for stored in answers_this_week}
         already_completed_today = question_id in answered_ids
 
         if already_completed_today:
@@ -90,6 +387,11 @@ class AnswerService:
             week_index=question.week_index,
         )
         self._answer_repository.save_answer(stored)
+        for listener in self._listeners:
+            try:
+                listener(stored)
+            except Exception:  # the answer is saved; a stale read model must not fail the submission
+                logger.exception("Answer listener %r failed", listener)
 
         level_stats = self._level_stats(int(progress["xp_total"]))
 
@@ -113,6 +415,9 @@ class AnswerService:
             level_progress_percent=level_stats["progress_percent"],
         )
 
+    def _lock_for(self, user_id: str) -> threading.Lock:
+        return self._user_locks[hash(user_id) % self.LOCK_STRIPES]
+
     def _apply_difficulty(self, base_xp: int, multiplier: float) -> int:
         scaled = round(base_xp * multiplier)
         return max(1, scaled)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..repositories import WorkerFile
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationCache:
+    """Bounded LRU/TTL cache of ``(feedback, xp)`` evaluation results.
+
+    Keys hash the model, the question prompt and the normalized answer text, so copy-pasted
+    answers, retries and load tests reuse one evaluation. With ``disk_path`` set, entries are
+    also appended to a JSONL file that is replayed on startup and compacted once it grows to
+    several times the in-memory capacity. Each worker process writes its own
+    ``<disk_path>.<pid>`` and folds in the files of workers that have exited.
+    """
+
+    COMPACT_FACTOR = 4
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400.0,
+        disk_path: Optional[Path] = None,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._disk_path: Optional[Path] = None
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._disk_lines = 0
+        if disk_path is not None:
+            worker_file = WorkerFile(disk_path)
+            self._disk_path = worker_file.path
+            worker_file.adopt_orphans(self._append_lines)
+            self._load_disk()
+
+    @staticmethod
+    def key(model: str, question: str, answer: str) -> str:
+        normalized = " ".join(answer.split()).casefold()
+        digest = hashlib.sha256()
+        for part in (model, question.strip(), normalized):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self._ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: str, feedback: str, xp: int) -> None:
+        stored_at = time.time()
+        with self._lock:
+            self._store(key, stored_at, feedback, xp)
+            if self._disk_path is not None:
+                self._append_disk(key, stored_at, feedback, xp)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "capacity": self._max_entries,
+            }
+
+    def _store(self, key: str, stored_at: float, feedback: str, xp: int) -> None:
+        self._entries[key] = (stored_at, feedback, xp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_disk(self) -> None:
+        assert self._disk_path is not None
+        if not self._disk_path.exists():
+            return
+        now = time.time()
+        with self._disk_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                self._disk_lines += 1
+                try:
+                    record = json.loads(line)
+                    stored_at = float(record["stored_at"])
+                    if now - stored_at <= self._ttl_seconds:
+                        self._store(record["key"], stored_at, record["feedback"], int(record["xp"]))
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def _append_disk(self, key: str, stored_at: float, feedback: str, xp: int) -> None:
+        assert self._disk_path is not None
+        try:
+            if self._disk_lines >= self._max_entries * self.COMPACT_FACTOR:
+                self._compact_disk()
+            with self._disk_path.open("a", encoding="utf-8") as handle:
+                handle.write(self._disk_line(key, stored_at, feedback, xp))
+            self._disk_lines += 1
+        except OSError as exc:  # pragma: no cover - disk failure path
+            logger.warning("Evaluation cache disk write failed: %s", exc)
+
+    def _append_lines(self, lines: List[str]) -> None:
+        assert self._disk_path is not None
+        with self._disk_path.open("a", encoding="utf-8") as handle:
+            handle.writelines(f"{line}\n" for line in lines)
+
+    def _compact_disk(self) -> None:
+        assert self._disk_path is not None
+        temp_path = self._disk_path.with_name(f"{self._disk_path.name}.tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for key, (stored_at, feedback, xp) in self._entries.items():
+                handle.write(self._disk_line(key, stored_at, feedback, xp))
+        os.replace(temp_path, self._disk_path)
+        self._disk_lines = len(self._entries)
+
+    @staticmethod
+    def _disk_line(key: str, stored_at: float, feedback: str, xp: int) -> str:
+        record = {"key": key, "stored_at": stored_at, "feedback": feedback, "xp": xp}
+        return json.dumps(record, ensure_ascii=False) + "\n"
@@ -0,0 +1,363 @@
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from ..models.answer import AnswerResult
+from ..repositories import WorkerFile
+from .answer_service import AnswerService, DuplicateAnswerError, IdempotencyKeyReusedError, SubmissionInProgressError
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the evaluation queue is at capacity; callers should retry later."""
+
+
+@dataclass(slots=True)
+class EvaluationJob:
+    """A deferred answer submission and, once a worker has run it, its outcome."""
+
+    job_id: str
+    question_id: str
+    answer: str
+    user_id: Optional[str]
+    duration_seconds: int
+    idempotency_key: Optional[str] = None
+    submitted_at: datetime = field(default_factory=lambda: datetime.now(tz=timezone.utc))
+    status: str = "queued"
+    result: Optional[AnswerResult] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "question_id": self.question_id,
+            "answer": self.answer,
+            "user_id": self.user_id,
+            "duration_seconds": self.duration_seconds,
+            "idempotency_key": self.idempotency_key,
+            "submitted_at": self.submitted_at.isoformat(),
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "EvaluationJob":
+        return cls(
+            job_id=record["job_id"],
+            question_id=record["question_id"],
+            answer=record["answer"],
+            user_id=record.get("user_id"),
+            duration_seconds=int(record["duration_seconds"]),
+            idempotency_key=record.get("idempotency_key"),
+            submitted_at=datetime.fromisoformat(record["submitted_at"]),
+        )
+
+
+class JobBackend(Protocol):
+    """Transport for queued jobs; swap in Redis, SQS, etc. via ``EVALUATION_QUEUE_BACKEND``."""
+
+    def put(self, job: EvaluationJob) -> None:
+        """Queue ``job`` or raise :class:`QueueFullError`."""
+
+    def take(self, timeout: float) -> Optional[EvaluationJob]:
+        """Next job, or ``None`` if none arrived within ``timeout`` seconds."""
+
+    def done(self, job_id: str) -> None:
+        """Acknowledge a job so it is not redelivered."""
+
+    def pending(self) -> List[EvaluationJob]:
+        """Jobs accepted but not yet acknowledged."""
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+
+
+class InProcessJobBackend:
+    """Bounded in-memory queue backed by an fsynced JSONL journal.
+
+    A submission is journaled before :meth:`put` returns and an ``{"ack": job_id}`` line is
+    appended once it is acknowledged, so jobs accepted before a crash or restart are
+    replayed on startup. The journal is rewritten with only the unacknowledged jobs after
+    ``compact_threshold`` acks, or as soon as none are left. Each worker process journals to
+    its own ``<journal>.<pid>`` and replays the journals of workers that have exited.
+    """
+
+    def __init__(
+        self, max_depth: int = 500, journal_path: Optional[Path] = None, compact_threshold: int = 256
+    ) -> None:
+        self._max_depth = max(1, max_depth)
+        self._compact_threshold = max(1, compact_threshold)
+        self._queue: "queue.Queue[EvaluationJob]" = queue.Queue()
+        self._journal_path: Optional[Path] = None
+        self._lock = threading.Lock()
+        self._unacked: "OrderedDict[str, EvaluationJob]" = OrderedDict()
+        self._acks = 0
+        if journal_path is not None:
+            worker_file = WorkerFile(journal_path)
+            self._journal_path = worker_file.path
+            worker_file.adopt_orphans(self._append_lines)
+            for job in self._load_journal():
+                # replay ignores max_depth: these were already accepted
+                self._unacked[job.job_id] = job
+                self._queue.put_nowait(job)
+            if self._journal_path.exists():
+                # drop acknowledged jobs carried over from adopted journals
+                self._rewrite_journal()
+            if self._unacked:
+                logger.info("Replaying %s evaluation jobs from %s", len(self._unacked), self._journal_path)
+
+    def put(self, job: EvaluationJob) -> None:
+        with self._lock:
+            if self._queue.qsize() >= self._max_depth:
+                raise QueueFullError("Evaluation queue is full")
+            self._append_journal(job)
+            self._unacked[job.job_id] = job
+            self._queue.put_nowait(job)
+
+    def take(self, timeout: float) -> Optional[EvaluationJob]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def done(self, job_id: str) -> None:
+        with self._lock:
+            if self._unacked.pop(job_id, None) is None or self._journal_path is None:
+                return
+            self._acks += 1
+            if not self._unacked or self._acks >= self._compact_threshold:
+                self._rewrite_journal()
+            else:
+                self._append_lines([json.dumps({"ack": job_id})])
+
+    def pending(self) -> List[EvaluationJob]:
+        with self._lock:
+            return list(self._unacked.values())
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _load_journal(self) -> List[EvaluationJob]:
+        assert self._journal_path is not None
+        if not self._journal_path.exists():
+            return []
+        jobs: "OrderedDict[str, EvaluationJob]" = OrderedDict()
+        with self._journal_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    if "ack" in record:
+                        jobs.pop(record["ack"], None)
+                        continue
+                    job = EvaluationJob.from_record(record)
+                except (ValueError, KeyError, TypeError):
+                    # torn final line from a crash mid-append
+                    continue
+                jobs[job.job_id] = job
+        return list(jobs.values())
+
+    def _append_journal(self, job: EvaluationJob) -> None:
+        if self._journal_path is None:
+            return
+        self._append_lines([json.dumps(job.to_record(), ensure_ascii=False)])
+
+    def _append_lines(self, lines: List[str]) -> None:
+        assert self._journal_path is not None
+        with self._journal_path.open("a", encoding="utf-8") as handle:
+            for line in lines:
+                handle.write(line)
+                handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _rewrite_journal(self) -> None:
+        if self._journal_path is None:
+            return
+        temp_path = self._journal_path.with_name(f"{self._journal_path.name}.tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for job in self._unacked.values():
+                handle.write(json.dumps(job.to_record(), ensure_ascii=False))
+                handle.write("\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self._journal_path)
+        self._acks = 0
+
+
+class EvaluationJobQueue:
+    """Runs answer submissions on a bounded pool of worker threads.
+
+    :meth:`enqueue` runs the cheap duplicate checks, hands the job to the backend and returns
+    straight away; ``concurrency`` workers then evaluate and persist jobs in arrival order.
+    Finished jobs are kept for polling until ``max_retained`` newer jobs push them out.
+    """
+
+    POLL_SECONDS = 0.5
+
+    def __init__(
+        self,
+        answer_service: AnswerService,
+        backend: JobBackend,
+        concurrency: int = 4,
+        max_retained: int = 4096,
+    ) -> None:
+        self._answer_service = answer_service
+        self._backend = backend
+        self._concurrency = max(1, concurrency)
+        self._max_retained = max(1, max_retained)
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, EvaluationJob]" = OrderedDict()
+        self._active: Dict[Tuple[str, str], str] = {}
+        self._by_idempotency_key: Dict[Tuple[str, str], str] = {}
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._stopped = threading.Event()
+        self._workers: List[threading.Thread] = []
+        for job in backend.pending():
+            self._track(job)
+        if self._jobs:
+            self._ensure_workers()
+
+    def enqueue(
+        self,
+        question_id: str,
+        answer: str,
+        user_id: Optional[str],
+        duration_seconds: int,
+        idempotency_key: Optional[str] = None,
+    ) -> EvaluationJob:
+        persisted_user_id = user_id or "anonymous"
+        with self._lock:
+            if idempotency_key:
+                existing = self._by_idempotency_key.get((persisted_user_id, idempotency_key))
+                if existing is not None and existing in self._jobs:
+                    job = self._jobs[existing]
+                    if (job.question_id, job.answer, job.duration_seconds) != (question_id, answer, duration_seconds):
+                        raise IdempotencyKeyReusedError(idempotency_key)
+                    return job
+            if (persisted_user_id, question_id) in self._active:
+                raise SubmissionInProgressError(question_id)
+        self._answer_service.check_submission(question_id, user_id)
+
+        job = EvaluationJob(
+            job_id=uuid.uuid4().hex,
+            question_id=question_id,
+            answer=answer,
+            user_id=user_id,
+            duration_seconds=duration_seconds,
+            idempotency_key=idempotency_key,
+        )
+        with self._lock:
+            if (persisted_user_id, question_id) in self._active:
+                raise SubmissionInProgressError(question_id)
+            self._backend.put(job)
+            self._track(job)
+        self._ensure_workers()
+        return job
+
+    def get(self, job_id: str) -> Optional[EvaluationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "depth": self._backend.depth(),
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "concurrency": self._concurrency,
+            }
+
+    def close(self) -> None:
+        """Stop the workers; unacknowledged jobs stay with the backend for the next start."""
+
+        self._stopped.set()
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._workers = []
+
+    def _track(self, job: EvaluationJob) -> None:
+        persisted_user_id = job.user_id or "anonymous"
+        self._jobs[job.job_id] = job
+        self._active[(persisted_user_id, job.question_id)] = job.job_id
+        if job.idempotency_key:
+            self._by_idempotency_key[(persisted_user_id, job.idempotency_key)] = job.job_id
+        while len(self._jobs) > self._max_retained:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest_id]
+            if oldest.idempotency_key:
+                self._by_idempotency_key.pop((oldest.user_id or "anonymous", oldest.idempotency_key), None)
+
+    def _ensure_workers(self) -> None:
+        if self._workers or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for index in range(self._concurrency):
+                worker = threading.Thread(target=self._run, name=f"evaluation-worker-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            job = self._backend.take(self.POLL_SECONDS)
+            if job is None:
+                continue
+            with self._lock:
+                job.status = "running"
+                self._running += 1
+            self._execute(job)
+
+    def _execute(self, job: EvaluationJob) -> None:
+        result: Optional[AnswerResult] = None
+        error: Optional[str] = "We couldn't evaluate your answer. Please try again."
+        try:
+            result = self._answer_service.submit_answer(
+                question_id=job.question_id,
+                answer=job.answer,
+                user_id=job.user_id,
+                duration_seconds=job.duration_seconds,
+                idempotency_key=job.idempotency_key,
+            )
+            error = None
+        except (DuplicateAnswerError, IdempotencyKeyReusedError) as exc:
+            # expected outcomes of a replayed or retried job, not evaluation failures
+            error = str(exc)
+        except (KeyError, RuntimeError) as exc:
+            logger.warning("Evaluation job %s failed: %s", job.job_id, exc)
+        except Exception:  # storage errors and the like must not kill the worker or strand the job
+            logger.exception("Evaluation job %s failed unexpectedly", job.job_id)
+        finally:
+            try:
+                self._backend.done(job.job_id)
+            except Exception:
+                logger.exception("Could not acknowledge evaluation job %s", job.job_id)
+            self._finish(job, result, error)
+
+    def _finish(self, job: EvaluationJob, result: Optional[AnswerResult], error: Optional[str]) -> None:
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.status = "completed" if result is not None else "failed"
+            self._running -= 1
+            if result is not None:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._active.pop((job.user_id or "anonymous", job.question_id), None)
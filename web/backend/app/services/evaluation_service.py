@@ -1,54 +1,552 @@
+import asyncio
 import json
-from typing import Tuple
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
-from openai import OpenAI
+import anyio
+from openai import AsyncOpenAI, OpenAI
+
+from .evaluation_cache import EvaluationCache
+from .model_routing import ModelRouter
+from .prescoring import PreScorer
+
+logger = logging.getLogger(__name__)
+
+_XP_FIELD = re.compile(r'"xp"\s*:\s*"?(\d+)')
+
+
+class FeedbackStreamDecoder:
+    """Incrementally pulls the ``feedback`` string out of a streamed JSON object.
+
+    :meth:`feed` takes raw completion chunks and returns whatever feedback characters became
+    decodable, so tokens can be forwarded before the JSON object is complete.
+    """
+
+    _FIELD = '"feedback"'
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._position: Optional[int] = None
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._position is None:
+            field = self._buffer.find(self._FIELD)
+            if field < 0:
+                return ""
+            colon = self._buffer.find(":", field + len(self._FIELD))
+            quote = self._buffer.find('"', colon + 1) if colon >= 0 else -1
+            if quote < 0:
+                return ""
+            self._position = quote + 1
+
+        decoded: List[str] = []
+        text, index = self._buffer, self._position
+        while index < len(text):
+            char = text[index]
+            if char == '"':
+                self._done = True
+                index += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                index += 1
+                continue
+            if index + 1 >= len(text):
+                break
+            marker = text[index + 1]
+            if marker == "u":
+                if index + 6 > len(text):
+                    break
+                code = int(text[index + 2 : index + 6], 16)
+                if 0xD800 <= code <= 0xDBFF:
+                    # surrogate pair: wait for the low half so we never emit half a character
+                    if index + 12 > len(text):
+                        break
+                    low = int(text[index + 8 : index + 12], 16)
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    index += 6
+                decoded.append(chr(code))
+                index += 6
+            else:
+                decoded.append(self._ESCAPES.get(marker, marker))
+                index += 2
+        self._position = index
+        return "".join(decoded)
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+
+@dataclass(frozen=True, slots=True)
+class EvaluationPolicy:
+    """Latency budget for one evaluation: deadlines, retries, hedging and fallbacks.
+
+    ``deadline_seconds`` bounds the whole evaluation including retries and the fallback
+    model; each attempt is further capped by ``attempt_timeout``. With ``hedge`` on, the
+    async path fires a duplicate request once an attempt outlives the model's recent
+    ``hedge_percentile`` latency. The defaults make a single unbounded attempt.
+    """
+
+    attempt_timeout: Optional[float] = None
+    max_attempts: int = 1
+    deadline_seconds: Optional[float] = None
+    hedge: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    fallback_model: Optional[str] = None
+    local_fallback: bool = False
+    backoff_base: float = 0.25
 
 
 class EvaluationService:
     """Talks to OpenAI to score answers and produce feedback."""
 
-    def __init__(self, client: OpenAI, model: str) -> None:
+    SYSTEM_PROMPT = (
+        "You are a critical thinking coach. Evaluate the answer for depth, clarity, "
+        "and originality. Consider how long the user spent writing—more time hints at "
+        "reflection but does not guarantee quality. Provide a JSON object with 'feedback' "
+        "and 'xp' (integer 1-20). In the feedback string, first celebrate the strongest part of "
+        "the answer, then—after the phrase ' Improve:'—offer one short suggestion. Reward mindful, "
+        "well-structured answers that match the time investment; penalise shallow responses written quickly. "
+        "Keep feedback under 200 characters."
+    )
+
+    def __init__(
+        self,
+        client: OpenAI,
+        model: str,
+        async_client: Optional[AsyncOpenAI] = None,
+        cache: Optional[EvaluationCache] = None,
+        prescorer: Optional[PreScorer] = None,
+        router: Optional[ModelRouter] = None,
+        max_tokens: Optional[int] = 200,
+        json_mode: bool = True,
+        policy: Optional[EvaluationPolicy] = None,
+    ) -> None:
         self._client = client
+        self._async_client = async_client
         self._model = model
+        self._cache = cache
+        self._prescorer = prescorer
+        self._router = router or ModelRouter(model)
+        self._max_tokens = max_tokens
+        self._json_mode = json_mode
+        self._policy = policy or EvaluationPolicy()
+        self._counters_lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "retries": 0,
+            "hedges": 0,
+            "hedgeWins": 0,
+            "fallbackModel": 0,
+            "fallbackLocal": 0,
+        }
 
-    def evaluate(self, question: str, answer: str, duration_seconds: int) -> Tuple[str, int]:
-        prompt = (
-            "You are a critical thinking coach. Evaluate the answer for depth, clarity, "
-            "and originality. Consider how long the user spent writing—more time hints at "
-            "reflection but does not guarantee quality. Provide a JSON object with 'feedback' "
-            "and 'xp' (integer 1-20). In the feedback string, first celebrate the strongest part of "
-            "the answer, then—after the phrase ' Improve:'—offer one short suggestion. Reward mindful, "
-            "well-structured answers that match the time investment; penalise shallow responses written quickly. "
-            "Keep feedback under 200 characters."
-        )
+    @property
+    def cache(self) -> Optional[EvaluationCache]:
+        return self._cache
+
+    @property
+    def prescorer(self) -> Optional[PreScorer]:
+        return self._prescorer
+
+    @property
+    def router(self) -> ModelRouter:
+        return self._router
+
+    def stats(self) -> Dict[str, int]:
+        with self._counters_lock:
+            return dict(self._counters)
+
+    def evaluate(
+        self,
+        question: str,
+        answer: str,
+        duration_seconds: int,
+        previous_answers: Sequence[str] = (),
+    ) -> Tuple[str, int]:
+        """Score an answer; ``previous_answers`` lets the pre-scorer catch recycled answers."""
+
+        prescored = self._prescore(answer, duration_seconds, previous_answers)
+        if prescored is not None:
+            return prescored
+        return self._complete(question, answer, duration_seconds)
+
+    async def aevaluate(
+        self,
+        question: str,
+        answer: str,
+        duration_seconds: int,
+        previous_answers: Sequence[str] = (),
+    ) -> Tuple[str, int]:
+        """Async variant of :meth:`evaluate` that never blocks the event loop.
+
+        Uses the ``AsyncOpenAI`` client when one is configured; otherwise the blocking call
+        runs on anyio's bounded worker-thread pool.
+        """
+
+        if self._async_client is None:
+            return await anyio.to_thread.run_sync(
+                self.evaluate, question, answer, duration_seconds, previous_answers
+            )
+        prescored = self._prescore(answer, duration_seconds, previous_answers)
+        if prescored is not None:
+            return prescored
+        model = self._router.route(answer, duration_seconds)
+        cache_key = self._cache_key(model, question, answer)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+        deadline = self._deadline()
+        request = self._request(model, question, answer, duration_seconds)
+        try:
+            result = await self._acall_with_retries(model, request, deadline)
+        except RuntimeError as exc:
+            return await self._afallback(model, question, answer, duration_seconds, deadline, exc)
+        return self._remember(cache_key, result)
+
+    async def astream(
+        self,
+        question: str,
+        answer: str,
+        duration_seconds: int,
+        previous_answers: Sequence[str] = (),
+    ) -> AsyncIterator[Union[str, Tuple[str, int]]]:
+        """Yield feedback text as the model produces it, then the final ``(feedback, xp)``.
+
+        Pre-scored answers, cache hits, fallbacks and deployments without an async client
+        yield the whole feedback at once.
+        """
+
+        result = self._prescore(answer, duration_seconds, previous_answers)
+        if result is None and self._async_client is None:
+            result = await anyio.to_thread.run_sync(self._complete, question, answer, duration_seconds)
+        model = self._router.route(answer, duration_seconds)
+        cache_key = self._cache_key(model, question, answer)
+        if result is None:
+            result = self._cached(cache_key)
+        if result is not None:
+            yield result[0]
+            yield result
+            return
+
+        assert self._async_client is not None
+        deadline = self._deadline()
+        decoder = FeedbackStreamDecoder()
+        started = time.perf_counter()
+        usage: Any = None
+        streamed = False
+        try:
+            stream = await self._async_client.chat.completions.create(
+                **self._request(model, question, answer, duration_seconds),
+                **self._timeout_option(self._attempt_timeout(deadline)),
+                stream=True,
+                # streamed responses only report token usage in a final, choice-less chunk on request
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    feedback_delta = decoder.feed(delta)
+                    if feedback_delta:
+                        streamed = True
+                        yield feedback_delta
+            parsed = self._parse_text(decoder.text)
+        except Exception as exc:  # pragma: no cover - network failure path
+            self._router.record(model, time.perf_counter() - started, failed=True)
+            if streamed:
+                raise RuntimeError(f"OpenAI evaluation failed: {exc}") from exc
+            fallback = await self._afallback(model, question, answer, duration_seconds, deadline, exc)
+            yield fallback[0]
+            yield fallback
+            return
+        self._record_usage(model, started, usage)
+        yield self._remember(cache_key, parsed)
+
+    def _prescore(
+        self, answer: str, duration_seconds: int, previous_answers: Sequence[str]
+    ) -> Optional[Tuple[str, int]]:
+        if self._prescorer is None:
+            return None
+        return self._prescorer.score(answer, duration_seconds, previous_answers)
+
+    def _complete(self, question: str, answer: str, duration_seconds: int) -> Tuple[str, int]:
+        model = self._router.route(answer, duration_seconds)
+        cache_key = self._cache_key(model, question, answer)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+        deadline = self._deadline()
+        request = self._request(model, question, answer, duration_seconds)
         try:
-            response = self._client.chat.completions.create(
-                model=self._model,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Question: {question}\n"
-                            f"Answer: {answer}\n"
-                            f"Seconds spent writing: {duration_seconds}"
-                        ),
-                    },
-                ],
-                temperature=0.6,
+            result = self._call_with_retries(model, request, deadline)
+        except RuntimeError as exc:
+            return self._fallback(model, question, answer, duration_seconds, deadline, exc)
+        return self._remember(cache_key, result)
+
+    def _call_with_retries(self, model: str, request: Dict[str, Any], deadline: Optional[float]) -> Tuple[str, int]:
+        error: Optional[RuntimeError] = None
+        for attempt in range(max(1, self._policy.max_attempts)):
+            if attempt:
+                self._count("retries")
+                time.sleep(self._backoff(attempt, deadline))
+            timeout = self._attempt_timeout(deadline)
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                return self._call(model, request, timeout)
+            except RuntimeError as exc:
+                error = exc
+        raise error or RuntimeError("OpenAI evaluation failed: deadline exceeded")
+
+    async def _acall_with_retries(
+        self, model: str, request: Dict[str, Any], deadline: Optional[float]
+    ) -> Tuple[str, int]:
+        error: Optional[RuntimeError] = None
+        for attempt in range(max(1, self._policy.max_attempts)):
+            if attempt:
+                self._count("retries")
+                await asyncio.sleep(self._backoff(attempt, deadline))
+            timeout = self._attempt_timeout(deadline)
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                return await self._ahedged_call(model, request, timeout)
+            except RuntimeError as exc:
+                error = exc
+        raise error or RuntimeError("OpenAI evaluation failed: deadline exceeded")
+
+    def _call(self, model: str, request: Dict[str, Any], timeout: Optional[float]) -> Tuple[str, int]:
+        started = time.perf_counter()
+        try:
+            response = self._client.chat.completions.create(**request, **self._timeout_option(timeout))
+            result = self._parse(response)
+        except Exception as exc:  # pragma: no cover - network failure path
+            self._router.record(model, time.perf_counter() - started, failed=True)
+            raise RuntimeError(f"OpenAI evaluation failed: {exc or type(exc).__name__}") from exc
+        self._record_usage(model, started, getattr(response, "usage", None))
+        return result
+
+    async def _acall(self, model: str, request: Dict[str, Any], timeout: Optional[float]) -> Tuple[str, int]:
+        assert self._async_client is not None
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._async_client.chat.completions.create(**request, **self._timeout_option(timeout)),
+                timeout,
             )
+            result = self._parse(response)
         except Exception as exc:  # pragma: no cover - network failure path
-            raise RuntimeError(f"OpenAI evaluation failed: {exc}") from exc
+            self._router.record(model, time.perf_counter() - started, failed=True)
+            raise RuntimeError(f"OpenAI evaluation failed: {exc or type(exc).__name__}") from exc
+        self._record_usage(model, started, getattr(response, "usage", None))
+        return result
+
+    async def _ahedged_call(self, model: str, request: Dict[str, Any], timeout: Optional[float]) -> Tuple[str, int]:
+        """Race a second request against a slow first one and keep whichever answers first."""
+
+        hedge_after = self._hedge_delay(model)
+        if hedge_after is None or (timeout is not None and hedge_after >= timeout):
+            return await self._acall(model, request, timeout)
+        primary = asyncio.ensure_future(self._acall(model, request, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+        self._count("hedges")
+        hedge = asyncio.ensure_future(
+            self._acall(model, request, None if timeout is None else timeout - hedge_after)
+        )
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedgeWins")
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        assert error is not None
+        raise error
+
+    def _fallback(
+        self,
+        model: str,
+        question: str,
+        answer: str,
+        duration_seconds: int,
+        deadline: Optional[float],
+        error: RuntimeError,
+    ) -> Tuple[str, int]:
+        fallback_model = self._policy.fallback_model
+        if fallback_model and fallback_model != model:
+            timeout = self._attempt_timeout(deadline)
+            if timeout is None or timeout > 0:
+                try:
+                    result = self._call(
+                        fallback_model, self._request(fallback_model, question, answer, duration_seconds), timeout
+                    )
+                    self._count("fallbackModel")
+                    return result
+                except RuntimeError as exc:
+                    error = exc
+        return self._local_fallback(answer, duration_seconds, error)
+
+    async def _afallback(
+        self,
+        model: str,
+        question: str,
+        answer: str,
+        duration_seconds: int,
+        deadline: Optional[float],
+        error: BaseException,
+    ) -> Tuple[str, int]:
+        fallback_model = self._policy.fallback_model
+        if fallback_model and fallback_model != model:
+            timeout = self._attempt_timeout(deadline)
+            if timeout is None or timeout > 0:
+                try:
+                    result = await self._acall(
+                        fallback_model, self._request(fallback_model, question, answer, duration_seconds), timeout
+                    )
+                    self._count("fallbackModel")
+                    return result
+                except RuntimeError as exc:
+                    error = exc
+        return self._local_fallback(answer, duration_seconds, error)
+
+    def _local_fallback(self, answer: str, duration_seconds: int, error: BaseException) -> Tuple[str, int]:
+        if not self._policy.local_fallback:
+            if isinstance(error, RuntimeError):
+                raise error
+            raise RuntimeError(f"OpenAI evaluation failed: {error}") from error
+        logger.warning("Evaluation fell back to the local scorer: %s", error)
+        self._count("fallbackLocal")
+        # not cached: the next submission of this answer should get a real evaluation
+        return PreScorer.estimate(answer, duration_seconds)
 
-        text = response.choices[0].message.content if response.choices else ""
+    def _deadline(self) -> Optional[float]:
+        budget = self._policy.deadline_seconds
+        return time.monotonic() + budget if budget else None
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        timeout = self._policy.attempt_timeout
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def _backoff(self, attempt: int, deadline: Optional[float]) -> float:
+        ceiling = self._policy.backoff_base * (2 ** (attempt - 1))
+        delay = random.uniform(ceiling / 2, ceiling)
+        if deadline is not None:
+            delay = max(0.0, min(delay, deadline - time.monotonic()))
+        return delay
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if not self._policy.hedge:
+            return None
+        return self._router.latency_percentile(model, self._policy.hedge_percentile, self._policy.hedge_min_samples)
+
+    def _count(self, counter: str) -> None:
+        with self._counters_lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _timeout_option(timeout: Optional[float]) -> Dict[str, float]:
+        return {"timeout": timeout} if timeout is not None else {}
+
+    def _request(self, model: str, question: str, answer: str, duration_seconds: int) -> Dict[str, Any]:
+        request: Dict[str, Any] = {
+            "model": model,
+            "messages": self._messages(question, answer, duration_seconds),
+            "temperature": 0.6,
+        }
+        if self._max_tokens:
+            request["max_tokens"] = self._max_tokens
+        if self._json_mode:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _record_usage(self, model: str, started: float, usage: Any) -> None:
+        self._router.record(
+            model,
+            time.perf_counter() - started,
+            prompt_tokens=int(getattr(usage, "prompt_tokens", 0) or 0),
+            completion_tokens=int(getattr(usage, "completion_tokens", 0) or 0),
+        )
+
+    def _cache_key(self, model: str, question: str, answer: str) -> Optional[str]:
+        if self._cache is None:
+            return None
+        return EvaluationCache.key(model, question, answer)
+
+    def _cached(self, cache_key: Optional[str]) -> Optional[Tuple[str, int]]:
+        if self._cache is None or cache_key is None:
+            return None
+        return self._cache.get(cache_key)
+
+    def _remember(self, cache_key: Optional[str], result: Tuple[str, int]) -> Tuple[str, int]:
+        if self._cache is not None and cache_key is not None:
+            self._cache.put(cache_key, *result)
+        return result
+
+    def _messages(self, question: str, answer: str, duration_seconds: int) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": (
+                    f"Question: {question}\n"
+                    f"Answer: {answer}\n"
+                    f"Seconds spent writing: {duration_seconds}"
+                ),
+            },
+        ]
+
+    @classmethod
+    def _parse(cls, response: object) -> Tuple[str, int]:
+        choices = getattr(response, "choices", None)
+        return cls._parse_text(choices[0].message.content if choices else "")
+
+    @staticmethod
+    def _parse_text(text: Optional[str]) -> Tuple[str, int]:
         if not text:
             raise RuntimeError("Empty response from evaluation service")
         try:
             data = json.loads(text)
         except json.JSONDecodeError as exc:
-            raise RuntimeError(f"Failed to parse evaluation payload: {text}") from exc
+            data = EvaluationService._salvage(text)
+            if data is None:
+                raise RuntimeError(f"Failed to parse evaluation payload: {text}") from exc
 
         feedback = data.get("feedback", "").strip()
         xp = int(data.get("xp", 0))
         xp = max(1, min(xp, 20))
         return feedback, xp
+
+    @staticmethod
+    def _salvage(text: str) -> Optional[Dict[str, Any]]:
+        """Recover both fields from JSON cut off by ``max_tokens`` or wrapped in prose."""
+
+        decoder = FeedbackStreamDecoder()
+        feedback = decoder.feed(text)
+        xp = _XP_FIELD.search(text)
+        if not feedback or xp is None:
+            return None
+        return {"feedback": feedback, "xp": int(xp.group(1))}
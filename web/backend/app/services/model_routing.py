@@ -0,0 +1,87 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Sequence
+
+
+class ModelRouter:
+    """Chooses the evaluation model per answer and keeps per-model usage statistics.
+
+    Short answers go to ``fast_model`` and long, high-effort answers (many words, or a
+    long writing session) go to ``strong_model``; everything else, and any tier left unset,
+    uses ``default_model``. :meth:`record` collects latency and token counts so the word
+    thresholds can be tuned from ``/metricz``.
+    """
+
+    LATENCY_WINDOW = 256
+
+    def __init__(
+        self,
+        default_model: str,
+        fast_model: Optional[str] = None,
+        strong_model: Optional[str] = None,
+        short_answer_words: int = 40,
+        long_answer_words: int = 150,
+        long_answer_seconds: int = 240,
+    ) -> None:
+        self._default_model = default_model
+        self._fast_model = fast_model or default_model
+        self._strong_model = strong_model or default_model
+        self._short_answer_words = short_answer_words
+        self._long_answer_words = long_answer_words
+        self._long_answer_seconds = long_answer_seconds
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def route(self, answer: str, duration_seconds: int) -> str:
+        words = len(answer.split())
+        if words <= self._short_answer_words:
+            return self._fast_model
+        if words >= self._long_answer_words or duration_seconds >= self._long_answer_seconds:
+            return self._strong_model
+        return self._default_model
+
+    def record(
+        self,
+        model: str,
+        latency_seconds: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        failed: bool = False,
+    ) -> None:
+        with self._lock:
+            usage = self._usage.setdefault(
+                model, {"calls": 0, "failures": 0, "promptTokens": 0, "completionTokens": 0}
+            )
+            usage["calls"] += 1
+            usage["failures"] += int(failed)
+            usage["promptTokens"] += prompt_tokens
+            usage["completionTokens"] += completion_tokens
+            self._latencies.setdefault(model, deque(maxlen=self.LATENCY_WINDOW)).append(latency_seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stats: Dict[str, Dict[str, float]] = {}
+            for model, usage in self._usage.items():
+                latencies = sorted(self._latencies.get(model, ()))
+                stats[model] = {
+                    **usage,
+                    "avgLatencyMs": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                    "p95LatencyMs": round(1000 * self._percentile(latencies, 0.95), 1) if latencies else 0.0,
+                }
+            return stats
+
+    def latency_percentile(self, model: str, fraction: float, min_samples: int = 1) -> Optional[float]:
+        """Recent latency percentile for ``model`` in seconds; ``None`` until enough samples exist."""
+
+        with self._lock:
+            latencies = sorted(self._latencies.get(model, ()))
+        if len(latencies) < max(1, min_samples):
+            return None
+        return self._percentile(latencies, fraction)
+
+    @staticmethod
+    def _percentile(ordered: Sequence[float], fraction: float) -> float:
+        index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+        return ordered[index]
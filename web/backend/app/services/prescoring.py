@@ -0,0 +1,128 @@
+import logging
+import re
+import threading
+from difflib import SequenceMatcher
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# scripts written without spaces; each character is counted as a token of its own
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+", re.UNICODE)
+_CJK_CHAR = re.compile(rf"[{_CJK}]")
+_VOWELS = frozenset("aeiouy")
+
+
+class PreScorer:
+    """Cheap local checks that catch clearly trivial answers before the model is called.
+
+    Each rule is a threshold on a simple signal: word count, share of distinct words, share
+    of word-like tokens, typing speed and similarity to the user's recent answers. A tripped
+    rule yields deterministic feedback with the minimum XP; anything else goes to the model.
+    Chinese and Japanese characters count as one word each, since those scripts are written
+    without spaces.
+    """
+
+    HISTORY_SIZE = 5
+    MIN_XP = 1
+    FEEDBACK = {
+        "empty": "You opened the prompt—that's a start. Improve: write a few sentences that explain your thinking.",
+        "too_short": "You named a position. Improve: add the reasoning behind it and one example.",
+        "repetitive": "There's energy here. Improve: replace the repeated words with distinct ideas.",
+        "gibberish": "We couldn't read this as an answer. Improve: respond to the question in full sentences.",
+        "pasted": "You brought material to the table. Improve: write the answer in your own words.",
+        "repeated": "Consistent viewpoint. Improve: tackle today's question with a fresh angle instead of a past answer.",
+    }
+
+    FALLBACK_FEEDBACK = (
+        "Thanks for a considered answer—it was scored locally while our coach is busy. "
+        "Improve: revisit it tomorrow and add one concrete example."
+    )
+
+    def __init__(
+        self,
+        min_words: int = 3,
+        min_unique_ratio: float = 0.3,
+        min_wordlike_ratio: float = 0.5,
+        max_chars_per_second: float = 40.0,
+        max_similarity: float = 0.9,
+    ) -> None:
+        self._min_words = min_words
+        self._min_unique_ratio = min_unique_ratio
+        self._min_wordlike_ratio = min_wordlike_ratio
+        self._max_chars_per_second = max_chars_per_second
+        self._max_similarity = max_similarity
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._avoided: Dict[str, int] = {reason: 0 for reason in self.FEEDBACK}
+
+    def score(
+        self,
+        answer: str,
+        duration_seconds: int,
+        previous_answers: Sequence[str] = (),
+    ) -> Optional[Tuple[str, int]]:
+        """Return ``(feedback, xp)`` for a trivial answer, or ``None`` to defer to the model."""
+
+        reason = self._trivial_reason(answer, duration_seconds, previous_answers)
+        with self._lock:
+            self._checked += 1
+            if reason is None:
+                return None
+            self._avoided[reason] += 1
+            avoided = sum(self._avoided.values())
+        logger.info("Pre-scorer flagged a %s answer; %s evaluation calls avoided so far", reason, avoided)
+        return self.FEEDBACK[reason], self.MIN_XP
+
+    @staticmethod
+    def estimate(answer: str, duration_seconds: int) -> Tuple[str, int]:
+        """Rough local score used when the model cannot be reached in time.
+
+        Length, vocabulary spread and writing time earn up to 12 XP, so a fallback never
+        outscores a strong evaluated answer.
+        """
+
+        words = [word.casefold() for word in _TOKEN.findall(answer)]
+        if not words:
+            return PreScorer.FEEDBACK["empty"], PreScorer.MIN_XP
+        unique_ratio = len(set(words)) / len(words)
+        raw = 3 + min(len(words), 150) / 25 + min(max(duration_seconds, 0), 300) / 100
+        xp = round(raw * (0.5 + unique_ratio / 2))
+        return PreScorer.FALLBACK_FEEDBACK, max(PreScorer.MIN_XP, min(xp, 12))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "checked": self._checked,
+                "avoided": sum(self._avoided.values()),
+                "avoidedByReason": dict(self._avoided),
+            }
+
+    def _trivial_reason(self, answer: str, duration_seconds: int, previous_answers: Sequence[str]) -> Optional[str]:
+        text = " ".join(answer.split())
+        if not text:
+            return "empty"
+        words = [word.casefold() for word in _TOKEN.findall(text)]
+        if len(words) < self._min_words:
+            return "too_short"
+        # single characters repeat far more than words, so only spaced words count here
+        spaced = [word for word in words if not _CJK_CHAR.match(word)]
+        if len(spaced) >= 2 * self._min_words and len(set(spaced)) / len(spaced) < self._min_unique_ratio:
+            return "repetitive"
+        if sum(1 for word in words if self._wordlike(word)) / len(words) < self._min_wordlike_ratio:
+            return "gibberish"
+        if duration_seconds > 0 and len(text) / duration_seconds > self._max_chars_per_second:
+            return "pasted"
+        normalized = text.casefold()
+        for previous in previous_answers:
+            matcher = SequenceMatcher(None, normalized, " ".join(previous.split()).casefold(), autojunk=False)
+            # quick_ratio is an upper bound, so the exact ratio only runs for likely repeats
+            if matcher.quick_ratio() >= self._max_similarity and matcher.ratio() >= self._max_similarity:
+                return "repeated"
+        return None
+
+    @staticmethod
+    def _wordlike(word: str) -> bool:
+        if word.isdigit() or not word.isascii():
+            return True
+        return any(char in _VOWELS for char in word) and len(word) <= 24
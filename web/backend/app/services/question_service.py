@@ -1,5 +1,8 @@
+import hashlib
+import json
+import threading
 from datetime import date, datetime, timedelta
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from ..config import Settings
 from ..models.question import Question
@@ -10,6 +13,7 @@ class QuestionService:
     """Coordinates question selection and supporting metadata."""
 
     WEEK_TOTAL_DAYS = 7
+    ANONYMOUS_CACHE_DATES = 4
 
     def __init__(
         self,
@@ -23,40 +27,124 @@ class QuestionService:
         self._progress_repository = progress_repository
         self._answer_repository = answer_repository
         self._settings = settings
+        self._anonymous_cache: Dict[Tuple[str, date], Tuple[Dict[str, object], bytes]] = {}
+        self._anonymous_lock = threading.Lock()
+
+    def daily_etag(self, for_date: date, user_id: str | None) -> Optional[str]:
+        """Strong ETag for :meth:`daily_question`, computed without building the payload.
+
+        Anonymous payloads depend only on the question bank and date. Per-user payloads add
+        the user's answer version and progress row; ``None`` means the answer store cannot
+        report a version cheaply (Supabase) and the caller should hash the body instead.
+        """
+
+        parts: tuple = (
+            self._question_repository.version,
+            for_date.isoformat(),
+            self._settings.default_timer_seconds,
+        )
+        if user_id:
+            answers_version = self._answer_repository.user_version(user_id)
+            if answers_version is None:
+                return None
+            progress = self._progress_repository.fetch(user_id)
+            parts += (
+                user_id,
+                answers_version,
+                progress.get("xp_total"),
+                progress.get("streak"),
+                progress.get("last_answered_on"),
+            )
+        return f'"{hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()}"'
+
+    def shared_max_age(self, now: datetime) -> int:
+        """Seconds a shared cache may keep the anonymous payload: never past local midnight."""
+
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+        return max(0, min(self._settings.daily_question_max_age_seconds, int((midnight - now).total_seconds())))
 
     def daily_question(self, for_date: date, user_id: str | None) -> Dict[str, object]:
+        """Daily question payload; the anonymous one is shared and must be treated as read-only."""
+
+        anonymous, _ = self._anonymous_payload(for_date)
+        if not user_id:
+            return anonymous
+
         question: Question = self._repository.get_daily_question(for_date)
-        progress = {"xp_total": 0, "streak": 0}
-        if user_id:
-            stored = self._progress_repository.fetch(user_id)
-            progress = {
-                "xp_total": int(stored.get("xp_total", 0)),
-                "streak": int(stored.get("streak", 0)),
-            }
+        stored = self._progress_repository.fetch(user_id)
+        xp_total = int(stored.get("xp_total", 0))
+        streak = int(stored.get("streak", 0))
 
         previous_feedback: Dict[str, object] | None = None
-        if user_id:
-            previous_answer = self._answer_repository.latest_before(user_id, for_date)
-            if previous_answer and previous_answer.feedback:
-                previous_feedback = {
-                    "feedback": previous_answer.feedback,
-                    "submittedAt": previous_answer.created_at.isoformat(),
-                    "questionId": previous_answer.question_id,
-                }
+        snapshot = self._answer_repository.user_snapshot(user_id, for_date, question.week_index)
+        previous_answer = snapshot.previous
+        if previous_answer and previous_answer.feedback:
+            previous_feedback = {
+                "feedback": previous_answer.feedback,
+                "submittedAt": previous_answer.created_at.isoformat(),
+                "questionId": previous_answer.question_id,
+            }
+        completed: Set[str] = snapshot.answered_question_ids
+        week_progress = {
+            "completedDays": min(len(completed), self.WEEK_TOTAL_DAYS),
+            "totalDays": self.WEEK_TOTAL_DAYS,
+            "badgeEarned": len(completed) >= self.WEEK_TOTAL_DAYS,
+        }
 
+        # copy the shared payload and overlay only what depends on the user
+        response = dict(anonymous)
+        response["xpTotal"] = xp_total
+        response["streak"] = streak
+        response["weekProgress"] = week_progress
+        response["hasAnsweredToday"] = question.id in completed
+        response["previousFeedback"] = previous_feedback
+        response["priming"] = {
+            **anonymous["priming"],
+            "emotionalHook": self._emotional_hook(streak, previous_feedback),
+        }
+        response["dopamine"] = {
+            **anonymous["dopamine"],
+            "curiosityPrompts": self._curiosity_prompts(question, previous_feedback),
+            "challengeModes": self._challenge_modes(question, streak),
+            "rewardHighlights": self._reward_highlights(xp_total, streak, week_progress),
+        }
+        return response
+
+    def anonymous_daily_json(self, for_date: date) -> bytes:
+        """The anonymous payload for ``for_date`` serialized exactly as ``JSONResponse`` would."""
+
+        return self._anonymous_payload(for_date)[1]
+
+    def _anonymous_payload(self, for_date: date) -> Tuple[Dict[str, object], bytes]:
+        key = (self._question_repository.version, for_date)
+        with self._anonymous_lock:
+            cached = self._anonymous_cache.get(key)
+        if cached is not None:
+            return cached
+
+        question: Question = self._repository.get_daily_question(for_date)
         week_progress = {
             "completedDays": 0,
             "totalDays": self.WEEK_TOTAL_DAYS,
             "badgeEarned": False,
         }
-        has_answered_today = False
-        if user_id:
-            answers = self._answer_repository.answers_for_week(user_id, question.week_index)
-            completed: Set[str] = {stored.question_id for stored in answers}
-            week_progress["completedDays"] = min(len(completed), self.WEEK_TOTAL_DAYS)
-            week_progress["badgeEarned"] = len(completed) >= self.WEEK_TOTAL_DAYS
-            has_answered_today = question.id in completed
+        payload = self._build_payload(question, {"xp_total": 0, "streak": 0}, week_progress, None, False)
+        body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        with self._anonymous_lock:
+            if len(self._anonymous_cache) >= self.ANONYMOUS_CACHE_DATES:
+                # only today's (and around midnight, yesterday's) payload is ever requested
+                self._anonymous_cache.clear()
+            cached = self._anonymous_cache.setdefault(key, (payload, body))
+        return cached
 
+    def _build_payload(
+        self,
+        question: Question,
+        progress: Dict[str, int],
+        week_progress: Dict[str, int | bool],
+        previous_feedback: Dict[str, object] | None,
+        has_answered_today: bool,
+    ) -> Dict[str, object]:
         difficulty_meta = self._difficulty_meta(question.day_index)
 
         next_theme: str | None = None
@@ -128,16 +216,7 @@ class QuestionService:
         streak = int(progress.get("streak", 0))
         difficulty_label = str(difficulty.get("label", "primer")).lower()
         prompt_focus = question.prompt.strip()
-        emotional_hook = (
-            "Before unlocking the prompt, imagine how today's question might challenge your beliefs and notice the first feeling that surfaces."
-        )
-        if streak >= 3:
-            emotional_hook = (
-                f'You are on a {streak}-day streak. Let today\'s question brush past your thoughts and feel the first pulse of emotion—ride that wave into the session.'
-            )
-
-        if previous_feedback and previous_feedback.get("feedback"):
-            emotional_hook += " Bring yesterday's takeaway to mind so the feeling anchors to something concrete."
+        emotional_hook = self._emotional_hook(streak, previous_feedback)
 
         teaser_question = "What does that feeling want to ask before your rational mind edits it?"
 
@@ -168,21 +247,59 @@ class QuestionService:
     ) -> Dict[str, object]:
         streak = int(progress.get("streak", 0))
         xp_total = int(progress.get("xp_total", 0))
-        total_days = int(week_progress.get("totalDays", self.WEEK_TOTAL_DAYS))
-        completed_days = int(week_progress.get("completedDays", 0))
 
+        curiosity_prompts = self._curiosity_prompts(question, previous_feedback)
+
+        curiosity_hook = (
+            f"Prime your curiosity around {question.theme.lower()}. Look for the assumption you usually skip."
+        )
+
+        challenge_modes = self._challenge_modes(question, streak)
+
+        reward_highlights = self._reward_highlights(xp_total, streak, week_progress)
+
+        anticipate_teaser = (
+            "Tomorrow extends this thread - show up ready to test whether your reflection still holds."
+        )
+        next_prompt_time = question.available_on + timedelta(days=1)
+
+        return {
+            "curiosityHook": curiosity_hook,
+            "curiosityPrompts": curiosity_prompts,
+            "challengeModes": challenge_modes,
+            "rewardHighlights": reward_highlights,
+            "anticipationTeaser": anticipate_teaser,
+            "nextPromptAvailableAt": datetime.combine(next_prompt_time, datetime.min.time(), tzinfo=None).isoformat(),
+            "activeDifficulty": difficulty.get("label"),
+        }
+
+    @staticmethod
+    def _emotional_hook(streak: int, previous_feedback: Dict[str, object] | None) -> str:
+        emotional_hook = (
+            "Before unlocking the prompt, imagine how today's question might challenge your beliefs and notice the first feeling that surfaces."
+        )
+        if streak >= 3:
+            emotional_hook = (
+                f'You are on a {streak}-day streak. Let today\'s question brush past your thoughts and feel the first pulse of emotion—ride that wave into the session.'
+            )
+
+        if previous_feedback and previous_feedback.get("feedback"):
+            emotional_hook += " Bring yesterday's takeaway to mind so the feeling anchors to something concrete."
+        return emotional_hook
+
+    @staticmethod
+    def _curiosity_prompts(question: Question, previous_feedback: Dict[str, object] | None) -> List[str]:
         curiosity_prompts = [
             f"You are on day {question.day_index + 1} of this week's deep work arc.",
             f"Theme spotlight: {question.theme}. Notice the angle that surprises you.",
         ]
         if previous_feedback and previous_feedback.get("feedback"):
             curiosity_prompts.append("Carry yesterday's feedback forward: stay mindful of the insight you unlocked.")
+        return curiosity_prompts
 
-        curiosity_hook = (
-            f"Prime your curiosity around {question.theme.lower()}. Look for the assumption you usually skip."
-        )
-
-        challenge_modes = [
+    @staticmethod
+    def _challenge_modes(question: Question, streak: int) -> List[Dict[str, object]]:
+        return [
             {
                 "label": "Primer flow",
                 "description": "Open with gentle focus to warm up. Ideal when you are rebuilding momentum.",
@@ -203,6 +320,14 @@ class QuestionService:
             },
         ]
 
+    def _reward_highlights(
+        self,
+        xp_total: int,
+        streak: int,
+        week_progress: Dict[str, int | bool],
+    ) -> List[Dict[str, object]]:
+        total_days = int(week_progress.get("totalDays", self.WEEK_TOTAL_DAYS))
+        completed_days = int(week_progress.get("completedDays", 0))
         remaining_sessions = max(total_days - completed_days, 0)
         reward_highlights = [
             {
@@ -225,18 +350,4 @@ class QuestionService:
                 "earned": bool(week_progress.get("badgeEarned")),
             },
         ]
-
-        anticipate_teaser = (
-            "Tomorrow extends this thread - show up ready to test whether your reflection still holds."
-        )
-        next_prompt_time = question.available_on + timedelta(days=1)
-
-        return {
-            "curiosityHook": curiosity_hook,
-            "curiosityPrompts": curiosity_prompts,
-            "challengeModes": challenge_modes,
-            "rewardHighlights": reward_highlights,
-            "anticipationTeaser": anticipate_teaser,
-            "nextPromptAvailableAt": datetime.combine(next_prompt_time, datetime.min.time(), tzinfo=None).isoformat(),
-            "activeDifficulty": difficulty.get("label"),
-        }
+        return reward_highlights
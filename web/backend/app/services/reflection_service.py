@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from ..models.reflection import (
     ReflectionDaySummary,
@@ -12,11 +17,31 @@ from ..models.reflection import (
 from ..repositories import AnswerRepository, QuestionRepository, StoredAnswer, UserRepository
 
 
+@dataclass(slots=True)
+class _WeekView:
+    """Rendered entries of one user's local week, kept until their answers change."""
+
+    week_start: date
+    entries: Dict[date, ReflectionEntry]
+    teasers: List[ReflectionTeaser]
+    version: Optional[Tuple[int, int]]
+    built_at: float
+
+
 class ReflectionService:
-    """Builds reflection summaries backed by stored answers."""
+    """Builds reflection summaries backed by stored answers.
+
+    Each user's current week is materialized per timezone offset: the entries are rendered
+    once, patched by :meth:`record_answer` when the user submits, and otherwise reused until
+    the week rolls over. The answer store's :meth:`~AnswerRepository.user_version` catches
+    submissions handled by other workers; where it is unavailable (Supabase), views expire
+    after ``VIEW_TTL_SECONDS``.
+    """
 
     WEEK_DAYS = 7
-    MAX_RECENT_FETCH = 90
+    TEASER_COUNT = 2
+    MAX_CACHED_USERS = 4096
+    VIEW_TTL_SECONDS = 60.0
 
     def __init__(
         self,
@@ -27,56 +52,136 @@ class ReflectionService:
         self._answers = answer_repository
         self._questions = question_repository
         self._users = user_repository
+        self._lock = threading.Lock()
+        self._views: "OrderedDict[str, Dict[int, _WeekView]]" = OrderedDict()
 
     def overview(self, user_id: str, tz_offset_minutes: int = 0) -> ReflectionOverview:
         plan = self._users.get_plan(user_id)
         is_premium = plan == "premium"
         today = self._local_date(tz_offset_minutes)
-        recent_answers = self._answers.recent_answers(user_id, limit=self.MAX_RECENT_FETCH)
-        answers_by_date: Dict[date, StoredAnswer] = {}
-        for stored in recent_answers:
-            day = self._local_date_from_timestamp(stored.created_at, tz_offset_minutes)
-            if day not in answers_by_date:
-                answers_by_date[day] = stored
-
-        today_entry = answers_by_date.get(today)
-        weekly_blocks = self._weekly_summaries(today, answers_by_date, tz_offset_minutes, allow_history=is_premium)
-        teasers = []
-        if not is_premium:
-            week_start = today - timedelta(days=today.weekday())
-            older = [entry for entry in recent_answers if entry.created_at.date() < week_start]
-            teasers = [self._teaser_payload(entry) for entry in older[:2] if entry.answer.strip()]
+        view = self._week_view(user_id, tz_offset_minutes, today - timedelta(days=today.weekday()))
 
+        today_entry = view.entries.get(today)
+        weekly_blocks = self._weekly_summaries(today, view.entries, allow_history=is_premium)
         overview = ReflectionOverview(
             plan=plan,
-            today=self._entry_payload(today_entry) if today_entry else None,
+            today=today_entry,
             todayLocked=today_entry is None,
             week=weekly_blocks,
-            teasers=teasers,
+            teasers=[] if is_premium else list(view.teasers),
             timelineUnlocked=is_premium,
         )
         return overview
 
+    def overview_etag(self, user_id: str, tz_offset_minutes: int = 0) -> Optional[str]:
+        """Strong ETag for :meth:`overview`; ``None`` when the answer store has no cheap version."""
+
+        answers_version = self._answers.user_version(user_id)
+        if answers_version is None:
+            return None
+        parts = (
+            self._questions.version,
+            user_id,
+            self._users.get_plan(user_id),
+            self._local_date(tz_offset_minutes).isoformat(),
+            tz_offset_minutes,
+            answers_version,
+        )
+        return f'"{hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()}"'
+
+    def record_answer(self, stored: StoredAnswer) -> None:
+        """Patch the user's materialized weeks with a just-saved answer."""
+
+        if not stored.user_id:
+            return
+        version = self._answers.user_version(stored.user_id)
+        entry: Optional[ReflectionEntry] = None
+        with self._lock:
+            views = self._views.get(stored.user_id)
+            if not views:
+                return
+            for tz_offset_minutes, view in list(views.items()):
+                if view.version is not None and (version is None or version[0] != view.version[0] + 1):
+                    # someone else's write landed in between; rebuild on the next read instead
+                    del views[tz_offset_minutes]
+                    continue
+                day = self._local_date_from_timestamp(stored.created_at, tz_offset_minutes)
+                if view.week_start <= day < view.week_start + timedelta(days=self.WEEK_DAYS):
+                    entry = entry or self._entry_payload(stored)
+                    view.entries[day] = entry
+                view.version = version
+
+    def _week_view(self, user_id: str, tz_offset_minutes: int, week_start: date) -> _WeekView:
+        version = self._answers.user_version(user_id)
+        with self._lock:
+            view = self._views.get(user_id, {}).get(tz_offset_minutes)
+            if view is not None and self._is_current(view, week_start, version):
+                self._views.move_to_end(user_id)
+                return view
+
+        view = self._build_view(user_id, tz_offset_minutes, week_start, version)
+        with self._lock:
+            self._views.setdefault(user_id, {})[tz_offset_minutes] = view
+            self._views.move_to_end(user_id)
+            while len(self._views) > self.MAX_CACHED_USERS:
+                self._views.popitem(last=False)
+        return view
+
+    def _is_current(self, view: _WeekView, week_start: date, version: Optional[Tuple[int, int]]) -> bool:
+        if view.week_start != week_start:
+            return False
+        if version is None:
+            return time.monotonic() - view.built_at < self.VIEW_TTL_SECONDS
+        return view.version == version
+
+    def _build_view(
+        self,
+        user_id: str,
+        tz_offset_minutes: int,
+        week_start: date,
+        version: Optional[Tuple[int, int]],
+    ) -> _WeekView:
+        # only this week and the newest older answers (for free-plan teasers) are ever rendered
+        week_starts_at = datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc) + timedelta(
+            minutes=tz_offset_minutes
+        )
+        recent_answers = self._answers.recent_window(user_id, since=week_starts_at, older_limit=self.TEASER_COUNT)
+        entries: Dict[date, ReflectionEntry] = {}
+        for stored in recent_answers:
+            if stored.created_at < week_starts_at:
+                continue
+            day = self._local_date_from_timestamp(stored.created_at, tz_offset_minutes)
+            if day not in entries:
+                entries[day] = self._entry_payload(stored)
+        older = [stored for stored in recent_answers if stored.created_at < week_starts_at]
+        teasers = [self._teaser_payload(stored) for stored in older[: self.TEASER_COUNT] if stored.answer.strip()]
+        return _WeekView(
+            week_start=week_start,
+            entries=entries,
+            teasers=teasers,
+            version=version,
+            built_at=time.monotonic(),
+        )
+
     def _weekly_summaries(
         self,
         reference_day: date,
-        answers_by_date: Dict[date, StoredAnswer],
-        tz_offset_minutes: int,
+        entries: Dict[date, ReflectionEntry],
         allow_history: bool,
     ) -> List[ReflectionDaySummary]:
         start_of_week = reference_day - timedelta(days=reference_day.weekday())
         days = []
         for offset in range(self.WEEK_DAYS):
             current = start_of_week + timedelta(days=offset)
-            stored = answers_by_date.get(current)
-            entry_payload = self._entry_payload(stored) if stored else None
+            entry_payload = entries.get(current)
+            has_entry = entry_payload is not None
             if not allow_history and current != reference_day:
                 entry_payload = None
             days.append(
                 ReflectionDaySummary(
                     date=current,
                     weekday=current.strftime("%A"),
-                    hasEntry=stored is not None,
+                    hasEntry=has_entry,
                     entry=entry_payload,
                 )
             )
@@ -0,0 +1,186 @@
+"""Per-request CPU spent turning API payloads into response bytes, before and after the fast path.
+
+Run from ``web/backend`` with ``python -m benchmarks.serialization [--iterations N]``. Each case
+times the old path (``jsonable_encoder`` / ``model_dump`` + stdlib ``JSONResponse``) against the
+current one (``FastJSONResponse``, the precomputed anonymous body, ``model_dump_json``) on the
+same data and prints CPU microseconds per request. The last case compares validated response
+models with ``model_construct``, which is the slower of the two on pydantic 2's Rust core.
+Nothing touches the network or the configured data directory.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.responses import FastJSONResponse, orjson
+from app.config import Settings
+from app.models.reflection import ReflectionDaySummary, ReflectionEntry, ReflectionOverview, ReflectionTeaser
+from app.repositories import AnswerRepository, ProgressRepository, QuestionRepository
+from app.services import QuestionService
+
+ANSWER_CHARS = 4000
+
+
+def _cpu_micros(func: Callable[[], object], iterations: int) -> float:
+    func()  # warm caches outside the timed loop
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def _question_service(workdir: Path) -> QuestionService:
+    source = workdir / "questions.json"
+    weeks = [
+        {"theme": f"Week {week + 1}", "questions": [f"Week {week + 1}, day {day + 1}: why?" for day in range(7)]}
+        for week in range(4)
+    ]
+    source.write_text(json.dumps({"weeks": weeks}), encoding="utf-8")
+    settings = Settings(
+        OPENAI_API_KEY="benchmark",
+        QUESTION_SOURCE=source,
+        ANSWERS_STORE_PATH=workdir / "answers.jsonl",
+        PROGRESS_STORE_PATH=workdir / "progress.json",
+        USER_METADATA_PATH=workdir / "users.json",
+    )
+    return QuestionService(
+        QuestionRepository(source),
+        ProgressRepository(settings.progress_store_path),
+        AnswerRepository(settings.answers_store_path),
+        settings,
+    )
+
+
+def _overview_fields() -> dict:
+    monday = date(2024, 1, 1)
+    answered_at = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    answer = ("A long, considered reflection with ünïcode. " * (ANSWER_CHARS // 44))[:ANSWER_CHARS]
+    entries = [
+        {
+            "question_id": f"week-1-day-{day + 1}",
+            "prompt": f"Week 1, day {day + 1}: why?",
+            "theme": "Week 1",
+            "answered_at": answered_at + timedelta(days=day),
+            "xp_awarded": 12,
+            "duration_seconds": 180,
+            "excerpt": answer[:280],
+            "answer": answer,
+            "feedback": "Sharper than yesterday; name the assumption you are testing.",
+        }
+        for day in range(7)
+    ]
+    week = [
+        {
+            "date": monday + timedelta(days=day),
+            "weekday": (monday + timedelta(days=day)).strftime("%A"),
+            "has_entry": True,
+            "entry": entries[day],
+        }
+        for day in range(7)
+    ]
+    teasers = [
+        {
+            "question_id": entry["question_id"],
+            "prompt": entry["prompt"],
+            "answered_at": entry["answered_at"],
+            "snippet": answer[:140],
+        }
+        for entry in entries[:2]
+    ]
+    return {"plan": "premium", "today": entries[6], "week": week, "teasers": teasers}
+
+
+def _validated_overview(fields: dict) -> ReflectionOverview:
+    return ReflectionOverview(
+        plan=fields["plan"],
+        today=ReflectionEntry(**fields["today"]),
+        todayLocked=False,
+        week=[
+            ReflectionDaySummary(**{**day, "entry": ReflectionEntry(**day["entry"])}) for day in fields["week"]
+        ],
+        teasers=[ReflectionTeaser(**teaser) for teaser in fields["teasers"]],
+        timelineUnlocked=True,
+    )
+
+
+def _constructed_overview(fields: dict) -> ReflectionOverview:
+    return ReflectionOverview.model_construct(
+        plan=fields["plan"],
+        today=ReflectionEntry.model_construct(**fields["today"]),
+        today_locked=False,
+        week=[
+            ReflectionDaySummary.model_construct(**{**day, "entry": ReflectionEntry.model_construct(**day["entry"])})
+            for day in fields["week"]
+        ],
+        teasers=[ReflectionTeaser.model_construct(**teaser) for teaser in fields["teasers"]],
+        timeline_unlocked=True,
+    )
+
+
+def run(iterations: int) -> List[Tuple[str, float, float]]:
+    results: List[Tuple[str, float, float]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        service = _question_service(Path(tmp))
+        today = date(2024, 1, 3)
+        payload = service.daily_question(today, "benchmark-user")
+
+        results.append(
+            (
+                "daily question (user)",
+                _cpu_micros(lambda: JSONResponse(jsonable_encoder(payload)).body, iterations),
+                _cpu_micros(lambda: FastJSONResponse(payload).body, iterations),
+            )
+        )
+
+        def _anonymous_before() -> bytes:
+            # what every anonymous request used to do: rebuild the payload, encode, serialize
+            service._anonymous_cache.clear()
+            return JSONResponse(jsonable_encoder(service.daily_question(today, None))).body
+
+        results.append(
+            (
+                "daily question (anonymous)",
+                _cpu_micros(_anonymous_before, iterations),
+                _cpu_micros(lambda: service.anonymous_daily_json(today), iterations),
+            )
+        )
+
+    fields = _overview_fields()
+    overview = _validated_overview(fields)
+    results.append(
+        (
+            "reflection overview",
+            _cpu_micros(lambda: JSONResponse(overview.model_dump(mode="json", by_alias=True)).body, iterations),
+            _cpu_micros(lambda: overview.model_dump_json(by_alias=True).encode("utf-8"), iterations),
+        )
+    )
+    results.append(
+        (
+            "overview models (construct)",
+            _cpu_micros(lambda: _validated_overview(fields), iterations),
+            _cpu_micros(lambda: _constructed_overview(fields), iterations),
+        )
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"orjson: {'installed' if orjson is not None else 'missing (stdlib fallback)'}")
+    print(f"{'case':<28}{'before µs':>12}{'after µs':>12}{'saved µs':>12}{'speedup':>10}")
+    for name, before, after in run(args.iterations):
+        print(f"{name:<28}{before:>12.1f}{after:>12.1f}{before - after:>12.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
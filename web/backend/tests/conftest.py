@@ -8,10 +8,24 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from app.api.routes import router as api_router
-from app.api.deps import get_answer_service, get_question_service
+from app.api.deps import (
+    get_admission_controller,
+    get_answer_service,
+    get_evaluation_job_queue,
+    get_question_service,
+    get_reflection_service,
+)
 from app.config import Settings
 from app.repositories import AnswerRepository, ProgressRepository, QuestionRepository, UserRepository
-from app.services import AnswerService, EvaluationService, QuestionService, ReflectionService
+from app.services import (
+    AdmissionController,
+    AnswerService,
+    EvaluationJobQueue,
+    EvaluationService,
+    InProcessJobBackend,
+    QuestionService,
+    ReflectionService,
+)
 
 
 @pytest.fixture
@@ -79,7 +93,9 @@ class DummyCompletions:
     def __init__(self, handler: Callable[[str, str], str]) -> None:
         self._handler = handler
 
-    def create(self, *, messages, model, temperature) -> DummyCompletionResponse:  # type: ignore[override]
+    def create(  # type: ignore[override]
+        self, *, messages, model, temperature, max_tokens=None, response_format=None
+    ) -> DummyCompletionResponse:
         question_line = messages[1]["content"].split("\n")[0].replace("Question: ", "")
         answer_line = messages[1]["content"].split("\n")[1].replace("Answer: ", "")
         payload = self._handler(question_line, answer_line)
@@ -142,15 +158,34 @@ def reflection_service(
     return ReflectionService(answer_repository, question_repository, user_repository)
 
 
+@pytest.fixture
+def evaluation_job_queue(answer_service: AnswerService, tmp_path: Path) -> Generator[EvaluationJobQueue, None, None]:
+    backend = InProcessJobBackend(max_depth=4, journal_path=tmp_path / "evaluation_jobs.jsonl")
+    job_queue = EvaluationJobQueue(answer_service, backend, concurrency=2)
+    yield job_queue
+    job_queue.close()
+
+
+@pytest.fixture
+def admission_controller() -> AdmissionController:
+    return AdmissionController(max_concurrent=8, user_rate_per_minute=60, user_burst=5)
+
+
 @pytest.fixture
 def test_client(
     question_service: QuestionService,
     answer_service: AnswerService,
+    evaluation_job_queue: EvaluationJobQueue,
+    admission_controller: AdmissionController,
+    reflection_service: ReflectionService,
 ) -> Generator[TestClient, None, None]:
     app = FastAPI()
     app.include_router(api_router)
     app.dependency_overrides[get_question_service] = lambda: question_service
     app.dependency_overrides[get_answer_service] = lambda: answer_service
+    app.dependency_overrides[get_evaluation_job_queue] = lambda: evaluation_job_queue
+    app.dependency_overrides[get_admission_controller] = lambda: admission_controller
+    app.dependency_overrides[get_reflection_service] = lambda: reflection_service
 
     with TestClient(app) as client:
         yield client
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services import AdmissionController, CapacityExceededError, UserRateLimitedError
+
+
+def test_admission_caps_concurrency_and_counts_outcomes() -> None:
+    admission = AdmissionController(max_concurrent=1)
+    with admission.slot("a"):
+        with pytest.raises(CapacityExceededError):
+            with admission.slot("b"):
+                pass
+        assert admission.stats()["inFlight"] == 1
+    with admission.slot("b"):
+        pass
+
+    stats = admission.stats()
+    assert stats["admitted"] == 2
+    assert stats["rejectedGlobal"] == 1
+    assert stats["inFlight"] == 0
+
+
+def test_admission_limits_each_user_independently() -> None:
+    admission = AdmissionController(user_rate_per_minute=1, user_burst=2)
+    for _ in range(2):
+        with admission.slot("busy"):
+            pass
+    with pytest.raises(UserRateLimitedError) as excinfo:
+        with admission.slot("busy"):
+            pass
+    assert excinfo.value.retry_after > 0
+    with admission.slot("quiet"):
+        pass
+    assert admission.stats()["rejectedUser"] == 1
+
+
+def test_anonymous_callers_are_limited_per_client_address() -> None:
+    admission = AdmissionController(user_rate_per_minute=1, user_burst=1)
+    with admission.slot(None, client="10.0.0.1"):
+        pass
+    with pytest.raises(UserRateLimitedError):
+        with admission.slot(None, client="10.0.0.1"):
+            pass
+    # another anonymous submitter is unaffected, and without an address only global limits apply
+    with admission.slot(None, client="10.0.0.2"):
+        pass
+    for _ in range(3):
+        with admission.slot(None):
+            pass
+    assert admission.stats()["rejectedUser"] == 1
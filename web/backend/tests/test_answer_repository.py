@@ -0,0 +1,156 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from app.repositories import AnswerRepository, StoredAnswer
+
+
+def _answer(user_id: str, question_id: str, created_at: datetime, week_index: int | None = 0) -> StoredAnswer:
+    return StoredAnswer(
+        user_id=user_id,
+        question_id=question_id,
+        answer=f"Answer to {question_id}",
+        feedback=f"Feedback for {question_id}",
+        xp_awarded=10,
+        xp_total=10,
+        streak=1,
+        created_at=created_at,
+        duration_seconds=60,
+        week_index=week_index,
+    )
+
+
+def test_index_tracks_appends_per_user(answer_repository: AnswerRepository) -> None:
+    start = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    answer_repository.save_answer(_answer("alice", "week-1-day-1", start))
+    answer_repository.save_answer(_answer("bob", "week-1-day-1", start))
+    answer_repository.save_answer(_answer("alice", "week-1-day-2", start + timedelta(days=1)))
+    answer_repository.save_answer(_answer("alice", "week-2-day-1", start + timedelta(days=7), week_index=None))
+
+    assert [a.question_id for a in answer_repository.answers_for_week("alice", 0)] == [
+        "week-1-day-1",
+        "week-1-day-2",
+    ]
+    # legacy rows without week_index fall back to the question id
+    assert [a.question_id for a in answer_repository.answers_for_week("alice", 1)] == ["week-2-day-1"]
+    assert [a.question_id for a in answer_repository.recent_answers("alice", limit=2)] == [
+        "week-2-day-1",
+        "week-1-day-2",
+    ]
+    previous = answer_repository.latest_before("alice", date(2024, 1, 8))
+    assert previous is not None and previous.question_id == "week-1-day-2"
+    assert answer_repository.latest_before("bob", date(2024, 1, 1)) is None
+
+
+def test_recent_window_returns_window_plus_newest_older(answer_repository: AnswerRepository) -> None:
+    start = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    for day in range(10):
+        answer_repository.save_answer(_answer("alice", f"week-1-day-{day}", start + timedelta(days=day)))
+    # an imported row appended out of order must still be found
+    answer_repository.save_answer(_answer("carol", "week-1-day-5", start + timedelta(days=5)))
+    answer_repository.save_answer(_answer("carol", "week-1-day-9", start + timedelta(days=9)))
+    answer_repository.save_answer(_answer("carol", "week-1-day-1", start + timedelta(days=1)))
+
+    since = start + timedelta(days=8)
+    assert [a.question_id for a in answer_repository.recent_window("alice", since, older_limit=2)] == [
+        "week-1-day-9",
+        "week-1-day-8",
+        "week-1-day-7",
+        "week-1-day-6",
+    ]
+    assert [a.question_id for a in answer_repository.recent_window("alice", since)] == ["week-1-day-9", "week-1-day-8"]
+    assert [a.question_id for a in answer_repository.recent_window("carol", since, older_limit=1)] == [
+        "week-1-day-9",
+        "week-1-day-5",
+    ]
+
+
+def test_index_is_persisted_and_reused(tmp_path: Path) -> None:
+    store = tmp_path / "answers.jsonl"
+    first = AnswerRepository(store)
+    first.save_answer(_answer("alice", "week-1-day-1", datetime(2024, 1, 1, tzinfo=timezone.utc)))
+
+    index_path = tmp_path / "answers.jsonl.idx"
+    lines = [json.loads(line) for line in index_path.read_text(encoding="utf-8").splitlines()]
+    assert [(line["user_id"], line["offset"]) for line in lines] == [("alice", 0)]
+
+    # another writer appends directly to the store; the index catches up from its tail
+    with store.open("a", encoding="utf-8") as handle:
+        handle.write(
+            json.dumps(
+                {
+                    "user_id": "alice",
+                    "question_id": "week-1-day-2",
+                    "answer": "External",
+                    "feedback": "",
+                    "xp_awarded": 5,
+                    "xp_total": 15,
+                    "streak": 2,
+                    "created_at": "2024-01-02T00:00:00+00:00",
+                    "duration_seconds": 30,
+                    "week_index": 0,
+                }
+            )
+            + "\n"
+        )
+
+    second = AnswerRepository(store)
+    assert [a.answer for a in second.recent_answers("alice")] == ["External", "Answer to week-1-day-1"]
+    assert len(index_path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_stale_index_is_rebuilt(tmp_path: Path) -> None:
+    store = tmp_path / "answers.jsonl"
+    repo = AnswerRepository(store)
+    repo.save_answer(_answer("alice", "week-1-day-1", datetime(2024, 1, 1, tzinfo=timezone.utc)))
+    repo.save_answer(_answer("alice", "week-1-day-2", datetime(2024, 1, 2, tzinfo=timezone.utc)))
+
+    # replace the store behind the index's back
+    store.write_text("", encoding="utf-8")
+    replacement = AnswerRepository(store)
+    replacement.save_answer(_answer("carol", "week-1-day-3", datetime(2024, 1, 3, tzinfo=timezone.utc)))
+
+    assert replacement.recent_answers("alice") == []
+    assert [a.question_id for a in replacement.recent_answers("carol")] == ["week-1-day-3"]
+
+
+def test_user_snapshot_combines_previous_and_week(answer_repository: AnswerRepository) -> None:
+    start = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    answer_repository.save_answer(_answer("dana", "week-1-day-1", start))
+    answer_repository.save_answer(_answer("dana", "week-1-day-2", start + timedelta(days=1)))
+    answer_repository.save_answer(_answer("dana", "week-1-day-3", start + timedelta(days=2)))
+
+    snapshot = answer_repository.user_snapshot("dana", date(2024, 1, 3), week_index=0)
+
+    assert snapshot.previous is not None
+    assert snapshot.previous.question_id == "week-1-day-2"
+    assert snapshot.answered_question_ids == {"week-1-day-1", "week-1-day-2", "week-1-day-3"}
+    empty = answer_repository.user_snapshot("nobody", date(2024, 1, 3), week_index=0)
+    assert empty.previous is None and empty.answered_question_ids == set()
+
+
+class RecordingSupabase:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.selects: list[dict] = []
+
+    def select(self, table: str, filters=None, **kwargs) -> list[dict]:
+        self.selects.append({"table": table, "filters": filters, **kwargs})
+        return self.rows
+
+
+def test_user_snapshot_uses_single_supabase_query(tmp_path: Path) -> None:
+    rows = [
+        {"user_id": "eve", "question_id": "week-1-day-3", "created_at": "2024-01-03T08:00:00+00:00", "week_index": 0},
+        {"user_id": "eve", "question_id": "week-1-day-2", "created_at": "2024-01-02T08:00:00+00:00", "week_index": 0, "feedback": "Prior"},
+        {"user_id": "eve", "question_id": "week-9-day-1", "created_at": "2023-03-01T08:00:00+00:00", "week_index": 8},
+    ]
+    supabase = RecordingSupabase(rows)
+    repo = AnswerRepository(tmp_path / "answers.jsonl", supabase_client=supabase, supabase_table="answers")  # type: ignore[arg-type]
+
+    snapshot = repo.user_snapshot("eve", date(2024, 1, 3), week_index=0)
+
+    assert len(supabase.selects) == 1
+    assert supabase.selects[0]["any_of"][0] == ("week_index", "eq", 0)
+    assert snapshot.previous is not None and snapshot.previous.feedback == "Prior"
+    assert snapshot.answered_question_ids == {"week-1-day-2", "week-1-day-3"}
@@ -1,5 +1,13 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
 from app.models.answer import AnswerResult
+from app.repositories import AnswerRepository, IdempotencyStore, ProgressRepository, QuestionRepository
 from app.services import AnswerService
+from app.services.answer_service import DuplicateAnswerError, IdempotencyKeyReusedError
 
 
 def test_answer_submission_persists(answer_service: AnswerService) -> None:
@@ -64,3 +72,135 @@ def test_week_completion_triggers_bonus(answer_service: AnswerService) -> None:
     assert final.week_badge_earned is True
     assert final.bonus_xp == answer_service.WEEK_COMPLETION_BONUS_XP
     assert final.week_completed_days == 7
+
+
+def test_async_submission_matches_sync_path(answer_service: AnswerService) -> None:
+    result = asyncio.run(
+        answer_service.submit_answer_async(
+            question_id="week-1-day-1",
+            answer="Async reflection",
+            user_id="async-user",
+            duration_seconds=90,
+        )
+    )
+
+    assert result.xp_total == 12
+    assert result.week_completed_days == 1
+    with pytest.raises(DuplicateAnswerError):
+        asyncio.run(
+            answer_service.submit_answer_async(
+                question_id="week-1-day-1",
+                answer="Again",
+                user_id="async-user",
+                duration_seconds=90,
+            )
+        )
+
+
+class CountingEvaluation:
+    prescorer = None
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def evaluate(self, question: str, answer: str, duration_seconds: int, previous_answers=()) -> tuple[str, int]:
+        self.calls += 1
+        return f"Tight {question}", 12
+
+
+def test_duplicate_rejected_before_evaluation(
+    question_repository: QuestionRepository,
+    answer_repository: AnswerRepository,
+    progress_repository: ProgressRepository,
+) -> None:
+    evaluation = CountingEvaluation()
+    service = AnswerService(question_repository, evaluation, answer_repository, progress_repository)  # type: ignore[arg-type]
+    service.submit_answer("week-1-day-1", "First", "dup-user", 60)
+
+    with pytest.raises(DuplicateAnswerError):
+        service.submit_answer("week-1-day-1", "Second", "dup-user", 60)
+    assert evaluation.calls == 1
+
+
+def test_idempotency_key_replays_stored_result(
+    question_repository: QuestionRepository,
+    answer_repository: AnswerRepository,
+    progress_repository: ProgressRepository,
+) -> None:
+    evaluation = CountingEvaluation()
+    service = AnswerService(question_repository, evaluation, answer_repository, progress_repository)  # type: ignore[arg-type]
+    first = service.submit_answer("week-1-day-1", "First", "retry-user", 60, idempotency_key="abc")
+    retried = service.submit_answer("week-1-day-1", "First", "retry-user", 60, idempotency_key="abc")
+
+    assert retried == first
+    assert evaluation.calls == 1
+    with pytest.raises(IdempotencyKeyReusedError):
+        service.submit_answer("week-1-day-1", "Edited", "retry-user", 60, idempotency_key="abc")
+    assert evaluation.calls == 1
+
+
+def test_idempotent_result_survives_a_restart(
+    question_repository: QuestionRepository,
+    answer_repository: AnswerRepository,
+    progress_repository: ProgressRepository,
+    tmp_path: Path,
+) -> None:
+    store_path = tmp_path / "idempotency.jsonl"
+    evaluation = CountingEvaluation()
+    first_worker = AnswerService(  # type: ignore[arg-type]
+        question_repository, evaluation, answer_repository, progress_repository, IdempotencyStore(store_path)
+    )
+    first = first_worker.submit_answer("week-1-day-1", "First", "restart-user", 60, idempotency_key="abc")
+
+    # a fresh process (another worker, or this one after a restart) sharing the same store
+    second_worker = AnswerService(  # type: ignore[arg-type]
+        question_repository, evaluation, answer_repository, progress_repository, IdempotencyStore(store_path)
+    )
+    retried = second_worker.submit_answer("week-1-day-1", "First", "restart-user", 60, idempotency_key="abc")
+
+    assert retried == first
+    assert evaluation.calls == 1
+    with pytest.raises(IdempotencyKeyReusedError):
+        second_worker.submit_answer("week-1-day-1", "Edited", "restart-user", 60, idempotency_key="abc")
+
+
+class BlockingEvaluation(CountingEvaluation):
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def evaluate(self, question: str, answer: str, duration_seconds: int, previous_answers=()) -> tuple[str, int]:
+        self.started.set()
+        self.release.wait(5)
+        return super().evaluate(question, answer, duration_seconds, previous_answers)
+
+
+def test_retry_during_first_attempt_waits_for_its_result(
+    question_repository: QuestionRepository,
+    answer_repository: AnswerRepository,
+    progress_repository: ProgressRepository,
+) -> None:
+    evaluation = BlockingEvaluation()
+    service = AnswerService(question_repository, evaluation, answer_repository, progress_repository)  # type: ignore[arg-type]
+    results = {}
+
+    def submit(name: str) -> None:
+        results[name] = service.submit_answer("week-1-day-1", "First", "waiting-user", 60, idempotency_key="abc")
+
+    first = threading.Thread(target=submit, args=("first",))
+    first.start()
+    assert evaluation.started.wait(5)
+    retry = threading.Thread(target=submit, args=("retry",))
+    retry.start()
+    retry.join(0.2)
+    assert retry.is_alive()  # waiting, not rejected as in progress
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        service.submit_answer("week-1-day-1", "Edited", "waiting-user", 60, idempotency_key="abc")
+    evaluation.release.set()
+    first.join(5)
+    retry.join(5)
+
+    assert results["retry"] == results["first"]
+    assert evaluation.calls == 1
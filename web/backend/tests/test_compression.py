@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.compression import CompressionMiddleware, negotiate_encoding
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+
+    @app.get("/large")
+    async def large() -> JSONResponse:
+        return JSONResponse({"answer": "reflection " * 200}, headers={"ETag": '"abc"', "Vary": "X-User-Id"})
+
+    @app.get("/small")
+    async def small() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def events():
+            yield "data: " + "x" * 1024 + "\n\n"
+            yield "data: done\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped_with_weak_etag() -> None:
+    client = _client()
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["vary"] == "X-User-Id, Accept-Encoding"
+    assert int(response.headers["content-length"]) < len("reflection " * 200)
+    assert response.json()["answer"].startswith("reflection")
+
+
+def test_small_streamed_and_unaccepted_responses_pass_through() -> None:
+    client = _client()
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] == '"abc"'
+
+
+def test_negotiate_encoding_honours_quality_values() -> None:
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") in {"br", "gzip"}
+    assert negotiate_encoding("identity") is None
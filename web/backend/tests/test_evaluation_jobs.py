@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import time
+
+import pytest
+
+from app.services import AnswerService, EvaluationJobQueue, InProcessJobBackend, QueueFullError
+from app.services.answer_service import DuplicateAnswerError, IdempotencyKeyReusedError, SubmissionInProgressError
+from app.services.evaluation_jobs import EvaluationJob
+
+
+def _wait_for(job_queue: EvaluationJobQueue, job_id: str) -> EvaluationJob:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job is not None and job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_queue_evaluates_in_background(evaluation_job_queue: EvaluationJobQueue) -> None:
+    job = evaluation_job_queue.enqueue("week-1-day-1", "Deferred answer", "job-user", 90, idempotency_key="k")
+    assert evaluation_job_queue.enqueue("week-1-day-1", "Deferred answer", "job-user", 90, idempotency_key="k") is job
+    with pytest.raises(IdempotencyKeyReusedError):
+        evaluation_job_queue.enqueue("week-1-day-1", "Edited answer", "job-user", 90, idempotency_key="k")
+
+    finished = _wait_for(evaluation_job_queue, job.job_id)
+    assert finished.status == "completed"
+    assert finished.result is not None and finished.result.xp_awarded == 12
+    assert evaluation_job_queue.stats()["completed"] == 1
+
+    with pytest.raises(DuplicateAnswerError):
+        evaluation_job_queue.enqueue("week-1-day-1", "Again", "job-user", 90)
+
+
+def test_job_backend_bounds_depth_and_replays_journal(answer_service: AnswerService, tmp_path) -> None:
+    journal = tmp_path / "jobs.jsonl"
+    backend = InProcessJobBackend(max_depth=1, journal_path=journal)
+    job_queue = EvaluationJobQueue(answer_service, backend)
+    # no workers have started yet, so the first job still occupies the only slot
+    first = EvaluationJob(job_id="a", question_id="week-1-day-1", answer="A", user_id="u", duration_seconds=30)
+    backend.put(first)
+    with pytest.raises(QueueFullError):
+        backend.put(EvaluationJob(job_id="b", question_id="week-1-day-2", answer="B", user_id="u", duration_seconds=30))
+
+    restarted = EvaluationJobQueue(answer_service, InProcessJobBackend(max_depth=1, journal_path=journal))
+    try:
+        with pytest.raises(SubmissionInProgressError):
+            restarted.enqueue("week-1-day-1", "A again", "u", 30)
+        assert _wait_for(restarted, "a").status == "completed"
+        assert journal.with_name(f"jobs.jsonl.{os.getpid()}").read_text(encoding="utf-8") == ""
+    finally:
+        restarted.close()
+        job_queue.close()
+
+
+def test_job_fails_cleanly_when_submission_raises_unexpectedly(
+    answer_service: AnswerService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken_store(**_: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(answer_service, "submit_answer", broken_store)
+    job_queue = EvaluationJobQueue(answer_service, InProcessJobBackend(), concurrency=1)
+    try:
+        job = job_queue.enqueue("week-1-day-1", "Deferred answer", "io-user", 90)
+        assert _wait_for(job_queue, job.job_id).status == "failed"
+        assert job_queue.stats()["running"] == 0
+
+        # the question is released and the same worker picks up the retry
+        monkeypatch.undo()
+        retry = job_queue.enqueue("week-1-day-1", "Deferred answer", "io-user", 90)
+        assert _wait_for(job_queue, retry.job_id).status == "completed"
+    finally:
+        job_queue.close()
+
+
+def test_job_backend_appends_acks_and_compacts_periodically(tmp_path) -> None:
+    journal = tmp_path / "jobs.jsonl"
+    backend = InProcessJobBackend(journal_path=journal, compact_threshold=3)
+    own_journal = journal.with_name(f"jobs.jsonl.{os.getpid()}")
+    for index in range(5):
+        backend.put(
+            EvaluationJob(job_id=f"j{index}", question_id="week-1-day-1", answer="A", user_id="u", duration_seconds=30)
+        )
+
+    backend.done("j0")
+    backend.done("j1")
+    lines = [json.loads(line) for line in own_journal.read_text(encoding="utf-8").splitlines()]
+    # acknowledged jobs stay in the journal, followed by an ack line each
+    assert len(lines) == 7
+    assert lines[-2:] == [{"ack": "j0"}, {"ack": "j1"}]
+    restarted = InProcessJobBackend(journal_path=journal)
+    assert [job.job_id for job in restarted.pending()] == ["j2", "j3", "j4"]
+
+    backend.done("j2")
+    remaining = [json.loads(line)["job_id"] for line in own_journal.read_text(encoding="utf-8").splitlines()]
+    assert remaining == ["j3", "j4"]
+
+
+def test_reused_idempotency_key_fails_the_job_without_an_unexpected_error(
+    answer_service: AnswerService, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    def reused(**_: object) -> None:
+        raise IdempotencyKeyReusedError("k")
+
+    monkeypatch.setattr(answer_service, "submit_answer", reused)
+    job_queue = EvaluationJobQueue(answer_service, InProcessJobBackend(), concurrency=1)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.services.evaluation_jobs"):
+            job = job_queue.enqueue("week-1-day-1", "Deferred answer", "key-user", 90, idempotency_key="k")
+            finished = _wait_for(job_queue, job.job_id)
+        assert finished.status == "failed"
+        assert finished.error == str(IdempotencyKeyReusedError("k"))
+        assert not caplog.records
+    finally:
+        job_queue.close()
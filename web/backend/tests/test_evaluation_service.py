@@ -1,8 +1,13 @@
+import asyncio
 import json
+import time
 
 import pytest
 
-from app.services.evaluation_service import EvaluationService
+from app.services.evaluation_cache import EvaluationCache
+from app.services.evaluation_service import EvaluationPolicy, EvaluationService
+from app.services.model_routing import ModelRouter
+from app.services.prescoring import PreScorer
 
 
 class EchoClient:
@@ -60,3 +65,222 @@ def test_evaluation_service_raises_on_invalid_json() -> None:
     service = EvaluationService(EchoClient("not-json"), "fake-model")
     with pytest.raises(RuntimeError):
         service.evaluate("Q", "A", 10)
+
+
+class AsyncEchoClient:
+    def __init__(self, payload: str) -> None:
+        self.calls = 0
+        self.chat = type("Chat", (), {"completions": self})()
+        self._sync = EchoClient(payload)
+
+    async def create(self, *_, **__) -> object:
+        self.calls += 1
+        return self._sync.chat.completions.create()
+
+
+def test_evaluation_service_async_client() -> None:
+    payload = json.dumps({"feedback": "Async insight", "xp": 9})
+    async_client = AsyncEchoClient(payload)
+    service = EvaluationService(EchoClient("not-json"), "fake-model", async_client=async_client)
+    feedback, xp = asyncio.run(service.aevaluate("Q", "A", 60))
+    assert (feedback, xp) == ("Async insight", 9)
+    assert async_client.calls == 1
+
+
+def test_evaluation_service_async_falls_back_to_thread() -> None:
+    payload = json.dumps({"feedback": "Threaded", "xp": 4})
+    service = EvaluationService(EchoClient(payload), "fake-model")
+    assert asyncio.run(service.aevaluate("Q", "A", 60)) == ("Threaded", 4)
+
+
+class CountingClient(EchoClient):
+    def __init__(self, payload: str) -> None:
+        super().__init__(payload)
+        self.calls = 0
+        original = self.chat.completions.create
+
+        def create(*args, **kwargs):
+            self.calls += 1
+            return original(*args, **kwargs)
+
+        self.chat.completions.create = create  # type: ignore[method-assign]
+
+
+def test_evaluation_cache_skips_repeat_answers(tmp_path) -> None:
+    client = CountingClient(json.dumps({"feedback": "Cached", "xp": 7}))
+    cache = EvaluationCache(max_entries=8, disk_path=tmp_path / "eval-cache.jsonl")
+    service = EvaluationService(client, "fake-model", cache=cache)
+
+    assert service.evaluate("Q", "Same  answer", 30) == ("Cached", 7)
+    assert service.evaluate("Q", "  same answer\n", 90) == ("Cached", 7)
+    assert client.calls == 1
+    assert cache.stats()["hitRate"] == 0.5
+
+    # the disk tier survives a restart; a different model is a different key
+    restarted = EvaluationCache(max_entries=8, disk_path=tmp_path / "eval-cache.jsonl")
+    assert restarted.get(EvaluationCache.key("fake-model", "Q", "same answer")) == ("Cached", 7)
+    assert restarted.get(EvaluationCache.key("other-model", "Q", "same answer")) is None
+
+
+def test_evaluation_cache_expires_and_evicts() -> None:
+    cache = EvaluationCache(max_entries=2, ttl_seconds=-1)
+    cache.put("a", "A", 1)
+    assert cache.get("a") is None
+    lru = EvaluationCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        lru.put(key, key.upper(), 1)
+    assert lru.get("a") is None and lru.get("c") == ("C", 1)
+
+
+class StreamingClient:
+    def __init__(self, pieces) -> None:
+        self.chat = type("Chat", (), {"completions": self})()
+        self._pieces = pieces
+
+    async def create(self, *_, stream: bool = False, stream_options=None, **__):
+        async def chunks():
+            for piece in self._pieces:
+                delta = type("Delta", (), {"content": piece})()
+                yield type("Chunk", (), {"choices": [type("Choice", (), {"delta": delta})()], "usage": None})()
+            if stream_options and stream_options.get("include_usage"):
+                usage = type("Usage", (), {"prompt_tokens": 80, "completion_tokens": 25})()
+                yield type("Chunk", (), {"choices": [], "usage": usage})()
+
+        return chunks()
+
+
+def test_evaluation_service_streams_feedback_deltas() -> None:
+    text = json.dumps({"feedback": "Sharp \"framing\" — Improve: cite one example 🎯", "xp": 11})
+    pieces = [text[i : i + 5] for i in range(0, len(text), 5)]
+    service = EvaluationService(EchoClient("not-json"), "fake-model", async_client=StreamingClient(pieces))
+
+    async def collect():
+        return [item async for item in service.astream("Q", "A", 60)]
+
+    items = asyncio.run(collect())
+    deltas, final = items[:-1], items[-1]
+    assert len(deltas) > 1
+    assert "".join(deltas) == json.loads(text)["feedback"]
+    assert final == (json.loads(text)["feedback"], 11)
+    stats = service.router.stats()["fake-model"]
+    assert (stats["promptTokens"], stats["completionTokens"]) == (80, 25)
+
+
+class RecordingClient(EchoClient):
+    def __init__(self, payload: str) -> None:
+        super().__init__(payload)
+        self.requests = []
+        original = self.chat.completions.create
+
+        def create(**kwargs):
+            self.requests.append(kwargs)
+            response = original()
+            response.usage = type("Usage", (), {"prompt_tokens": 90, "completion_tokens": 30})()
+            return response
+
+        self.chat.completions.create = create  # type: ignore[method-assign]
+
+
+def test_evaluation_service_routes_models_and_records_usage() -> None:
+    client = RecordingClient(json.dumps({"feedback": "Routed", "xp": 8}))
+    router = ModelRouter("default-model", fast_model="fast-model", strong_model="strong-model", short_answer_words=3)
+    service = EvaluationService(client, "default-model", router=router, max_tokens=120)
+
+    service.evaluate("Q", "too brief", 20)
+    service.evaluate("Q", "a considered answer with several more words", 20)
+    service.evaluate("Q", "a considered answer with several more words", 600)
+
+    assert [request["model"] for request in client.requests] == ["fast-model", "default-model", "strong-model"]
+    assert client.requests[0]["max_tokens"] == 120
+    assert client.requests[0]["response_format"] == {"type": "json_object"}
+    stats = router.stats()
+    assert stats["fast-model"]["calls"] == 1
+    assert stats["strong-model"]["completionTokens"] == 30
+
+
+def test_evaluation_service_salvages_truncated_json() -> None:
+    truncated = '{"xp": 14, "feedback": "Clear argument. Improve: add a counterexam'
+    assert EvaluationService(EchoClient(truncated), "fake-model").evaluate("Q", "A", 10) == (
+        "Clear argument. Improve: add a counterexam",
+        14,
+    )
+    with pytest.raises(RuntimeError):
+        EvaluationService(EchoClient('{"feedback": "No score'), "fake-model").evaluate("Q", "A", 10)
+
+
+class FlakyClient:
+    """Fails every request for the models in ``failing``; echoes ``payload`` otherwise."""
+
+    def __init__(self, payload: str, failing: set) -> None:
+        self.chat = type("Chat", (), {"completions": self})()
+        self.models = []
+        self._payload = payload
+        self._failing = failing
+
+    def create(self, *, model, **__):
+        self.models.append(model)
+        if model in self._failing:
+            raise TimeoutError("upstream timed out")
+        return EchoClient(self._payload).chat.completions.create()
+
+
+def test_evaluation_service_retries_then_falls_back() -> None:
+    payload = json.dumps({"feedback": "From backup", "xp": 6})
+    policy = EvaluationPolicy(max_attempts=2, backoff_base=0.0, fallback_model="backup-model")
+    client = FlakyClient(payload, failing={"fake-model"})
+    service = EvaluationService(client, "fake-model", policy=policy)  # type: ignore[arg-type]
+
+    assert service.evaluate("Q", "A", 30) == ("From backup", 6)
+    assert client.models == ["fake-model", "fake-model", "backup-model"]
+    assert service.stats()["retries"] == 1 and service.stats()["fallbackModel"] == 1
+
+    local = EvaluationService(
+        FlakyClient(payload, failing={"fake-model", "backup-model"}),  # type: ignore[arg-type]
+        "fake-model",
+        policy=EvaluationPolicy(fallback_model="backup-model", local_fallback=True),
+    )
+    feedback, xp = local.evaluate("Q", "A thoughtful answer with some reasoning", 120)
+    assert feedback == PreScorer.FALLBACK_FEEDBACK and 1 <= xp <= 12
+    assert local.stats()["fallbackLocal"] == 1
+
+
+class SlowThenFastClient:
+    def __init__(self, payload: str, delay: float, slow_calls: int = 1) -> None:
+        self.chat = type("Chat", (), {"completions": self})()
+        self.calls = 0
+        self._payload = payload
+        self._delay = delay
+        self._slow_calls = slow_calls
+
+    async def create(self, *_, **__):
+        self.calls += 1
+        if self.calls <= self._slow_calls:
+            await asyncio.sleep(self._delay)
+        return EchoClient(self._payload).chat.completions.create()
+
+
+def test_evaluation_service_hedges_slow_requests() -> None:
+    payload = json.dumps({"feedback": "Hedged", "xp": 10})
+    router = ModelRouter("fake-model")
+    for _ in range(5):
+        router.record("fake-model", 0.01)
+    policy = EvaluationPolicy(hedge=True, hedge_min_samples=5)
+    async_client = SlowThenFastClient(payload, delay=5)
+    service = EvaluationService(EchoClient("not-json"), "fake-model", async_client=async_client, router=router, policy=policy)
+
+    started = time.perf_counter()
+    assert asyncio.run(service.aevaluate("Q", "A", 60)) == ("Hedged", 10)
+    assert time.perf_counter() - started < 1
+    assert async_client.calls == 2
+    assert service.stats()["hedgeWins"] == 1
+
+
+def test_evaluation_service_deadline_caps_tail_latency() -> None:
+    policy = EvaluationPolicy(attempt_timeout=0.05, deadline_seconds=0.2, max_attempts=3, local_fallback=True)
+    async_client = SlowThenFastClient(json.dumps({"feedback": "Late", "xp": 10}), delay=5, slow_calls=10)
+    service = EvaluationService(EchoClient("not-json"), "fake-model", async_client=async_client, policy=policy)
+
+    started = time.perf_counter()
+    feedback, _ = asyncio.run(service.aevaluate("Q", "A", 60))
+    assert time.perf_counter() - started < 1
+    assert feedback == PreScorer.FALLBACK_FEEDBACK
@@ -0,0 +1,63 @@
+import pytest
+
+from app.services import EvaluationService, PreScorer
+
+
+class FailingClient:
+    def __init__(self) -> None:
+        self.chat = type("Chat", (), {"completions": self})()
+
+    def create(self, *_, **__):
+        raise AssertionError("trivial answers must not reach the model")
+
+
+@pytest.mark.parametrize(
+    ("answer", "duration", "previous", "expected"),
+    [
+        ("   ", 30, (), "empty"),
+        ("idk", 30, (), "too_short"),
+        ("好", 30, (), "too_short"),
+        ("yes yes yes yes yes yes yes yes", 30, (), "repetitive"),
+        ("qwrtp zxcvb mnbvc hjkl", 30, (), "gibberish"),
+        (
+            "Good decisions start with framing the problem, listing assumptions, weighing the evidence "
+            "for each option and then checking which outcome you could live with if you were wrong.",
+            2,
+            (),
+            "pasted",
+        ),
+        (
+            "Curiosity matters because it keeps me asking better questions.",
+            60,
+            ("curiosity matters because it keeps me asking better questions!",),
+            "repeated",
+        ),
+    ],
+)
+def test_prescorer_flags_trivial_answers(answer, duration, previous, expected) -> None:
+    prescorer = PreScorer()
+    feedback, xp = prescorer.score(answer, duration, previous)
+    assert xp == 1
+    assert feedback == PreScorer.FEEDBACK[expected]
+    assert prescorer.stats()["avoidedByReason"][expected] == 1
+
+
+def test_prescorer_passes_real_answers_to_the_model() -> None:
+    prescorer = PreScorer()
+    answer = "I would test the assumption with a small experiment before committing to it."
+    assert prescorer.score(answer, 90, ("Something entirely different from before.",)) is None
+    assert prescorer.stats() == {"checked": 1, "avoided": 0, "avoidedByReason": dict.fromkeys(PreScorer.FEEDBACK, 0)}
+
+
+def test_prescorer_counts_unspaced_cjk_characters_as_words() -> None:
+    prescorer = PreScorer()
+    chinese = "我认为好奇心很重要，因为它让我不断提出更好的问题，也让我在失败后愿意再试一次。"
+    japanese = "日本語の文章はスペースなしで書かれます。だから単語の数え方が違う。"
+    assert prescorer.score(chinese, 90) is None
+    assert prescorer.score(japanese, 90) is None
+
+
+def test_evaluation_service_short_circuits_with_prescorer() -> None:
+    service = EvaluationService(FailingClient(), "fake-model", prescorer=PreScorer())  # type: ignore[arg-type]
+    assert service.evaluate("Q", "ok", 10) == (PreScorer.FEEDBACK["too_short"], 1)
+    assert service.prescorer.stats()["avoided"] == 1
@@ -1,6 +1,11 @@
+import json
+import multiprocessing
+import threading
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from app.repositories import ProgressRepository
+from app.repositories.file_lock import FileLock
 
 
 def test_progress_first_entry(progress_repository: ProgressRepository) -> None:
@@ -62,3 +67,117 @@ def test_progress_handles_invalid_last_answered(progress_repository: ProgressRep
 
     assert result["xp_total"] == 25
     assert result["streak"] == 1
+
+
+def test_progress_updates_are_journaled_then_compacted(tmp_path: Path) -> None:
+    store = tmp_path / "progress.json"
+    repo = ProgressRepository(store, compact_interval_seconds=3600)
+    now = datetime.now(tz=timezone.utc)
+    repo.update("user-6", 5, now)
+    repo.update("user-7", 8, now)
+
+    # nothing rewritten yet; a fresh reader replays the journal
+    assert not store.exists()
+    assert ProgressRepository(store).fetch("user-6")["xp_total"] == 5
+
+    repo.close()
+    assert json.loads(store.read_text(encoding="utf-8"))["user-7"]["xp_total"] == 8
+    assert not (tmp_path / "progress.json.journal").exists()
+    assert ProgressRepository(store).fetch("user-7")["xp_total"] == 8
+
+
+def test_progress_recovers_from_interrupted_compaction(tmp_path: Path) -> None:
+    store = tmp_path / "progress.json"
+    store.write_text(json.dumps({"user-8": {"xp_total": 1, "streak": 1, "last_answered_on": None}}), encoding="utf-8")
+    (tmp_path / "progress.json.journal.compacting").write_text(
+        json.dumps({"user_id": "user-8", "xp_total": 4, "streak": 1, "last_answered_on": None}) + "\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "progress.json.journal").write_text(
+        json.dumps({"user_id": "user-8", "xp_total": 9, "streak": 2, "last_answered_on": None}) + "\n{\"torn",
+        encoding="utf-8",
+    )
+
+    assert ProgressRepository(store).fetch("user-8")["xp_total"] == 9
+
+
+def test_updates_reach_other_workers_through_the_journal_without_a_reload(tmp_path: Path) -> None:
+    store = tmp_path / "progress.json"
+    writer = ProgressRepository(store, compact_interval_seconds=3600)
+    reader = ProgressRepository(store, compact_interval_seconds=3600)
+    now = datetime.now(tz=timezone.utc)
+    writer.update("user-9", 5, now)
+    assert reader.fetch("user-9")["xp_total"] == 5
+    cache = reader._cache
+    generation = FileLock(store).generation()
+
+    writer.update("user-9", 3, now)
+    writer.update("user-10", 2, now)
+
+    # appends leave the generation alone; the reader only reads the new journal lines
+    assert FileLock(store).generation() == generation
+    assert reader.fetch("user-9")["xp_total"] == 8
+    assert reader.fetch("user-10")["xp_total"] == 2
+    assert reader._cache is cache
+
+    writer.compact()
+    assert FileLock(store).generation() != generation
+    assert reader.fetch("user-9")["xp_total"] == 8
+    assert reader._cache is not cache
+    writer.close()
+    reader.close()
+
+
+def _update_many(store: Path, updates: int) -> None:
+    repo = ProgressRepository(store, compact_interval_seconds=3600, compact_threshold=7)
+    now = datetime.now(tz=timezone.utc)
+    for _ in range(updates):
+        repo.update("shared-user", 1, now)
+    repo.close()
+
+
+def test_progress_updates_from_several_processes_are_not_lost(tmp_path: Path) -> None:
+    store = tmp_path / "progress.json"
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_update_many, args=(store, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    # every process compacted on close, interleaved with the others' journal appends
+    assert ProgressRepository(store).fetch("shared-user")["xp_total"] == 100
+
+
+class SlowSupabase:
+    def __init__(self) -> None:
+        self.slow_started = threading.Event()
+        self.release = threading.Event()
+        self.rows: dict[str, dict] = {}
+
+    def select(self, table: str, filters=None, **kwargs) -> list:
+        row = self.rows.get(filters["user_id"])
+        return [row] if row else []
+
+    def upsert(self, table: str, payload, *, conflict_column: str) -> list:
+        if payload["user_id"] == "slow-user":
+            self.slow_started.set()
+            assert self.release.wait(5)
+        self.rows[payload["user_id"]] = dict(payload)
+        return []
+
+
+def test_slow_supabase_write_does_not_block_other_users(tmp_path: Path) -> None:
+    client = SlowSupabase()
+    repo = ProgressRepository(tmp_path / "progress.json", supabase_client=client, supabase_table="user_progress")  # type: ignore[arg-type]
+    now = datetime.now(tz=timezone.utc)
+    slow = threading.Thread(target=repo.update, args=("slow-user", 5, now))
+    slow.start()
+    assert client.slow_started.wait(5)
+
+    # finishes while the other user's upsert is still on the wire
+    assert repo.update("fast-user", 3, now)["xp_total"] == 3
+    client.release.set()
+    slow.join(timeout=5)
+    assert client.rows["slow-user"]["xp_total"] == 5
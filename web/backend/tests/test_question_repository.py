@@ -1,4 +1,7 @@
-from datetime import date
+import json
+import os
+import time
+from datetime import date, timedelta
 
 import pytest
 
@@ -32,3 +35,66 @@ def test_questions_align_to_monday_weeks(question_repository: QuestionRepository
     # Jan 1, 2025 lands on Wednesday, so it should be the third prompt of the first week.
     jan_first = question_repository.get_daily_question(date(2025, 1, 1))
     assert jan_first.prompt == "Q3"
+
+
+def test_calendar_matches_schedule_for_every_day(tmp_path) -> None:
+    source = tmp_path / "questions.json"
+    source.write_text(
+        json.dumps(
+            {
+                "weeks": [
+                    {"theme": "A", "startDate": "2024-01-08", "questions": ["A1", "A2", "A3"]},
+                    {"theme": "B", "questions": ["B1", "B2"]},
+                    {"theme": "C", "startDate": "2024-03-04", "questions": ["C1", "C2", "C3", "C4"]},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    repository = QuestionRepository(source)
+    questions = list(repository.iter_all())
+    offsets = list(repository.reload().offsets)
+
+    day = date(2023, 12, 25)
+    while day < date(2026, 1, 5):
+        marker = QuestionRepository._monday_aligned_day_number(day)
+        expected = questions[QuestionRepository._index_for_day_marker(marker, offsets, len(questions))]
+        assert repository.get_daily_question(day).id == expected.id
+        day += timedelta(days=1)
+
+
+def test_daily_question_is_reused_per_date(question_repository: QuestionRepository) -> None:
+    first = question_repository.get_daily_question(date(2024, 1, 2))
+    assert question_repository.get_daily_question(date(2024, 1, 2)) is first
+    assert first.available_on == date(2024, 1, 2)
+
+
+def test_bank_hot_reloads_in_background(tmp_path) -> None:
+    source = tmp_path / "questions.json"
+    source.write_text(json.dumps({"weeks": [{"theme": "Old", "questions": ["Old prompt"]}]}), encoding="utf-8")
+    repository = QuestionRepository(source, reload_seconds=0.01)
+    original = repository.version
+    assert repository.get_by_id("week-1-day-1").prompt == "Old prompt"
+
+    source.write_text(json.dumps({"weeks": [{"theme": "New", "questions": ["New prompt"]}]}), encoding="utf-8")
+    os.utime(source, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    deadline = time.monotonic() + 2
+    while repository.version == original and time.monotonic() < deadline:
+        time.sleep(0.02)
+        # readers keep getting a complete snapshot while the reload runs
+        assert repository.get_by_id("week-1-day-1").prompt in {"Old prompt", "New prompt"}
+
+    assert repository.get_by_id("week-1-day-1").prompt == "New prompt"
+    assert repository.week_theme(0) == "New"
+
+
+def test_compiled_bank_is_reused_while_source_unchanged(tmp_path, question_repository: QuestionRepository) -> None:
+    compiled = tmp_path / "questions.pickle"
+    source = question_repository._source_path  # type: ignore[attr-defined]
+    first = QuestionRepository(source, compiled_path=compiled)
+    assert first.get_by_id("week-1-day-2").prompt == "Q2"
+    assert compiled.exists()
+
+    second = QuestionRepository(source, compiled_path=compiled)
+    assert second.version == first.version
+    assert second.get_daily_question(date(2024, 1, 3)).prompt == "Q3"
@@ -1,3 +1,5 @@
+import copy
+import json
 from datetime import date, datetime, timezone
 
 from app.repositories import AnswerRepository, ProgressRepository, StoredAnswer
@@ -68,3 +70,51 @@ def test_daily_question_includes_previous_feedback(
     assert any("Carry yesterday's feedback" in item for item in dopamine["curiosityPrompts"])
     priming = payload["priming"]
     assert "yesterday" in priming["emotionalHook"]
+
+
+def test_anonymous_payload_is_built_once_per_date(
+    question_service: QuestionService,
+    progress_repository: ProgressRepository,
+    answer_repository: AnswerRepository,
+) -> None:
+    first = question_service.daily_question(date(2024, 1, 2), user_id=None)
+    body = question_service.anonymous_daily_json(date(2024, 1, 2))
+
+    assert question_service.daily_question(date(2024, 1, 2), user_id=None) is first
+    assert json.loads(body) == first
+    assert first["xpTotal"] == 0 and first["previousFeedback"] is None
+
+    # a user with history, so every per-user overlay differs from the anonymous value
+    answered_at = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    progress = progress_repository.update("user-4", 12, answered_at)
+    answer_repository.save_answer(
+        StoredAnswer(
+            user_id="user-4",
+            question_id="week-1-day-1",
+            answer="Answer text",
+            feedback="Name the assumption you are testing.",
+            xp_awarded=12,
+            xp_total=12,
+            streak=1,
+            created_at=answered_at,
+            duration_seconds=120,
+            week_index=0,
+        )
+    )
+    anonymous = copy.deepcopy(first)
+    personal = question_service.daily_question(date(2024, 1, 2), user_id="user-4")
+
+    # the shared payload and its cached bytes are untouched by the overlay
+    assert first == anonymous
+    assert question_service.anonymous_daily_json(date(2024, 1, 2)) == body
+    # and the overlay matches building the user's payload from scratch
+    question = question_service._repository.get_daily_question(date(2024, 1, 2))
+    previous_feedback = {
+        "feedback": "Name the assumption you are testing.",
+        "submittedAt": answered_at.isoformat(),
+        "questionId": "week-1-day-1",
+    }
+    week_progress = {"completedDays": 1, "totalDays": QuestionService.WEEK_TOTAL_DAYS, "badgeEarned": False}
+    expected = question_service._build_payload(question, progress, week_progress, previous_feedback, False)
+    assert personal == expected
+    assert personal["xpTotal"] == 12 and personal["priming"] != first["priming"]
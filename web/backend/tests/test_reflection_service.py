@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta, timezone
 
 from app.repositories import StoredAnswer, AnswerRepository, UserRepository
-from app.services import ReflectionService
+from app.services import AnswerService, ReflectionService
 from app.repositories import QuestionRepository
 
 
@@ -79,3 +79,39 @@ def test_reflection_overview_marks_premium_and_teasers(
     assert overview.teasers == []
     assert len(overview.week) == 7
     assert any(day.entry is not None for day in overview.week)
+
+
+def test_reflection_week_is_materialized_and_patched_on_submit(
+    reflection_service: ReflectionService,
+    answer_service: AnswerService,
+    answer_repository: AnswerRepository,
+    question_repository: QuestionRepository,
+    monkeypatch,
+) -> None:
+    user_id = "user-view"
+    builds = []
+    original_window = answer_repository.recent_window
+
+    def counting_window(*args, **kwargs):
+        builds.append(args)
+        return original_window(*args, **kwargs)
+
+    monkeypatch.setattr(answer_repository, "recent_window", counting_window)
+    answer_service.subscribe(reflection_service.record_answer)
+
+    assert reflection_service.overview(user_id).today is None
+    assert reflection_service.overview(user_id).today is None
+    assert len(builds) == 1
+
+    question = question_repository.get_by_id("week-1-day-1")
+    answer_service.submit_answer(question.id, "Slowing down helped me listen.", user_id, 90)
+
+    overview = reflection_service.overview(user_id)
+    assert overview.today is not None and overview.today.question_id == question.id
+    # the submit patched the cached week instead of forcing a re-read
+    assert len(builds) == 1
+
+    # a write this process did not see (another worker) invalidates the view
+    _store_answer(answer_repository, user_id=user_id, question_id="week-1-day-2", answer="From another worker")
+    assert reflection_service.overview(user_id).today.question_id == "week-1-day-2"
+    assert len(builds) == 2
@@ -1,6 +1,12 @@
+import json
+import time
 from datetime import date
 
+from app.api.deps import get_admission_controller
+from app.api.responses import FastJSONResponse
 from app.repositories import ProgressRepository, QuestionRepository
+from app.services import AdmissionController
+from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 
 
@@ -26,6 +32,77 @@ def test_fetch_daily_question(
     assert body["priming"]["teaserQuestion"]
 
 
+def test_daily_question_etag_and_cache_headers(test_client: TestClient) -> None:
+    anonymous = test_client.get("/v1/questions/daily")
+    assert anonymous.headers["cache-control"].startswith("public, max-age=")
+    etag = anonymous.headers["etag"]
+
+    revalidated = test_client.get("/v1/questions/daily", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+    personal = test_client.get("/v1/questions/daily", params={"userId": "etag-user"})
+    assert personal.headers["cache-control"] == "private, no-cache"
+    personal_etag = personal.headers["etag"]
+    assert personal_etag != etag
+    assert test_client.get(
+        "/v1/questions/daily", params={"userId": "etag-user"}, headers={"If-None-Match": personal_etag}
+    ).status_code == 304
+
+    submitted = test_client.post(
+        "/v1/answers",
+        json={
+            "questionId": personal.json()["id"],
+            "answer": "A considered answer",
+            "durationSeconds": 120,
+            "userId": "etag-user",
+        },
+    )
+    assert submitted.status_code == 200
+    changed = test_client.get(
+        "/v1/questions/daily", params={"userId": "etag-user"}, headers={"If-None-Match": personal_etag}
+    )
+    assert changed.status_code == 200
+    assert changed.json()["hasAnsweredToday"] is True
+
+
+def test_reflection_overview_revalidates_with_etag(test_client: TestClient) -> None:
+    first = test_client.get("/v1/reflections/overview", params={"userId": "etag-user"})
+    assert first.status_code == 200
+    assert first.json()["todayLocked"] is True
+
+    etag = first.headers["etag"]
+    again = test_client.get("/v1/reflections/overview", params={"userId": "etag-user"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+
+def test_reflection_overview_sparse_fields(test_client: TestClient) -> None:
+    daily = test_client.get("/v1/questions/daily", params={"userId": "sparse-user"}).json()
+    submitted = test_client.post(
+        "/v1/answers",
+        json={"questionId": daily["id"], "answer": "A long answer " * 50, "durationSeconds": 120, "userId": "sparse-user"},
+    )
+    assert submitted.status_code == 200
+
+    full = test_client.get("/v1/reflections/overview", params={"userId": "sparse-user"})
+    sparse = test_client.get(
+        "/v1/reflections/overview", params={"userId": "sparse-user", "fields": "questionId,excerpt"}
+    )
+    assert sparse.status_code == 200
+    assert set(sparse.json()["today"]) == {"questionId", "excerpt"}
+    assert all(set(day["entry"]) == {"questionId", "excerpt"} for day in sparse.json()["week"] if day["entry"])
+    assert "answer" in full.json()["today"]
+    assert sparse.headers["etag"] != full.headers["etag"]
+    assert test_client.get(
+        "/v1/reflections/overview",
+        params={"userId": "sparse-user", "fields": "questionId,excerpt"},
+        headers={"If-None-Match": sparse.headers["etag"]},
+    ).status_code == 304
+
+    unknown = test_client.get("/v1/reflections/overview", params={"userId": "sparse-user", "fields": "answer,secret"})
+    assert unknown.status_code == 400
+
+
 def test_submit_answer_updates_progress(
     test_client: TestClient,
     progress_repository: ProgressRepository,
@@ -48,3 +125,137 @@ def test_submit_answer_updates_progress(
 
     stored = progress_repository.fetch("anonymous")
     assert stored["xp_total"] == 12
+
+
+def test_submit_answer_rejects_duplicates_and_replays_idempotent_retries(test_client: TestClient) -> None:
+    payload = {
+        "questionId": "week-1-day-2",
+        "answer": "Thoughtful answer",
+        "durationSeconds": 120,
+        "userId": "route-user",
+    }
+    first = test_client.post("/v1/answers", json=payload, headers={"Idempotency-Key": "k-1"})
+    assert first.status_code == 200
+
+    retried = test_client.post("/v1/answers", json=payload, headers={"Idempotency-Key": "k-1"})
+    assert retried.status_code == 200
+    assert retried.json() == first.json()
+
+    reused = test_client.post(
+        "/v1/answers", json={**payload, "answer": "A different answer"}, headers={"Idempotency-Key": "k-1"}
+    )
+    assert reused.status_code == 422
+
+    duplicate = test_client.post("/v1/answers", json=payload)
+    assert duplicate.status_code == 409
+
+
+def test_stream_answer_emits_feedback_then_result(test_client: TestClient) -> None:
+    payload = {
+        "questionId": "week-1-day-3",
+        "answer": "Thoughtful answer",
+        "durationSeconds": 150,
+        "userId": "stream-user",
+    }
+    with test_client.stream("POST", "/v1/answers/stream", json=payload) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    events = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+    assert events[0] == "accepted"
+    assert "feedback" in events
+    assert events[-1] == "result"
+    result = json.loads(body.strip().splitlines()[-1].split(": ", 1)[1])
+    assert result["xpAwarded"] == 12
+
+    duplicate = test_client.post("/v1/answers/stream", json=payload)
+    assert duplicate.status_code == 409
+
+
+def test_deferred_answer_returns_202_and_polls_result(test_client: TestClient) -> None:
+    payload = {
+        "questionId": "week-1-day-4",
+        "answer": "Thoughtful answer",
+        "durationSeconds": 200,
+        "userId": "deferred-user",
+    }
+    accepted = test_client.post("/v1/answers/jobs", json=payload)
+    assert accepted.status_code == 202
+    job_id = accepted.json()["jobId"]
+    assert accepted.headers["location"] == f"/v1/answers/jobs/{job_id}"
+
+    for _ in range(500):
+        body = test_client.get(f"/v1/answers/jobs/{job_id}").json()
+        if body["status"] in ("completed", "failed"):
+            break
+        time.sleep(0.01)
+    assert body["status"] == "completed"
+    assert body["result"]["weekCompletedDays"] == 1
+
+    assert test_client.get("/v1/answers/jobs/missing").status_code == 404
+
+
+def test_submit_answer_defers_when_saturated_and_sheds_fast_users(
+    test_client: TestClient,
+    admission_controller: AdmissionController,
+) -> None:
+    payload = {
+        "questionId": "week-1-day-5",
+        "answer": "Thoughtful answer",
+        "durationSeconds": 240,
+        "userId": "saturated-user",
+    }
+    held = [admission_controller.slot(f"other-{index}") for index in range(8)]
+    for slot in held:
+        slot.__enter__()
+    try:
+        deferred = test_client.post("/v1/answers", json=payload)
+    finally:
+        for slot in held:
+            slot.__exit__(None, None, None)
+    assert deferred.status_code == 202
+    body = deferred.json()
+    assert body["jobId"] and body["provisionalXp"] > 0
+    assert admission_controller.stats()["deferred"] == 1
+
+    limited = AdmissionController(user_rate_per_minute=1, user_burst=1)
+    test_client.app.dependency_overrides[get_admission_controller] = lambda: limited
+    payload = {**payload, "questionId": "week-1-day-6"}
+    assert test_client.post("/v1/answers", json=payload).status_code == 200
+    shed = test_client.post("/v1/answers", json={**payload, "questionId": "week-1-day-7"})
+    assert shed.status_code == 429
+    assert int(shed.headers["retry-after"]) >= 1
+
+
+def test_anonymous_submitters_do_not_share_a_rate_limit(test_client: TestClient) -> None:
+    app = test_client.app
+
+    async def with_client_address(scope, receive, send):
+        # what uvicorn's proxy headers give the app: each caller's own address
+        if scope["type"] == "http":
+            address = dict(scope["headers"]).get(b"x-test-client", b"unknown").decode()
+            scope = {**scope, "client": (address, 0)}
+        await app(scope, receive, send)
+
+    limited = AdmissionController(user_rate_per_minute=1, user_burst=1)
+    app.dependency_overrides[get_admission_controller] = lambda: limited
+    client = TestClient(with_client_address)
+    payload = {"questionId": "week-1-day-1", "answer": "Anonymous thoughts", "durationSeconds": 60}
+
+    first = client.post("/v1/answers/jobs", json=payload, headers={"X-Test-Client": "203.0.113.1"})
+    other = client.post(
+        "/v1/answers/jobs", json={**payload, "questionId": "week-1-day-2"}, headers={"X-Test-Client": "203.0.113.2"}
+    )
+    again = client.post(
+        "/v1/answers/jobs", json={**payload, "questionId": "week-1-day-3"}, headers={"X-Test-Client": "203.0.113.1"}
+    )
+
+    assert first.status_code == 202
+    assert other.status_code == 202
+    assert again.status_code == 429
+
+
+def test_fast_json_response_matches_stdlib_rendering() -> None:
+    payload = {"prompt": "Qué piensas — hoy?", "nested": {"values": [1, 2.5, None, True]}, "empty": []}
+    assert FastJSONResponse(payload).body == JSONResponse(payload).body
@@ -0,0 +1,129 @@
+import json
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app.repositories import (
+    SQLiteAnswerRepository,
+    SQLiteDatabase,
+    SQLiteProgressRepository,
+    SQLiteUserRepository,
+    StoredAnswer,
+)
+from app.repositories.sqlite_migration import migrate
+
+
+@pytest.fixture()
+def database(tmp_path: Path):
+    database = SQLiteDatabase(tmp_path / "thinkdeeper.db")
+    yield database
+    database.close()
+
+
+def _answer(question_id: str, created_at: datetime, user_id: str = "user-1") -> StoredAnswer:
+    return StoredAnswer(
+        user_id=user_id,
+        question_id=question_id,
+        answer=f"Answer to {question_id}",
+        feedback="Solid.",
+        xp_awarded=10,
+        xp_total=10,
+        streak=1,
+        created_at=created_at,
+        duration_seconds=60,
+    )
+
+
+def test_database_uses_wal_and_indexes(database: SQLiteDatabase) -> None:
+    connection = database.connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row["name"] for row in connection.execute("PRAGMA index_list(answers)")}
+    assert {"idx_answers_user_created", "idx_answers_user_week"} <= indexes
+
+
+def test_sqlite_answer_repository_queries(database: SQLiteDatabase) -> None:
+    repository = SQLiteAnswerRepository(database)
+    monday = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    repository.save_answer(_answer("week-1-day-1", monday))
+    repository.save_answer(_answer("week-1-day-2", monday + timedelta(days=1)))
+    repository.save_answer(_answer("week-2-day-1", monday + timedelta(days=7)))
+    repository.save_answer(_answer("week-1-day-1", monday, user_id="user-2"))
+
+    assert [a.question_id for a in repository.answers_for_week("user-1", 0)] == ["week-1-day-1", "week-1-day-2"]
+    assert repository.answered_question_ids("user-1", 1) == {"week-2-day-1"}
+    assert repository.latest_before("user-1", date(2024, 1, 8)).question_id == "week-1-day-2"
+    assert repository.latest_before("user-1", date(2024, 1, 1)) is None
+    assert [a.question_id for a in repository.recent_answers("user-1", limit=2)] == ["week-2-day-1", "week-1-day-2"]
+    window = repository.recent_window("user-1", monday + timedelta(days=1), older_limit=1)
+    assert [a.question_id for a in window] == ["week-2-day-1", "week-1-day-2", "week-1-day-1"]
+
+    snapshot = repository.user_snapshot("user-1", date(2024, 1, 2), 0)
+    assert snapshot.previous.question_id == "week-1-day-1"
+    assert snapshot.answered_question_ids == {"week-1-day-1", "week-1-day-2"}
+
+
+def test_sqlite_progress_updates_are_serialized(database: SQLiteDatabase) -> None:
+    repository = SQLiteProgressRepository(database)
+    now = datetime.now(tz=timezone.utc)
+
+    threads = [threading.Thread(target=repository.update, args=("user-1", 5, now)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    progress = repository.fetch("user-1")
+    assert progress["xp_total"] == 40
+    assert progress["streak"] == 1
+    assert repository.update("user-1", 5, now + timedelta(days=1))["streak"] == 2
+
+
+def test_sqlite_user_repository(database: SQLiteDatabase) -> None:
+    repository = SQLiteUserRepository(database)
+    assert repository.get_plan("user-1") == "free"
+    repository.set_plan("user-1", "Premium")
+    assert repository.is_premium("user-1")
+    assert repository.get_plans(["user-1", "user-2"]) == {"user-1": "premium", "user-2": "free"}
+
+
+def test_migrate_imports_file_stores(tmp_path: Path, database: SQLiteDatabase) -> None:
+    created_at = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    answers_path = tmp_path / "answers.jsonl"
+    records = [
+        {**_record(_answer("week-1-day-1", created_at)), "week_index": None},
+        _record(_answer("week-1-day-2", created_at + timedelta(days=1))),
+    ]
+    answers_path.write_text("\n".join(json.dumps(r) for r in records) + "\n{torn", encoding="utf-8")
+    progress_path = tmp_path / "progress.json"
+    progress_path.write_text(json.dumps({"user-1": {"xp_total": 10, "streak": 1, "last_answered_on": None}}))
+    progress_path.with_name("progress.json.journal").write_text(
+        json.dumps({"user_id": "user-1", "xp_total": 20, "streak": 2, "last_answered_on": "2024-01-02"}) + "\n"
+    )
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps({"user-1": {"plan": "premium"}}))
+
+    counts = migrate(database, answers_path, progress_path, users_path)
+
+    assert counts == {"answers": 2, "progress": 1, "users": 1}
+    assert SQLiteAnswerRepository(database).answered_question_ids("user-1", 0) == {"week-1-day-1", "week-1-day-2"}
+    assert SQLiteProgressRepository(database).fetch("user-1")["xp_total"] == 20
+    assert SQLiteUserRepository(database).is_premium("user-1")
+    # answers are not imported twice
+    assert migrate(database, answers_path)["answers"] == 0
+
+
+def _record(stored: StoredAnswer) -> dict:
+    return {
+        "user_id": stored.user_id,
+        "question_id": stored.question_id,
+        "answer": stored.answer,
+        "feedback": stored.feedback,
+        "xp_awarded": stored.xp_awarded,
+        "xp_total": stored.xp_total,
+        "streak": stored.streak,
+        "created_at": stored.created_at.isoformat(),
+        "duration_seconds": stored.duration_seconds,
+        "week_index": stored.week_index,
+    }
@@ -0,0 +1,83 @@
+import time
+
+import httpx
+import pytest
+
+from app.integrations.supabase_client import (
+    CircuitBreaker,
+    SupabaseClient,
+    SupabaseUnavailableError,
+)
+
+
+def _client(handler, **policy) -> SupabaseClient:
+    client = SupabaseClient("https://example.supabase.co", "key", backoff_base=0.001, **policy)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))  # type: ignore[attr-defined]
+    return client
+
+
+def test_select_projects_columns_and_retries_transient_failures() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if len(seen) < 3:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json=[{"question_id": "week-1-day-1"}])
+
+    client = _client(handler, max_retries=2)
+    rows = client.select("answers", {"user_id": "u1"}, columns=("question_id", "created_at"))
+
+    assert rows == [{"question_id": "week-1-day-1"}]
+    assert len(seen) == 3
+    assert seen[-1].url.params["select"] == "question_id,created_at"
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_then_half_opens_and_recovers() -> None:
+    healthy = False
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[]) if healthy else httpx.Response(500, text="down")
+
+    client = _client(handler, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.05))
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            client.select("answers")
+    assert client.breaker.state == "open"
+    with pytest.raises(SupabaseUnavailableError):
+        client.select("answers")
+
+    time.sleep(0.06)
+    healthy = True
+    assert client.breaker.state == "half-open"
+    assert client.select("answers") == []
+    assert client.breaker.state == "closed"
+
+
+def test_http2_without_h2_warns_and_uses_http1(monkeypatch, caplog) -> None:
+    monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+    with caplog.at_level("WARNING", logger="app.integrations.supabase_client"):
+        options = SupabaseClient._client_options(5.0, 10, 5, http2=True)
+
+    assert options["http2"] is False
+    assert "h2" in caplog.text
+
+
+def test_unexpected_error_during_trial_does_not_leave_the_breaker_stuck() -> None:
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("Cannot send a request, as the client has been closed.")
+        return httpx.Response(200, json=[])
+
+    client = _client(handler, max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0))
+    client.breaker.record_failure()
+    with pytest.raises(RuntimeError):
+        client.select("answers")
+
+    # the failed trial re-opened the breaker, so the next trial is let through again
+    assert client.select("answers") == []
+    assert client.breaker.state == "closed"
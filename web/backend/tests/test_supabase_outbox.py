@@ -0,0 +1,211 @@
+from datetime import date, datetime, timezone
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+from app.integrations.supabase_client import SupabaseRequestError
+from app.repositories import AnswerRepository, ProgressRepository, StoredAnswer, SupabaseBatchWriter
+
+
+class FakeSupabase:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.batches: list[tuple[list[dict], str]] = []
+
+    def insert(self, table: str, payload, *, returning: str = "representation") -> list:
+        if self.fail:
+            raise RuntimeError("Supabase request failed: down")
+        if any(row["answer"] == "bad" for row in payload):
+            raise SupabaseRequestError("Supabase request failed: invalid input syntax", 400)
+        self.batches.append((list(payload), returning))
+        return []
+
+    def select(self, table: str, filters=None, **kwargs) -> list:
+        return [row for rows, _ in self.batches for row in rows if row["user_id"] == filters["user_id"]]
+
+
+def _row(user_id: str, question_id: str, day: int) -> dict:
+    return {
+        "user_id": user_id,
+        "question_id": question_id,
+        "answer": "text",
+        "feedback": "fb",
+        "xp_awarded": 5,
+        "xp_total": 5,
+        "streak": 1,
+        "created_at": datetime(2024, 1, day, tzinfo=timezone.utc).isoformat(),
+        "duration_seconds": 30,
+        "week_index": 0,
+    }
+
+
+def test_rows_are_sent_as_one_minimal_bulk_insert(tmp_path: Path) -> None:
+    client = FakeSupabase()
+    writer = SupabaseBatchWriter(client, "answers", tmp_path / "outbox.jsonl", batch_size=10, window_seconds=60)  # type: ignore[arg-type]
+    for day in range(1, 4):
+        writer.submit(_row("u1", f"week-1-day-{day}", day))
+
+    assert writer.flush() is True
+    assert len(client.batches) == 1
+    rows, returning = client.batches[0]
+    assert [row["question_id"] for row in rows] == ["week-1-day-1", "week-1-day-2", "week-1-day-3"]
+    assert returning == "minimal"
+    assert writer.outbox_path.read_text(encoding="utf-8") == ""
+    writer.close()
+
+
+def test_failed_batch_stays_in_outbox_and_is_replayed(tmp_path: Path) -> None:
+    outbox = tmp_path / "outbox.jsonl"
+    failing = SupabaseBatchWriter(FakeSupabase(fail=True), "answers", outbox, window_seconds=60)  # type: ignore[arg-type]
+    failing.submit(_row("u1", "week-1-day-1", 1))
+    assert failing.flush() is False
+    assert len(failing.outbox_path.read_text(encoding="utf-8").splitlines()) == 1
+
+    healthy = FakeSupabase()
+    replay = SupabaseBatchWriter(healthy, "answers", outbox, window_seconds=60)  # type: ignore[arg-type]
+    assert replay.pending_count() == 1
+    replay.close()
+    assert [row["question_id"] for row in healthy.batches[0][0]] == ["week-1-day-1"]
+    assert replay.pending_count() == 0
+
+
+def test_rejected_rows_are_dead_lettered_without_blocking_the_queue(tmp_path: Path) -> None:
+    outbox = tmp_path / "outbox.jsonl"
+    client = FakeSupabase()
+    writer = SupabaseBatchWriter(client, "answers", outbox, window_seconds=60)  # type: ignore[arg-type]
+    writer.submit(_row("u1", "week-1-day-1", 1))
+    writer.submit({**_row("u1", "week-1-day-2", 2), "answer": "bad"})
+    writer.submit(_row("u1", "week-1-day-3", 3))
+
+    assert writer.flush() is True
+    assert [rows[0]["question_id"] for rows, _ in client.batches] == ["week-1-day-1", "week-1-day-3"]
+    dead = [json.loads(line) for line in (tmp_path / "outbox.jsonl.dead").read_text(encoding="utf-8").splitlines()]
+    assert [entry["record"]["question_id"] for entry in dead] == ["week-1-day-2"]
+    assert writer.outbox_path.read_text(encoding="utf-8") == ""
+    assert writer.stats() == {"pending": 0, "deadLettered": 1}
+    writer.close()
+
+
+def _queue_and_exit(outbox: Path) -> None:
+    writer = SupabaseBatchWriter(FakeSupabase(fail=True), "answers", outbox, window_seconds=60)  # type: ignore[arg-type]
+    writer.submit(_row("u2", "week-1-day-1", 1))
+    os._exit(0)  # die without flushing, like a killed worker
+
+
+def test_workers_keep_separate_outboxes_and_adopt_orphans(tmp_path: Path) -> None:
+    outbox = tmp_path / "outbox.jsonl"
+    # a plain outbox left by a single-process deployment
+    outbox.write_text(json.dumps(_row("u1", "week-1-day-1", 1)) + "\n", encoding="utf-8")
+    process = multiprocessing.get_context("fork").Process(target=_queue_and_exit, args=(outbox,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    client = FakeSupabase()
+    writer = SupabaseBatchWriter(client, "answers", outbox, window_seconds=60)  # type: ignore[arg-type]
+    assert writer.outbox_path == tmp_path / f"outbox.jsonl.{os.getpid()}"
+    assert writer.pending_count() == 2
+    assert not outbox.exists()
+    assert not (tmp_path / f"outbox.jsonl.{process.pid}").exists()
+    writer.close()
+    assert sorted(row["user_id"] for rows, _ in client.batches for row in rows) == ["u1", "u2"]
+
+
+def test_repository_reads_include_unflushed_rows(tmp_path: Path) -> None:
+    client = FakeSupabase()
+    writer = SupabaseBatchWriter(client, "answers", tmp_path / "outbox.jsonl", window_seconds=60)  # type: ignore[arg-type]
+    repo = AnswerRepository(
+        tmp_path / "answers.jsonl", supabase_client=client, supabase_table="answers", batch_writer=writer  # type: ignore[arg-type]
+    )
+    repo.save_answer(
+        StoredAnswer(
+            user_id="u2",
+            question_id="week-1-day-1",
+            answer="pending",
+            feedback="fb",
+            xp_awarded=5,
+            xp_total=5,
+            streak=1,
+            created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            duration_seconds=30,
+            week_index=0,
+        )
+    )
+
+    assert client.batches == []
+    assert repo.answered_question_ids("u2", 0) == {"week-1-day-1"}
+    assert repo.user_snapshot("u2", date(2024, 1, 2), 0).previous is not None
+    writer.flush()
+    # once flushed, the row is served by Supabase and not duplicated
+    assert [a.answer for a in repo.recent_answers("u2")] == ["pending"]
+
+
+def test_failed_direct_insert_is_queued_for_replay(tmp_path: Path) -> None:
+    client = FakeSupabase(fail=True)
+    writer = SupabaseBatchWriter(client, "answers", tmp_path / "outbox.jsonl", window_seconds=60)  # type: ignore[arg-type]
+    repo = AnswerRepository(
+        tmp_path / "answers.jsonl",
+        supabase_client=client,  # type: ignore[arg-type]
+        supabase_table="answers",
+        batch_writer=writer,
+        batch_writes=False,
+    )
+    row = _row("u3", "week-1-day-1", 1)
+    repo.save_answer(StoredAnswer(**{**row, "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)}))
+
+    assert not (tmp_path / "answers.jsonl").exists()
+    assert writer.pending_count() == 1
+    client.fail = False
+    assert writer.flush() is True
+    assert [rows[0]["user_id"] for rows, _ in client.batches] == ["u3"]
+    writer.close()
+
+
+class FakeProgressSupabase:
+    def __init__(self) -> None:
+        self.fail = True
+        self.rows: dict[str, dict] = {}
+        self.upserts: list[list[dict]] = []
+
+    def select(self, table: str, filters=None, **kwargs) -> list:
+        if self.fail:
+            raise RuntimeError("Supabase request failed: down")
+        row = self.rows.get(filters["user_id"])
+        return [row] if row else []
+
+    def upsert(self, table: str, payload, *, conflict_column: str) -> list:
+        if self.fail:
+            raise RuntimeError("Supabase request failed: down")
+        rows = payload if isinstance(payload, list) else [payload]
+        self.upserts.append(list(rows))
+        for row in rows:
+            self.rows[row[conflict_column]] = dict(row)
+        return []
+
+
+def test_failed_progress_upserts_are_queued_and_replayed(tmp_path: Path) -> None:
+    client = FakeProgressSupabase()
+    outbox = SupabaseBatchWriter(
+        client, "user_progress", tmp_path / "progress.outbox.jsonl", window_seconds=60, conflict_column="user_id"  # type: ignore[arg-type]
+    )
+    repo = ProgressRepository(
+        tmp_path / "progress.json",
+        supabase_client=client,  # type: ignore[arg-type]
+        supabase_table="user_progress",
+        outbox=outbox,
+    )
+    repo.update("u1", 5, datetime(2024, 1, 1, 9, tzinfo=timezone.utc))
+    client.fail = False
+    # the queued row is newer than Supabase, so it is both read and built upon
+    repo.update("u1", 7, datetime(2024, 1, 2, 9, tzinfo=timezone.utc))
+
+    assert client.upserts == []
+    assert repo.fetch("u1")["xp_total"] == 12
+    assert not (tmp_path / "progress.json.journal").exists()
+    assert outbox.flush() is True
+    # one upsert per key per batch, carrying the latest value
+    assert client.upserts == [[{"user_id": "u1", "xp_total": 12, "streak": 2, "last_answered_on": "2024-01-02T09:00:00+00:00"}]]
+    assert repo.fetch("u1")["xp_total"] == 12
+    outbox.close()
+    repo.close()
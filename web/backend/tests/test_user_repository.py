@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from app.repositories import UserRepository
+
+
+def test_plans_are_journaled_then_compacted(tmp_path: Path) -> None:
+    store = tmp_path / "users.json"
+    store.write_text(json.dumps({"user-1": {"plan": "premium"}}), encoding="utf-8")
+    repo = UserRepository(store)
+
+    repo.set_plan("user-2", "Premium")
+
+    # the snapshot is untouched until compaction; the change lives in the journal
+    assert json.loads(store.read_text(encoding="utf-8")) == {"user-1": {"plan": "premium"}}
+    assert repo.get_plans(["user-1", "user-2", "user-3"]) == {
+        "user-1": "premium",
+        "user-2": "premium",
+        "user-3": "free",
+    }
+
+    repo.close()
+    assert json.loads(store.read_text(encoding="utf-8"))["user-2"] == {"plan": "premium"}
+    assert not (tmp_path / "users.json.journal").exists()
+
+
+def test_plan_lookups_reload_when_another_writer_changes_them(tmp_path: Path) -> None:
+    store = tmp_path / "users.json"
+    reader = UserRepository(store)
+    writer = UserRepository(store)
+    assert reader.get_plan("user-1") == "free"
+
+    writer.set_plan("user-1", "premium")
+    assert reader.is_premium("user-1")
+
+
+def test_direct_edits_to_users_json_are_picked_up(tmp_path: Path) -> None:
+    store = tmp_path / "users.json"
+    store.write_text(json.dumps({"user-1": {"plan": "free"}}), encoding="utf-8")
+    repo = UserRepository(store)
+    assert repo.get_plan("user-1") == "free"
+
+    # an operator upgrade written straight to the file, with no lock generation bump
+    store.write_text(json.dumps({"user-1": {"plan": "premium"}}), encoding="utf-8")
+    assert repo.is_premium("user-1")
+
+
+def test_direct_edits_win_over_plans_journaled_before_them(tmp_path: Path) -> None:
+    store = tmp_path / "users.json"
+    repo = UserRepository(store)
+    repo.set_plan("user-1", "premium")
+    repo.set_plan("user-2", "premium")
+
+    # an operator downgrade written straight to the file after those plans were journaled
+    store.write_text(json.dumps({"user-1": {"plan": "free"}}), encoding="utf-8")
+    later = time.time_ns() + 1_000_000_000
+    os.utime(store, ns=(later, later))
+
+    assert repo.get_plans(["user-1", "user-2"]) == {"user-1": "free", "user-2": "free"}
+    assert UserRepository(store).get_plan("user-1") == "free"
+
+    os.utime(store, ns=(later - 2_000_000_000, later - 2_000_000_000))
+    repo.set_plan("user-1", "premium")
+    assert UserRepository(store).is_premium("user-1")
+
+
+def test_journal_compacts_at_threshold(tmp_path: Path) -> None:
+    store = tmp_path / "users.json"
+    repo = UserRepository(store, compact_threshold=3)
+    for index in range(3):
+        repo.set_plan(f"user-{index}", "premium")
+
+    assert not (tmp_path / "users.json.journal").exists()
+    assert UserRepository(store).get_plans([f"user-{index}" for index in range(3)]) == {
+        f"user-{index}": "premium" for index in range(3)
+    }